@@ -25,12 +25,23 @@ class BorderCounterConfig:
     in_frames: int = 1
     out_frames: int = 1
     iou: float = 0.3
+    # max_missing / max_missing_inside / ocluded_ttl: frames del video, incluidos los
+    # salteados por adaptive_stride (no updates del tracker)
     max_missing: int = 30
     max_missing_inside: int = 10
     border_as_inside: bool = False
     inner_ratio_min: float = 0.6
     prevent_recount: bool = True
     ocluded_ttl: int = 45
+    max_tracks: int | None = None  # tope de objetos vivos del tracker (None = sin tope, como antes)
+    evict_by: str = "age"  # al superar max_tracks: "age" (vistos hace más tiempo) | "conf"
+    # Predicción de velocidad constante por objeto: el IoU se mide contra la caja predicha
+    # según los frames transcurridos (tolera stride / frames salteados)
+    predict_motion: bool = False
+    motion_alpha: float = 0.5  # suavizado de la velocidad (1 = solo la última medición)
+    max_predict_gap: int = 30  # frames máximos de extrapolación
+    motion_gate: float = 1.0  # objetos aún sin velocidad: distancia máx. entre centros (en diagonales)
+    motion_min_iou: float = 0.05  # ... y solape mínimo con su última caja
     person_conf_min: float = 0.25
     person_dist_px: float = 15.0
     person_gate_memory: int = 10
@@ -39,6 +50,7 @@ class BorderCounterConfig:
     cooldown_frames: int = 3
     min_count: int = 0
     mode: str = "predict"
+    idle_stride: int = 1  # stride de inferencia sin actividad (MainConfig.adaptive_stride)
 
 
 @dataclass
@@ -59,6 +71,7 @@ class SignalsCounterConfig:
     person_dist_px: float = 15.0
     person_gate_memory: int = 10
     start_count: int = 0
+    idle_stride: int = 1
 
 
 @dataclass
@@ -79,24 +92,92 @@ class InteractionCounterConfig:
     person_gate_memory: int = 10
     min_idle_frames: int = 5
     start_count: int = 0
+    idle_stride: int = 1
 
 
 @dataclass
 class MainConfig:
+    source: str = "frames"  # "frames" (carpeta de imágenes) | "video" (archivo o dispositivo)
     frames_dir: str = "data/pickeoPaletts/secondary_camera/img"
+    video: str | None = None  # ruta a mp4/avi o índice de cámara ("0")
     model: str = "models/MRTN-TRAIN-01.pt"
     mode: str = "predict"
     conf: float = 0.5
     imgsz: int = 1024
     device: str | None = None
     tracker: str = "bytetrack.yaml"
+    backend: str = "torch"  # "torch" (Ultralytics) | "onnx" (ONNX Runtime CPU, export cacheado junto al .pt)
+    onnx_threads: int = 0  # hilos intra-op de ONNX Runtime (0 = default)
+    # Con backend="onnx": None (FP32) | "dynamic" | "static" (INT8, cacheado junto al .pt)
+    quantize: str | None = None
+    quant_calib_dir: str | None = None  # frames de calibración (static); None = frames_dir
+    quant_calib_frames: int = 64
+    # "yolo" | "labels" (reproduce labels/*.txt de utils/detect_img.py, sin modelo)
+    detector: str = "yolo"
+    labels_dir: str | None = None  # p.ej. output/frames/<nameroot>/secondary/labels
+    labels_names: str | None = None  # names.json; None = junto a labels_dir
+    # Tabla de clases si no hay names.json (p.ej. ("area_de_trabajo_pallet", "persona", ...));
+    # None = la del modelo (se carga solo para leerla)
+    class_names: tuple[str, ...] | None = None
     outdir: str = "output/main"
     out_video: str = "main.mp4"
+    save_video: bool = True
     fps: float = 5.0
     video_container: str = "mp4"
     ffmpeg_reencode: bool = True
     recursive: bool = False
+    # Varias cámaras en un proceso: nameroot con <camera>_camera/img (salidas en outdir/<camera>/)
+    cameras_root: str | None = None
+    cameras: tuple[str, ...] = ("primary", "secondary")
+    prefetch_workers: int = 0
+    prefetch_queue: int = 8
+    reuse_buffers: bool = False  # decodificar sobre buffers preasignados y dibujar sin copiar
+    decode_process: bool = False  # decodificar en otro proceso (anillo de shared_memory; requiere guard __main__)
+    shm_slots: int = 8
+    frame_cache: bool = False  # cache memmap de frames decodificados (re-ejecuciones sobre la misma carpeta)
+    frame_cache_dir: str = "output/cache/frames"
+    frame_manifest: bool = False  # manifiesto persistente (evita glob + sort completo al iniciar)
+    frame_manifest_dir: str = "output/cache/manifests"
+    follow: bool = False  # modo "watch folder": seguir procesando frames nuevos
+    follow_poll: float = 0.5
+    follow_idle_timeout: float | None = None  # None = hasta Ctrl+C
+    # Decodificar a escala reducida: 1, 2, 4, 8 o "auto" (la mayor que no baje de imgsz).
+    # Opt-in aunque save_video sea False: cambia levemente lo que ve el detector.
+    # El video de salida sale a la escala decodificada.
+    decode_scale: int | str = 1
     limit: int | None = None
+    log_tracker: bool = True  # contadores del tracker border por frame en frames_*.jsonl
+    # Checkpoints del estado de conteo (outdir/checkpoint.pkl) para reanudar corridas largas
+    checkpoint_every: int = 0  # frames leídos entre checkpoints (0 = sin checkpoints)
+    checkpoint_max_overhead: float = 0.02  # fracción del tiempo de corrida; si se supera se duplica el intervalo
+    resume: bool = False  # reanudar desde el checkpoint de outdir (logs y video continúan)
+    batch_size: int = 1  # frames por pasada del detector (modo track: siempre de a 1)
+    # Pipeline asíncrono: inferencia en un hilo (hasta pipeline_depth lotes adelantados al
+    # conteo) y dibujo + codificación en otro; el conteo sigue en orden y es determinista
+    pipeline: bool = False
+    pipeline_depth: int = 2
+    render_queue: int = 8
+    # Inferencia sobre la ROI (outer del área + margen) una vez fijada el área (solo modo predict)
+    roi_inference: bool = False
+    roi_margin: int = 96  # px alrededor del outer para ver a las personas que se acercan
+    roi_imgsz: int = 640
+    roi_refresh: int = 100  # frame completo cada N frames (revalida el área)
+    roi_revalidate: bool = True  # re-elegir el área si no aparece en roi_reset_after refrescos seguidos
+    roi_reset_after: int = 2
+    # Cache de detecciones (SQLite): re-ejecuciones con el mismo modelo/conf/imgsz no corren YOLO
+    detection_cache: bool = False
+    detection_cache_path: str = "output/cache/detections.sqlite"
+    # Stride adaptativo: sin actividad se infiere 1 de cada N frames (N = menor idle_stride
+    # de los módulos habilitados); backfill procesa los saltados al volver la actividad
+    adaptive_stride: bool = False
+    adaptive_backfill: bool = False
+    # Compuerta de movimiento: reutiliza detecciones previas si el frame casi no cambió
+    motion_gate: bool = False
+    motion_threshold: float = 0.0005  # fracción de píxeles cambiados (imagen reducida) bajo la cual se reutiliza
+    motion_pixel_threshold: int = 15  # diferencia de gris (0-255) para que un píxel cuente como cambiado
+    motion_width: int = 160
+    motion_refresh: int = 10  # inferencia forzada cada N frames reutilizados
+    motion_roi: bool = True  # medir solo dentro del outer del área fijada
     vote_threshold: float = 0.5
     weights: dict[str, float] = field(default_factory=lambda: {"border": 1.0, "interaction": 0.5})
     save_events: bool = True
@@ -1,10 +1,21 @@
-from .frame_loader import FrameLoader, FrameData
+from .frame_loader import FrameLoader, FrameData, PrefetchStats
+from .video_source import VideoFrameSource
+from .frame_cache import FrameCache
+from .frame_manifest import FrameManifest, ManifestStats
+from .shm_ring import SharedFrameRing, RingStats
+from .frame_pool import FramePool, PoolStats
+from .detections import Detections, as_detections
+from .box_ops import iou_matrix
+from .onnx_backend import OnnxYolo, export_onnx, onnx_path_for, quantize_onnx
 from .detector_yolo import DetectorYolo
+from .labels_detector import LabelsDetector, LabelsStats, load_names
+from .file_hash import file_sha256
+from .detection_cache import DetectionCache, DetectionCacheStats, CachedDetector, frame_key
 from .visualizer import Visualizer
 from .area_selector import AreaSelector, AreaSelection
 from .area_zones import AreaZones, make_inner_outer
-from .border_state import BorderState, classify_bbox_state
-from .border_event_tracker import BorderEventTracker, BorderEvent, TrackedObject
+from .border_state import BorderState, classify_bbox_state, classify_states
+from .border_event_tracker import BorderEventTracker, BorderEvent, TrackedObject, TrackerStats
 from .person_gate import person_near_border
 from .border_counter import BorderCounter, CounterState
 from .border_counter_module import BorderCounterModule, ModuleOutput
@@ -12,11 +23,42 @@ from .voting import VotingEngine, VoteEvent
 from .video_writer import open_video_writer, reencode_mp4_ffmpeg
 from .signals_counter_module import SignalsCounterModule, SignalEvent, SignalsOutput
 from .interaction_counter_module import InteractionCounterModule, InteractionEvent, InteractionOutput
+from .counting_session import CountingSession, SessionStep
+from .adaptive_sampler import AdaptiveSampler, SamplerStats, module_activity
+from .motion_gate import MotionGate, MotionGateStats
+from .roi_planner import RoiPlanner, RoiStats
+from .checkpoint import Checkpointer, CheckpointStats, load_checkpoint
+from .run_outputs import RunOutputs
+from .pipeline import PipelineRunner, MultiCameraRunner, RenderWorker, render_frame, detach_frame, interleave
 
 __all__ = [
     "FrameLoader",
     "FrameData",
+    "PrefetchStats",
+    "VideoFrameSource",
+    "FrameCache",
+    "FrameManifest",
+    "ManifestStats",
+    "SharedFrameRing",
+    "RingStats",
+    "FramePool",
+    "PoolStats",
+    "Detections",
+    "as_detections",
+    "iou_matrix",
+    "OnnxYolo",
+    "export_onnx",
+    "onnx_path_for",
+    "quantize_onnx",
     "DetectorYolo",
+    "LabelsDetector",
+    "LabelsStats",
+    "load_names",
+    "DetectionCache",
+    "DetectionCacheStats",
+    "CachedDetector",
+    "frame_key",
+    "file_sha256",
     "Visualizer",
     "AreaSelector",
     "AreaSelection",
@@ -24,9 +66,11 @@ __all__ = [
     "make_inner_outer",
     "BorderState",
     "classify_bbox_state",
+    "classify_states",
     "BorderEventTracker",
     "BorderEvent",
     "TrackedObject",
+    "TrackerStats",
     "person_near_border",
     "BorderCounter",
     "CounterState",
@@ -42,4 +86,23 @@ __all__ = [
     "InteractionCounterModule",
     "InteractionEvent",
     "InteractionOutput",
+    "CountingSession",
+    "SessionStep",
+    "AdaptiveSampler",
+    "SamplerStats",
+    "module_activity",
+    "MotionGate",
+    "MotionGateStats",
+    "RoiPlanner",
+    "RoiStats",
+    "Checkpointer",
+    "CheckpointStats",
+    "load_checkpoint",
+    "RunOutputs",
+    "PipelineRunner",
+    "MultiCameraRunner",
+    "RenderWorker",
+    "render_frame",
+    "detach_frame",
+    "interleave",
 ]
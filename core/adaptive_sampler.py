@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Iterable
+
+from .area_zones import make_inner_outer
+from .detections import Detections
+from .frame_loader import FrameData
+from .person_gate import person_near_border
+
+
+@dataclass
+class SamplerStats:
+    frames: int = 0
+    processed: int = 0
+    skipped: int = 0
+    backfilled: int = 0
+
+    @property
+    def skip_ratio(self) -> float:
+        return self.skipped / self.frames if self.frames else 0.0
+
+    def as_dict(self) -> dict:
+        d = asdict(self)
+        d["skip_ratio"] = self.skip_ratio
+        return d
+
+
+def module_activity(module: Any, detections: Detections | Iterable[dict], image_size: tuple[int, int]) -> bool:
+    """
+    True si el módulo necesita frecuencia completa: área aún sin fijar, estado
+    interno en curso o una persona cerca del borde en las detecciones actuales.
+    """
+    if not module.selector.locked:
+        return True
+    if module.is_busy():
+        return True
+    area = module.selector.selected
+    zones = make_inner_outer(
+        area.bbox_xyxy,
+        image_size=image_size,
+        shrink_px=module.cfg.shrink,
+        expand_px=module.cfg.expand,
+    )
+    near, _ = person_near_border(
+        detections,
+        inner_xyxy=zones.inner_xyxy,
+        outer_xyxy=zones.outer_xyxy,
+        conf_min=module.cfg.person_conf_min,
+        dist_px=module.cfg.person_dist_px,
+    )
+    return near
+
+
+class AdaptiveSampler:
+    """
+    Reduce la frecuencia de inferencia a 1 de cada `idle_stride` frames mientras
+    ningún módulo reporta actividad, y vuelve a frecuencia completa apenas la hay.
+
+    Los frames saltados quedan retenidos hasta la siguiente decisión: si ésta
+    detecta actividad y `backfill` está activo se devuelven para procesarlos en
+    orden; si no, se devuelven marcados como saltados.
+    """
+
+    def __init__(
+        self,
+        idle_stride: int = 1,
+        backfill: bool = False,
+        detach: Callable[[FrameData], FrameData] | None = None,
+    ) -> None:
+        self.idle_stride = max(1, idle_stride)
+        self.backfill = backfill
+        # Para fuentes cuyas imágenes son vistas temporales (p.ej. SharedFrameRing)
+        self.detach = detach
+        self.idle = False
+        self.stats = SamplerStats()
+        self._last_processed = -1
+        self._held: list[FrameData] = []
+
+    def state_dict(self) -> dict:
+        """Estado para un checkpoint; se toma sin frames retenidos."""
+        if self._held:
+            raise RuntimeError("AdaptiveSampler.state_dict() with held frames")
+        return {"idle": self.idle, "last_processed": self._last_processed, "stats": asdict(self.stats)}
+
+    def load_state(self, state: dict) -> None:
+        self.idle = state["idle"]
+        self._last_processed = state["last_processed"]
+        self.stats = SamplerStats(**state["stats"])
+        self._held = []
+
+    @property
+    def holding(self) -> int:
+        """Frames retenidos a la espera de la próxima decisión."""
+        return len(self._held)
+
+    def admit(self, frame: FrameData) -> bool:
+        self.stats.frames += 1
+        if not self.idle or self.idle_stride <= 1 or frame.index - self._last_processed >= self.idle_stride:
+            self._last_processed = frame.index
+            self.stats.processed += 1
+            return True
+        self._held.append(self.detach(frame) if self.detach is not None else frame)
+        return False
+
+    def release(self, active: bool, before: int | None = None) -> list[tuple[FrameData, bool]]:
+        """
+        Devuelve los frames retenidos como (frame, backfill) y actualiza el estado.
+        Con `before` solo se liberan los retenidos con índice menor (inferencia por lotes).
+        """
+        do_backfill = active and self.backfill
+        if before is None:
+            out, self._held = self._held, []
+        else:
+            out = [f for f in self._held if f.index < before]
+            self._held = [f for f in self._held if f.index >= before]
+        held = [(f, do_backfill) for f in out]
+        if do_backfill:
+            self.stats.backfilled += len(held)
+            self.stats.processed += len(held)
+        else:
+            self.stats.skipped += len(held)
+        self.idle = not active
+        return held
+
+    def flush(self) -> list[tuple[FrameData, bool]]:
+        held = [(f, False) for f in self._held]
+        self.stats.skipped += len(held)
+        self._held = []
+        return held
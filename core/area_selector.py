@@ -1,9 +1,13 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from math import hypot
 from typing import Iterable
 
+import numpy as np
+
+from .detections import Detections, as_detections
+
 
 @dataclass(frozen=True)
 class AreaSelection:
@@ -42,6 +46,22 @@ class AreaSelector:
     def selected(self) -> AreaSelection | None:
         return self._best
 
+    def state_dict(self) -> dict:
+        best = asdict(self._best) if self._best is not None else None
+        return {"best": best, "seen_frames": self._seen_frames, "locked": self._locked, "hu": self._hu}
+
+    def load_state(self, state: dict) -> None:
+        self._best = AreaSelection(**state["best"]) if state["best"] is not None else None
+        self._seen_frames = state["seen_frames"]
+        self._locked = state["locked"]
+        self._hu = state["hu"]
+
+    def reset(self) -> None:
+        """Descarta el área elegida y vuelve a la fase de warmup."""
+        self._best = None
+        self._seen_frames = 0
+        self._locked = False
+
     def set_hu(self, hu: str | None) -> None:
         self._hu = hu
         if self._best is not None:
@@ -57,7 +77,7 @@ class AreaSelector:
 
     def update(
         self,
-        detections: Iterable[dict],
+        detections: Detections | Iterable[dict],
         image_size: tuple[int, int],
         frame_index: int,
     ) -> AreaSelection | None:
@@ -69,32 +89,30 @@ class AreaSelector:
         img_cx, img_cy = img_w / 2.0, img_h / 2.0
         img_diag = hypot(img_w, img_h)
 
-        for det in detections:
-            class_name = det.get("class_name")
-            conf = float(det.get("conf", 0.0))
-            if class_name not in self.target_classes or conf < self.conf_min:
-                continue
-
-            x1, y1, x2, y2 = det.get("bbox_xyxy", [0.0, 0.0, 0.0, 0.0])
-            area = max(0.0, (x2 - x1)) * max(0.0, (y2 - y1))
-            cx = (x1 + x2) / 2.0
-            cy = (y1 + y2) / 2.0
-            dist = hypot(cx - img_cx, cy - img_cy)
-            center_score = 1.0 - min(1.0, dist / img_diag)
-            score = area * (0.5 + 0.5 * center_score)
-
-            cand = AreaSelection(
-                class_id=int(det.get("class_id", -1)),
-                class_name=str(class_name),
-                bbox_xyxy=[float(x1), float(y1), float(x2), float(y2)],
-                conf=conf,
-                score=score,
-                frame_index=frame_index,
-                hu=self._hu,
-            )
-
-            if self._best is None or cand.score > self._best.score:
-                self._best = cand
+        dets = as_detections(detections)
+        cands = dets[dets.class_mask(self.target_classes) & dets.conf_at_least(self.conf_min)]
+        if len(cands):
+            b = cands.xyxy.astype(np.float64)
+            x1, y1, x2, y2 = b[:, 0], b[:, 1], b[:, 2], b[:, 3]
+            area = np.maximum(0.0, x2 - x1) * np.maximum(0.0, y2 - y1)
+            dist = np.hypot((x1 + x2) / 2.0 - img_cx, (y1 + y2) / 2.0 - img_cy)
+            center_score = 1.0 - np.minimum(1.0, dist / img_diag)
+            scores = area * (0.5 + 0.5 * center_score)
+
+            # Primer máximo, igual que recorrer los candidatos en orden con ">"
+            i = int(np.argmax(scores))
+            score = float(scores[i])
+            if self._best is None or score > self._best.score:
+                cid = int(cands.class_id[i])
+                self._best = AreaSelection(
+                    class_id=cid,
+                    class_name=cands.names.get(cid, str(cid)),
+                    bbox_xyxy=b[i].tolist(),
+                    conf=float(cands.conf[i]),
+                    score=score,
+                    frame_index=frame_index,
+                    hu=self._hu,
+                )
                 if self.lock_on_first:
                     self._locked = True
 
@@ -17,6 +17,12 @@ class BorderCounter:
         self.cooldown_frames = cooldown_frames
         self.min_count = min_count
 
+    def state_dict(self) -> dict:
+        return {"count": self.state.count, "last_event_frame": self.state.last_event_frame}
+
+    def load_state(self, state: dict) -> None:
+        self.state = CounterState(**state)
+
     def update(self, events: list[BorderEvent], frame_index: int) -> int:
         # En este sistema asumimos máximo 1 evento por frame.
         if not events:
@@ -6,6 +6,7 @@ from .area_selector import AreaSelector, AreaSelection
 from .area_zones import make_inner_outer, AreaZones
 from .border_counter import BorderCounter
 from .border_event_tracker import BorderEventTracker, BorderEvent
+from .detections import Detections, as_detections
 from .person_gate import person_near_border
 
 
@@ -34,6 +35,13 @@ class BorderCounterModule:
             inner_ratio_min=cfg.inner_ratio_min,
             prevent_recount=cfg.prevent_recount,
             ocluded_ttl=cfg.ocluded_ttl,
+            max_tracks=cfg.max_tracks,
+            evict_by=cfg.evict_by,
+            predict_motion=cfg.predict_motion,
+            motion_alpha=cfg.motion_alpha,
+            max_predict_gap=cfg.max_predict_gap,
+            motion_gate=cfg.motion_gate,
+            motion_min_iou=cfg.motion_min_iou,
         )
         self.counter = BorderCounter(
             start_count=cfg.start_count,
@@ -42,7 +50,25 @@ class BorderCounterModule:
         )
         self.person_near_streak = 0
 
-    def update(self, detections: list[dict], frame_index: int, image_size: tuple[int, int]) -> ModuleOutput:
+    def state_dict(self) -> dict:
+        return {
+            "selector": self.selector.state_dict(),
+            "tracker": self.tracker.state_dict(),
+            "counter": self.counter.state_dict(),
+            "person_near_streak": self.person_near_streak,
+        }
+
+    def load_state(self, state: dict) -> None:
+        self.selector.load_state(state["selector"])
+        self.tracker.load_state(state["tracker"])
+        self.counter.load_state(state["counter"])
+        self.person_near_streak = state["person_near_streak"]
+
+    def is_busy(self) -> bool:
+        return self.person_near_streak > 0
+
+    def update(self, detections: Detections | list[dict], frame_index: int, image_size: tuple[int, int]) -> ModuleOutput:
+        detections = as_detections(detections)
         self.selector.update(detections, image_size=image_size, frame_index=frame_index)
 
         if self.selector.selected is None:
@@ -1,13 +1,19 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from typing import Iterable
 
-from .border_state import BorderState, classify_bbox_state
+import numpy as np
+
+from .box_ops import iou_matrix
+from .border_state import STATE_BY_CODE, STATE_BORDER, STATE_INSIDE, STATE_OUTSIDE, BorderState, classify_states
+from .detections import Detections, as_detections
 
 
 @dataclass
 class TrackedObject:
+    """Copia de un objeto seguido (ver BorderEventTracker.get_objects); el estado vive en _TrackStore."""
+
     obj_id: int
     class_id: int
     class_name: str
@@ -36,22 +42,147 @@ class BorderEvent:
     reason: str
 
 
-def _iou(a: list[float], b: list[float]) -> float:
-    ax1, ay1, ax2, ay2 = a
-    bx1, by1, bx2, by2 = b
-    inter_x1 = max(ax1, bx1)
-    inter_y1 = max(ay1, by1)
-    inter_x2 = min(ax2, bx2)
-    inter_y2 = min(ay2, by2)
-    inter_w = max(0.0, inter_x2 - inter_x1)
-    inter_h = max(0.0, inter_y2 - inter_y1)
-    inter_area = inter_w * inter_h
-    a_area = max(0.0, ax2 - ax1) * max(0.0, ay2 - ay1)
-    b_area = max(0.0, bx2 - bx1) * max(0.0, by2 - by1)
-    union = a_area + b_area - inter_area
-    if union <= 0.0:
-        return 0.0
-    return inter_area / union
+@dataclass
+class TrackerStats:
+    live: int = 0  # objetos vivos tras el último update
+    occluded: int = 0
+    evicted_frame: int = 0  # bajas por max_tracks en el último update
+    peak: int = 0
+    created: int = 0
+    removed: int = 0  # bajas normales (max_missing / ocluded_ttl)
+    evicted: int = 0  # bajas por max_tracks
+    store_bytes: int = 0  # memoria de los arreglos del store (capacidad reservada)
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+    def frame_dict(self) -> dict:
+        """Contadores por frame para el log de frames."""
+        return {"live": self.live, "occluded": self.occluded, "evicted": self.evicted_frame}
+
+
+class _TrackStore:
+    """
+    Objetos seguidos en arreglos paralelos: una fila por objeto, en orden de
+    creación (obj_id creciente). Los arreglos tienen capacidad de sobra y solo
+    las primeras `n` filas son válidas; las bajas compactan conservando el orden.
+    """
+
+    # columna: (dtype, forma por fila, valor inicial)
+    COLUMNS = {
+        "obj_id": (np.int64, (), 0),
+        "class_id": (np.int32, (), 0),
+        "class_code": (np.int32, (), 0),  # índice en BorderEventTracker._class_names
+        "bbox": (np.float64, (4,), 0.0),
+        "conf": (np.float64, (), 0.0),
+        "track_id": (np.int64, (), -1),  # -1 = sin track id
+        "last_state": (np.int8, (), STATE_OUTSIDE),
+        "confirmed": (np.int8, (), STATE_OUTSIDE),
+        "counted": (np.bool_, (), False),
+        "inside_streak": (np.int32, (), 0),
+        "outside_streak": (np.int32, (), 0),
+        "missing": (np.int32, (), 0),
+        "last_seen": (np.int64, (), -1),
+        "ocluded": (np.bool_, (), False),
+        "ocluded_frames": (np.int32, (), 0),
+        "last_enter": (np.int64, (), -1),  # frame del último enter sin salida confirmada (-1 = ninguno)
+        "vel": (np.float64, (4,), 0.0),  # velocidad de la caja (px/frame) si predict_motion
+        "has_vel": (np.bool_, (), False),
+    }
+
+    MIN_CAPACITY = 16
+
+    __slots__ = ("n", "capacity", *COLUMNS)
+
+    def __init__(self, capacity: int = MIN_CAPACITY) -> None:
+        self.n = 0
+        self.capacity = capacity
+        for name, (dtype, shape, fill) in self.COLUMNS.items():
+            setattr(self, name, np.full((capacity, *shape), fill, dtype=dtype))
+
+    def append(self, k: int) -> np.ndarray:
+        """Agrega `k` filas con valores iniciales y devuelve sus índices."""
+        if self.n + k > self.capacity:
+            capacity = max(self.n + k, 2 * self.capacity)
+            for name, (dtype, shape, fill) in self.COLUMNS.items():
+                arr = np.full((capacity, *shape), fill, dtype=dtype)
+                arr[: self.n] = getattr(self, name)[: self.n]
+                setattr(self, name, arr)
+            self.capacity = capacity
+        rows = np.arange(self.n, self.n + k)
+        self.n += k
+        return rows
+
+    def compact(self, keep: np.ndarray) -> None:
+        """
+        Conserva las filas con keep[i] (máscara de largo n) y reinicia las
+        liberadas. Tras un pico, la capacidad vuelve a bajar a la mitad.
+        """
+        k = int(np.count_nonzero(keep))
+        if k == self.n:
+            return
+        capacity = self.capacity
+        if capacity > self.MIN_CAPACITY and k <= capacity // 4:
+            capacity //= 2
+        for name, (dtype, shape, fill) in self.COLUMNS.items():
+            arr = getattr(self, name)
+            if capacity != self.capacity:
+                out = np.full((capacity, *shape), fill, dtype=dtype)
+                out[:k] = arr[: self.n][keep]
+                setattr(self, name, out)
+            else:
+                arr[:k] = arr[: self.n][keep]
+                arr[k : self.n] = fill
+        self.capacity = capacity
+        self.n = k
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name in self.COLUMNS)
+
+    def rows(self) -> dict[str, np.ndarray]:
+        """Copia de las filas válidas, por columna (checkpoints)."""
+        return {name: getattr(self, name)[: self.n].copy() for name in self.COLUMNS}
+
+    @classmethod
+    def from_rows(cls, rows: dict[str, np.ndarray]) -> "_TrackStore":
+        n = len(rows["obj_id"])
+        store = cls(max(cls.MIN_CAPACITY, n))
+        for name in cls.COLUMNS:
+            getattr(store, name)[:n] = rows[name]
+        store.n = n
+        return store
+
+    def row_of(self, obj_id: int) -> int:
+        i = int(np.searchsorted(self.obj_id[: self.n], obj_id))
+        return i if i < self.n and self.obj_id[i] == obj_id else -1
+
+
+def _center_dist(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    ca = (a[:, :2].astype(np.float64) + a[:, 2:]) / 2.0
+    cb = (b[:, :2].astype(np.float64) + b[:, 2:]) / 2.0
+    return np.hypot(ca[:, None, 0] - cb[None, :, 0], ca[:, None, 1] - cb[None, :, 1])
+
+
+def _diag(b: np.ndarray) -> np.ndarray:
+    return np.hypot(b[:, 2] - b[:, 0], b[:, 3] - b[:, 1])
+
+
+def _greedy_assign(score: np.ndarray, valid: np.ndarray, rows_used: np.ndarray, cols_used: np.ndarray) -> list[tuple[int, int]]:
+    """
+    Asignación greedy global: pares válidos por score descendente (empates por
+    fila y luego columna). Marca filas/columnas usadas en los arreglos dados.
+    """
+    rows, cols = np.nonzero(valid & ~rows_used[:, None] & ~cols_used[None, :])
+    pairs = []
+    for k in np.argsort(-score[rows, cols], kind="stable"):
+        r, c = int(rows[k]), int(cols[k])
+        if rows_used[r] or cols_used[c]:
+            continue
+        rows_used[r] = True
+        cols_used[c] = True
+        pairs.append((r, c))
+    return pairs
 
 
 class BorderEventTracker:
@@ -68,7 +199,33 @@ class BorderEventTracker:
         inner_ratio_min: float | None = None,
         prevent_recount: bool = True,
         ocluded_ttl: int = 45,
+        max_tracks: int | None = None,
+        evict_by: str = "age",
+        predict_motion: bool = False,
+        motion_alpha: float = 0.5,
+        max_predict_gap: int = 30,
+        motion_gate: float = 1.0,
+        motion_min_iou: float = 0.05,
     ) -> None:
+        """
+        max_tracks: tope de objetos vivos (None = sin tope). Al superarlo se
+        descartan primero los no vistos en el frame y no contados, y entre ellos
+        por `evict_by`: "age" (vistos hace más tiempo) o "conf" (menor confianza).
+
+        predict_motion: velocidad constante por objeto (suavizada con
+        `motion_alpha`); el IoU se mide contra la caja predicha a
+        frame_index - last_seen_frame frames (hasta `max_predict_gap`), así los
+        frames salteados (stride) no cortan el seguimiento de objetos rápidos.
+        El desplazamiento predicho se limita a una caja por eje y los objetos
+        ocluidos no se extrapolan (se esperan donde se los vio por última vez).
+        Se usa el mayor IoU entre la caja predicha y la última: un objeto que
+        frena o se detiene sigue emparejando como sin predicción.
+        Los objetos vistos una sola vez (sin velocidad) se emparejan además por
+        distancia entre centros, hasta `motion_gate` diagonales de su caja y
+        solo si las cajas se solapan (IoU >= `motion_min_iou`).
+        """
+        if evict_by not in ("age", "conf"):
+            raise ValueError(f"evict_by must be 'age' or 'conf', got {evict_by!r}")
         self.target_classes = set(target_classes or {"cajas", "folio"})
         self.in_frames = in_frames
         self.out_frames = out_frames
@@ -80,219 +237,331 @@ class BorderEventTracker:
         self.inner_ratio_min = inner_ratio_min
         self.prevent_recount = prevent_recount
         self.ocluded_ttl = ocluded_ttl
+        self.max_tracks = max_tracks
+        self.evict_by = evict_by
+        self.predict_motion = predict_motion
+        self.motion_alpha = motion_alpha
+        self.max_predict_gap = max_predict_gap
+        self.motion_gate = motion_gate
+        self.motion_min_iou = motion_min_iou
+        self.stats = TrackerStats()
 
         self._next_id = 1
-        self._objects: dict[int, TrackedObject] = {}
+        self._last_frame: int | None = None  # frame_index del último update
+        self._store = _TrackStore()
         self._track_map: dict[int, int] = {}
-        self._last_enter_frame: dict[int, int] = {}
-
-    def _new_object(self, det: dict, state: BorderState, frame_index: int) -> TrackedObject:
-        obj_id = self._next_id
-        self._next_id += 1
-        track_id = det.get("track_id", None)
-        obj = TrackedObject(
-            obj_id=obj_id,
-            class_id=int(det.get("class_id", -1)),
-            class_name=str(det.get("class_name")),
-            bbox_xyxy=list(det.get("bbox_xyxy", [0, 0, 0, 0])),
-            conf=float(det.get("conf", 0.0)),
-            track_id=int(track_id) if track_id is not None else None,
-            last_state=state,
-            confirmed_state=BorderState.OUTSIDE,
-            counted=False,
-            inside_streak=0,
-            outside_streak=0,
-            missing=0,
-            last_seen_frame=frame_index,
-            ocluded=False,
-            ocluded_frames=0,
-        )
-        self._objects[obj_id] = obj
-        if obj.track_id is not None:
-            self._track_map[obj.track_id] = obj_id
-        return obj
-
-    def _match_by_iou(self, det: dict, available_ids: set[int]) -> int | None:
-        best_id = None
-        best_iou = 0.0
-        for obj_id in available_ids:
-            obj = self._objects[obj_id]
-            if obj.class_name != det.get("class_name"):
-                continue
-            iou = _iou(obj.bbox_xyxy, det["bbox_xyxy"])
-            if iou > best_iou:
-                best_iou = iou
-                best_id = obj_id
-        if best_id is not None and best_iou >= self.iou_threshold:
-            return best_id
-        return None
-
-    def _match_occluded(self, det: dict) -> int | None:
-        best_id = None
-        best_iou = 0.0
-        for obj_id, obj in self._objects.items():
-            if not obj.ocluded:
-                continue
-            if obj.class_name != det.get("class_name"):
-                continue
-            iou = _iou(obj.bbox_xyxy, det["bbox_xyxy"])
-            if iou > best_iou:
-                best_iou = iou
-                best_id = obj_id
-        if best_id is not None and best_iou >= self.iou_threshold:
-            return best_id
-        return None
+        self._class_codes: dict[str, int] = {}
+        self._class_names: list[str] = []
+
+    def state_dict(self) -> dict:
+        """Estado de seguimiento para un checkpoint (la configuración no se guarda)."""
+        return {
+            "next_id": self._next_id,
+            "last_frame": self._last_frame,
+            "store": self._store.rows(),
+            "track_map": dict(self._track_map),
+            "class_names": list(self._class_names),
+            "stats": asdict(self.stats),
+        }
+
+    def load_state(self, state: dict) -> None:
+        self._next_id = state["next_id"]
+        self._last_frame = state["last_frame"]
+        self._store = _TrackStore.from_rows(state["store"])
+        self._track_map = dict(state["track_map"])
+        self._class_names = list(state["class_names"])
+        self._class_codes = {name: code for code, name in enumerate(self._class_names)}
+        self.stats = TrackerStats(**state["stats"])
+
+    def _class_code(self, class_name: str) -> int:
+        code = self._class_codes.get(class_name)
+        if code is None:
+            code = self._class_codes[class_name] = len(self._class_names)
+            self._class_names.append(class_name)
+        return code
+
+    def _predicted(self, rows: np.ndarray, frame_index: int) -> np.ndarray:
+        # Caja esperada en frame_index (última caja + velocidad x frames transcurridos)
+        st = self._store
+        boxes = st.bbox[rows]
+        if not self.predict_motion:
+            return boxes
+        gap = np.clip(frame_index - st.last_seen[rows], 0, self.max_predict_gap)
+        # A lo sumo una caja de desplazamiento por eje; los ocluidos quedan donde se los vio
+        size = boxes[:, 2:] - boxes[:, :2]
+        limit = np.concatenate([size, size], axis=1)
+        shift = np.clip(st.vel[rows] * gap[:, None], -limit, limit)
+        shift[st.ocluded[rows]] = 0.0
+        return boxes + shift
+
+    def _associate(self, boxes: np.ndarray, det_codes: np.ndarray, rows: np.ndarray, frame_index: int) -> dict[int, int]:
+        """
+        Asocia detecciones (boxes, det_codes) con las filas disponibles `rows`
+        del store por IoU de la misma clase (>= iou_threshold), en una sola
+        matriz. Primero se asignan los objetos ocluidos y luego el resto.
+        Devuelve {índice de detección: fila}.
+        """
+        st = self._store
+        iou = iou_matrix(boxes, st.bbox[rows])
+        if self.predict_motion:
+            # La predicción solo suma matches: un objeto que frena sigue emparejando con su última caja
+            iou = np.maximum(iou, iou_matrix(boxes, self._predicted(rows, frame_index)))
+        valid = (det_codes[:, None] == st.class_code[rows][None, :]) & (iou >= self.iou_threshold) & (iou > 0.0)
+        rows_used = np.zeros(len(boxes), dtype=bool)
+        cols_used = np.zeros(len(rows), dtype=bool)
+        pairs = _greedy_assign(iou, valid & st.ocluded[rows][None, :], rows_used, cols_used)
+        pairs += _greedy_assign(iou, valid, rows_used, cols_used)
+        if self.predict_motion:
+            # Objetos vistos una sola vez (aún sin velocidad): por distancia entre centros,
+            # hasta motion_gate diagonales de su caja y con un solape mínimo (sin predicción,
+            # iou es contra la última caja)
+            fresh = ~st.has_vel[rows]
+            if fresh.any():
+                obj_boxes = st.bbox[rows]
+                dist = _center_dist(boxes, obj_boxes) / np.maximum(_diag(obj_boxes), 1e-9)[None, :]
+                same = det_codes[:, None] == st.class_code[rows][None, :]
+                near = (dist <= self.motion_gate) & (iou >= self.motion_min_iou) & (iou > 0.0)
+                pairs += _greedy_assign(-dist, same & fresh[None, :] & near, rows_used, cols_used)
+        return {r: int(rows[c]) for r, c in pairs}
 
     def update(
         self,
-        detections: list[dict],
+        detections: Detections | list[dict],
         inner_xyxy: list[float],
         outer_xyxy: list[float],
         frame_index: int,
     ) -> list[BorderEvent]:
-        events: list[BorderEvent] = []
+        st = self._store
+        dets = as_detections(detections)
+        targets = dets[dets.class_mask(self.target_classes)]
+        states = classify_states(targets.xyxy, inner_xyxy, outer_xyxy, inner_ratio_min=self.inner_ratio_min)
+        det_codes = np.array([self._class_code(name) for name in targets.class_names], dtype=np.int32)
 
-        candidates = []
-        for det in detections:
-            if det.get("class_name") not in self.target_classes:
-                continue
-            state = classify_bbox_state(
-                det["bbox_xyxy"],
-                inner_xyxy,
-                outer_xyxy,
-                inner_ratio_min=self.inner_ratio_min,
-            )
-            candidates.append((det, state))
-
-        matched_obj_ids: set[int] = set()
-        matched_det_idx: set[int] = set()
+        n_old = st.n
+        det_row = np.full(len(targets), -1, dtype=np.int64)  # fila del store asignada a cada detección
+        matched = np.zeros(n_old, dtype=bool)
+        order: list[int] = []  # detecciones en orden de actualización
 
-        # 1) Match by track_id
-        if self.use_track_id:
-            for idx, (det, state) in enumerate(candidates):
-                track_id = det.get("track_id", None)
-                if track_id is None:
+        # 1) Match by track_id (como antes: dos detecciones con el mismo track id
+        #    actualizan el mismo objeto, en orden)
+        if self.use_track_id and self._track_map:
+            for idx in np.flatnonzero(targets.track_id >= 0).tolist():
+                obj_id = self._track_map.get(int(targets.track_id[idx]))
+                row = st.row_of(obj_id) if obj_id is not None else -1
+                if row < 0:
                     continue
-                obj_id = self._track_map.get(int(track_id))
-                if obj_id is not None:
-                    matched_obj_ids.add(obj_id)
-                    matched_det_idx.add(idx)
-                    self._update_object(self._objects[obj_id], det, state, frame_index, events)
-
-        # 2) Match remaining by IoU
-        available_ids = set(self._objects.keys()) - matched_obj_ids
-        for idx, (det, state) in enumerate(candidates):
-            if idx in matched_det_idx:
-                continue
-            # Try to match occluded objects first
-            occ_id = self._match_occluded(det)
-            if occ_id is not None and occ_id in available_ids:
-                matched_obj_ids.add(occ_id)
-                matched_det_idx.add(idx)
-                available_ids.discard(occ_id)
-                self._update_object(self._objects[occ_id], det, state, frame_index, events)
-                continue
-            obj_id = self._match_by_iou(det, available_ids)
-            if obj_id is not None:
-                matched_obj_ids.add(obj_id)
-                matched_det_idx.add(idx)
-                available_ids.discard(obj_id)
-                self._update_object(self._objects[obj_id], det, state, frame_index, events)
+                matched[row] = True
+                det_row[idx] = row
+                order.append(idx)
+
+        # 2) Match remaining by IoU (asignación global, ocluidos primero)
+        rest = np.flatnonzero(det_row < 0)
+        available = np.flatnonzero(~matched)
+        if len(rest) and len(available):
+            assigned = self._associate(targets.xyxy[rest], det_codes[rest], available, frame_index)
+            for k, idx in enumerate(rest.tolist()):
+                row = assigned.get(k)
+                if row is not None:
+                    matched[row] = True
+                    det_row[idx] = row
+                    order.append(idx)
 
         # 3) New objects for unmatched detections
-        for idx, (det, state) in enumerate(candidates):
-            if idx in matched_det_idx:
-                continue
-            obj = self._new_object(det, state, frame_index)
-            self._update_object(obj, det, state, frame_index, events)
-
-        # 4) Aging unmatched objects
-        to_remove = []
-        for obj_id, obj in self._objects.items():
-            if obj_id in matched_obj_ids:
-                obj.missing = 0
-                obj.ocluded = False
-                obj.ocluded_frames = 0
-                continue
-            obj.missing += 1
-            # Tolerancia a misses si estaba dentro: marcar ocluido
-            if obj.confirmed_state == BorderState.INSIDE and obj.missing <= self.max_missing_inside:
-                obj.ocluded = True
-                obj.ocluded_frames += 1
-                if obj.ocluded_frames > self.ocluded_ttl:
-                    to_remove.append(obj_id)
-                continue
-            if obj.missing > self.max_missing:
-                to_remove.append(obj_id)
-        for obj_id in to_remove:
-            obj = self._objects.pop(obj_id)
-            if obj.track_id is not None and obj.track_id in self._track_map:
-                self._track_map.pop(obj.track_id, None)
+        new = np.flatnonzero(det_row < 0)
+        if len(new):
+            rows = st.append(len(new))
+            ids = np.arange(self._next_id, self._next_id + len(new))
+            self._next_id += len(new)
+            st.obj_id[rows] = ids
+            st.class_id[rows] = targets.class_id[new]
+            st.class_code[rows] = det_codes[new]
+            st.track_id[rows] = targets.track_id[new]
+            st.last_seen[rows] = frame_index
+            st.last_state[rows] = states[new]
+            for obj_id, track_id in zip(ids.tolist(), targets.track_id[new].tolist()):
+                if track_id >= 0:
+                    self._track_map[track_id] = obj_id
+            det_row[new] = rows
+            order.extend(new.tolist())
 
+        events: list[BorderEvent] = []
+        for part in self._unique_runs(det_row, np.asarray(order, dtype=np.int64)):
+            events += self._update_rows(targets, states, det_row, part, frame_index)
+
+        # 4) Aging unmatched objects (los nuevos también envejecen en su primer frame). Los
+        #    frames salteados (stride) cuentan: max_missing y ocluded_ttl son frames reales
+        gap = 1 if self._last_frame is None else max(1, frame_index - self._last_frame)
+        self._last_frame = frame_index
+        elapsed = np.concatenate([np.full(n_old, gap, dtype=np.int32), np.ones(len(new), dtype=np.int32)])
+        self._age(np.concatenate([matched, np.zeros(len(new), dtype=bool)]), elapsed)
+
+        # 5) Memory budget
+        evicted = self._evict(frame_index) if self.max_tracks is not None and st.n > self.max_tracks else 0
+        stats = self.stats
+        stats.created += len(new)
+        stats.evicted_frame = evicted
+        stats.evicted += evicted
+        stats.live = st.n
+        stats.occluded = int(np.count_nonzero(st.ocluded[: st.n]))
+        stats.peak = max(stats.peak, st.n)
+        stats.store_bytes = st.nbytes
         return events
 
+    @staticmethod
+    def _unique_runs(det_row: np.ndarray, order: np.ndarray) -> list[np.ndarray]:
+        """
+        Parte `order` en tramos consecutivos sin filas repetidas: _update_rows
+        actualiza cada fila una vez por llamada, y un track id repetido en el
+        frame actualiza su objeto una vez por detección.
+        """
+        rows = det_row[order]
+        if len(np.unique(rows)) == len(rows):
+            return [order]
+        runs, start, seen = [], 0, set()
+        for k, row in enumerate(rows.tolist()):
+            if row in seen:
+                runs.append(order[start:k])
+                start, seen = k, set()
+            seen.add(row)
+        runs.append(order[start:])
+        return runs
+
+    def _remove(self, remove: np.ndarray) -> None:
+        # Baja de filas y de sus entradas en los índices auxiliares
+        st = self._store
+        for track_id in st.track_id[: st.n][remove].tolist():
+            if track_id >= 0:
+                self._track_map.pop(track_id, None)
+        st.compact(~remove)
+
+    def _evict(self, frame_index: int) -> int:
+        st = self._store
+        n = st.n
+        key = st.last_seen[:n] if self.evict_by == "age" else st.conf[:n]
+        # lexsort: la última clave es la principal
+        order = np.lexsort((st.obj_id[:n], key, st.counted[:n], st.last_seen[:n] == frame_index))
+        k = n - self.max_tracks
+        remove = np.zeros(n, dtype=bool)
+        remove[order[:k]] = True
+        self._remove(remove)
+        return k
+
+    def _age(self, matched: np.ndarray, elapsed: np.ndarray) -> None:
+        # elapsed: frames transcurridos por fila desde el update anterior (> 1 con stride)
+        st = self._store
+        n = st.n
+        st.missing[:n][matched] = 0
+        st.ocluded[:n][matched] = False
+        st.ocluded_frames[:n][matched] = 0
+
+        unmatched = ~matched
+        missing = st.missing[:n]
+        missing[unmatched] += elapsed[unmatched]
+        # Tolerancia a misses si estaba dentro: marcar ocluido
+        occl = unmatched & (st.confirmed[:n] == STATE_INSIDE) & (missing <= self.max_missing_inside)
+        st.ocluded[:n][occl] = True
+        st.ocluded_frames[:n][occl] += elapsed[occl]
+        remove = (occl & (st.ocluded_frames[:n] > self.ocluded_ttl)) | (unmatched & ~occl & (missing > self.max_missing))
+        if remove.any():
+            self.stats.removed += int(np.count_nonzero(remove))
+            self._remove(remove)
+
     def get_objects(self) -> list[TrackedObject]:
-        return list(self._objects.values())
+        st = self._store
+        return [
+            TrackedObject(
+                obj_id=int(st.obj_id[i]),
+                class_id=int(st.class_id[i]),
+                class_name=self._class_names[st.class_code[i]],
+                bbox_xyxy=st.bbox[i].tolist(),
+                conf=float(st.conf[i]),
+                track_id=int(st.track_id[i]) if st.track_id[i] >= 0 else None,
+                last_state=STATE_BY_CODE[st.last_state[i]],
+                confirmed_state=STATE_BY_CODE[st.confirmed[i]],
+                counted=bool(st.counted[i]),
+                inside_streak=int(st.inside_streak[i]),
+                outside_streak=int(st.outside_streak[i]),
+                missing=int(st.missing[i]),
+                last_seen_frame=int(st.last_seen[i]),
+                ocluded=bool(st.ocluded[i]),
+                ocluded_frames=int(st.ocluded_frames[i]),
+            )
+            for i in range(st.n)
+        ]
+
+    def _update_velocity(self, rows: np.ndarray, boxes: np.ndarray, frame_index: int) -> None:
+        # Velocidad medida desde la última caja, repartida en los frames transcurridos
+        st = self._store
+        gap = frame_index - st.last_seen[rows]
+        seen = gap > 0  # las filas nuevas se crean en este frame (gap 0)
+        if not seen.any():
+            return
+        r = rows[seen]
+        measured = (boxes[seen] - st.bbox[r]) / gap[seen][:, None]
+        a = self.motion_alpha
+        st.vel[r] = np.where(st.has_vel[r][:, None], a * measured + (1.0 - a) * st.vel[r], measured)
+        st.has_vel[r] = True
 
-    def _update_object(
+    def _update_rows(
         self,
-        obj: TrackedObject,
-        det: dict,
-        state: BorderState,
+        targets: Detections,
+        states: np.ndarray,
+        det_row: np.ndarray,
+        order: np.ndarray,
         frame_index: int,
-        events: list[BorderEvent],
-    ) -> None:
-        obj.bbox_xyxy = list(det.get("bbox_xyxy", obj.bbox_xyxy))
-        obj.conf = float(det.get("conf", obj.conf))
-        obj.last_state = state
-        obj.last_seen_frame = frame_index
-
-        effective_state = state
-        if self.border_as_inside and state == BorderState.BORDER:
-            effective_state = BorderState.INSIDE
-
-        if effective_state == BorderState.INSIDE:
-            obj.inside_streak += 1
-            obj.outside_streak = 0
-        elif effective_state == BorderState.OUTSIDE:
-            obj.outside_streak += 1
-            obj.inside_streak = 0
-        else:
-            obj.inside_streak = 0
-            obj.outside_streak = 0
-
-        if obj.inside_streak >= self.in_frames and obj.confirmed_state != BorderState.INSIDE:
-            if self.prevent_recount and obj.obj_id in self._last_enter_frame:
-                # Ya contada previamente y no hubo salida confirmada
-                return
-            obj.confirmed_state = BorderState.INSIDE
-            obj.counted = True
-            self._last_enter_frame[obj.obj_id] = frame_index
-            events.append(
-                BorderEvent(
-                    event_type="enter",
-                    obj_id=obj.obj_id,
-                    class_name=obj.class_name,
-                    frame_index=frame_index,
-                    conf=obj.conf,
-                    bbox_xyxy=obj.bbox_xyxy,
-                    reason=f"inside_streak>={self.in_frames}",
-                )
-            )
+    ) -> list[BorderEvent]:
+        """Actualiza de una vez las filas emparejadas (detecciones `order`) y arma los eventos."""
+        if len(order) == 0:
+            return []
+        st = self._store
+        rows = det_row[order]
+        det_states = states[order]
+        if self.predict_motion:
+            self._update_velocity(rows, targets.xyxy[order].astype(np.float64), frame_index)
+        st.bbox[rows] = targets.xyxy[order]
+        st.conf[rows] = targets.conf[order]
+        st.last_state[rows] = det_states
+        st.last_seen[rows] = frame_index
 
-        if obj.outside_streak >= self.out_frames and obj.confirmed_state != BorderState.OUTSIDE:
-            obj.confirmed_state = BorderState.OUTSIDE
-            obj.counted = False
-            if obj.obj_id in self._last_enter_frame:
-                self._last_enter_frame.pop(obj.obj_id, None)
-            events.append(
-                BorderEvent(
-                    event_type="exit",
-                    obj_id=obj.obj_id,
-                    class_name=obj.class_name,
-                    frame_index=frame_index,
-                    conf=obj.conf,
-                    bbox_xyxy=obj.bbox_xyxy,
-                    reason=f"outside_streak>={self.out_frames}",
-                )
-            )
+        effective = det_states
+        if self.border_as_inside:
+            effective = np.where(det_states == STATE_BORDER, STATE_INSIDE, det_states)
+        inside = effective == STATE_INSIDE
+        outside = effective == STATE_OUTSIDE
+        st.inside_streak[rows] = np.where(inside, st.inside_streak[rows] + 1, 0)
+        st.outside_streak[rows] = np.where(outside, st.outside_streak[rows] + 1, 0)
+
+        enter = (st.inside_streak[rows] >= self.in_frames) & (st.confirmed[rows] != STATE_INSIDE)
+        # Ya contada previamente y no hubo salida confirmada: no se vuelve a contar
+        blocked = enter & (st.last_enter[rows] >= 0) if self.prevent_recount else np.zeros(len(rows), dtype=bool)
+        enter &= ~blocked
+        st.confirmed[rows[enter]] = STATE_INSIDE
+        st.counted[rows[enter]] = True
+        st.last_enter[rows[enter]] = frame_index
+
+        exit_ = (st.outside_streak[rows] >= self.out_frames) & (st.confirmed[rows] != STATE_OUTSIDE) & ~blocked
+        st.confirmed[rows[exit_]] = STATE_OUTSIDE
+        st.counted[rows[exit_]] = False
+        st.last_enter[rows[exit_]] = -1
+
+        events: list[BorderEvent] = []
+        for k in np.flatnonzero(enter | exit_).tolist():
+            row = int(rows[k])
+            idx = int(order[k])
+            for event_type, hit, reason in (
+                ("enter", enter, f"inside_streak>={self.in_frames}"),
+                ("exit", exit_, f"outside_streak>={self.out_frames}"),
+            ):
+                if hit[k]:
+                    events.append(
+                        BorderEvent(
+                            event_type=event_type,
+                            obj_id=int(st.obj_id[row]),
+                            class_name=self._class_names[st.class_code[row]],
+                            frame_index=frame_index,
+                            conf=float(targets.conf[idx]),
+                            bbox_xyxy=targets.xyxy[idx].tolist(),
+                            reason=reason,
+                        )
+                    )
+        return events
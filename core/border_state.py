@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from enum import Enum
 
+import numpy as np
+
 
 class BorderState(str, Enum):
     INSIDE = "inside"
@@ -57,3 +59,39 @@ def classify_bbox_state(
     if bbox_outside(bbox_xyxy, outer_xyxy):
         return BorderState.OUTSIDE
     return BorderState.BORDER
+
+
+# Códigos de classify_states (índices de STATE_BY_CODE)
+STATE_INSIDE, STATE_BORDER, STATE_OUTSIDE = 0, 1, 2
+STATE_BY_CODE = (BorderState.INSIDE, BorderState.BORDER, BorderState.OUTSIDE)
+
+
+def classify_states(
+    xyxy: np.ndarray,
+    inner_xyxy: list[float],
+    outer_xyxy: list[float],
+    inner_ratio_min: float | None = None,
+) -> np.ndarray:
+    """
+    Versión vectorizada de classify_bbox_state para N bboxes (N x 4). Devuelve
+    códigos int8 (STATE_INSIDE/BORDER/OUTSIDE); mismas reglas, en float64.
+    """
+    b = np.asarray(xyxy, dtype=np.float64).reshape(-1, 4)
+    x1, y1, x2, y2 = b[:, 0], b[:, 1], b[:, 2], b[:, 3]
+    ix1, iy1, ix2, iy2 = (float(v) for v in inner_xyxy)
+    ox1, oy1, ox2, oy2 = (float(v) for v in outer_xyxy)
+
+    inside = (x1 >= ix1) & (y1 >= iy1) & (x2 <= ix2) & (y2 <= iy2)
+    if inner_ratio_min is not None:
+        area = np.maximum(0.0, x2 - x1) * np.maximum(0.0, y2 - y1)
+        inter_w = np.maximum(0.0, np.minimum(x2, ix2) - np.maximum(x1, ix1))
+        inter_h = np.maximum(0.0, np.minimum(y2, iy2) - np.maximum(y1, iy1))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio_ok = (area > 0.0) & (inter_w * inter_h / area >= inner_ratio_min)
+        inside |= ratio_ok
+    outside = (x2 < ox1) | (x1 > ox2) | (y2 < oy1) | (y1 > oy2)
+
+    codes = np.full(len(b), STATE_BORDER, dtype=np.int8)
+    codes[outside] = STATE_OUTSIDE
+    codes[inside] = STATE_INSIDE
+    return codes
@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+import numpy as np
+
+
+def iou_matrix(a, b) -> np.ndarray:
+    """
+    IoU (float64) entre cada caja de `a` (N, 4) y cada caja de `b` (M, 4), en
+    xyxy. Cajas degeneradas tienen área 0; unión vacía -> IoU 0.
+    """
+    a = np.asarray(a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float64).reshape(-1, 4)
+    inter_w = np.maximum(0.0, np.minimum(a[:, None, 2], b[None, :, 2]) - np.maximum(a[:, None, 0], b[None, :, 0]))
+    inter_h = np.maximum(0.0, np.minimum(a[:, None, 3], b[None, :, 3]) - np.maximum(a[:, None, 1], b[None, :, 1]))
+    inter_area = inter_w * inter_h
+    a_area = np.maximum(0.0, a[:, 2] - a[:, 0]) * np.maximum(0.0, a[:, 3] - a[:, 1])
+    b_area = np.maximum(0.0, b[:, 2] - b[:, 0]) * np.maximum(0.0, b[:, 3] - b[:, 1])
+    union = a_area[:, None] + b_area[None, :] - inter_area
+    return np.where(union > 0.0, inter_area / np.where(union > 0.0, union, 1.0), 0.0)
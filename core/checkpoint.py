@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+import os
+from pathlib import Path
+import pickle
+import time
+from typing import Any
+
+CHECKPOINT_VERSION = 2
+
+
+@dataclass
+class CheckpointStats:
+    saved: int = 0
+    deferred: int = 0  # frames en que tocaba guardar pero el pipeline retenía frames
+    interval: int = 0  # intervalo vigente (frames); crece si el costo supera el presupuesto
+    widened: int = 0
+    total_s: float = 0.0
+    max_s: float = 0.0
+    last_bytes: int = 0
+
+    def as_dict(self) -> dict:
+        d = asdict(self)
+        d["mean_ms"] = 1000.0 * self.total_s / self.saved if self.saved else 0.0
+        return d
+
+
+def load_checkpoint(path: Path | str) -> dict | None:
+    """Estado guardado por Checkpointer.save, o None si no hay checkpoint."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    with path.open("rb") as f:
+        state = pickle.load(f)
+    if state.get("version") != CHECKPOINT_VERSION:
+        raise ValueError(f"Unsupported checkpoint version {state.get('version')!r}: {path}")
+    return state
+
+
+class Checkpointer:
+    """
+    Checkpoints periódicos del estado de una corrida (pickle, un solo archivo).
+
+    Cada `interval` frames leídos se guarda el estado completo; la escritura es
+    atómica (archivo temporal + fsync + os.replace), así un corte deja siempre
+    el checkpoint anterior o el nuevo, nunca uno a medias. El costo se acota:
+    si un checkpoint (incluido vaciar el pipeline) supera `max_overhead` del
+    tiempo transcurrido desde el anterior, el intervalo se duplica.
+    """
+
+    def __init__(self, path: Path | str, interval: int = 1000, max_overhead: float = 0.02) -> None:
+        self.path = Path(path)
+        self.max_overhead = max_overhead
+        self.stats = CheckpointStats(interval=max(1, interval))
+        self._next = self.stats.interval
+        self._last_t = time.perf_counter()
+
+    def start(self, frames: int) -> None:
+        """Al reanudar: el próximo checkpoint se cuenta desde `frames`."""
+        self._next = frames + self.stats.interval
+        self._last_t = time.perf_counter()
+
+    def due(self, frames: int) -> bool:
+        return frames >= self._next
+
+    def defer(self) -> None:
+        self.stats.deferred += 1
+
+    def save(self, state: dict[str, Any], frames: int, t0: float | None = None) -> None:
+        """Guarda `state`; `t0` = inicio del trabajo previo (p.ej. vaciar el pipeline) para medir el costo total."""
+        t0 = time.perf_counter() if t0 is None else t0
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with tmp.open("wb") as f:
+            pickle.dump({"version": CHECKPOINT_VERSION, **state}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+            size = f.tell()
+        os.replace(tmp, self.path)
+
+        now = time.perf_counter()
+        cost = now - t0
+        s = self.stats
+        s.saved += 1
+        s.total_s += cost
+        s.max_s = max(s.max_s, cost)
+        s.last_bytes = size
+        if self.max_overhead > 0 and cost > self.max_overhead * max(t0 - self._last_t, 1e-9):
+            s.interval *= 2
+            s.widened += 1
+        self._next = frames + s.interval
+        self._last_t = now
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from typing import Any
+
+from .border_counter import BorderCounter
+from .border_counter_module import BorderCounterModule
+from .detections import Detections, as_detections
+from .interaction_counter_module import InteractionCounterModule
+from .signals_counter_module import SignalsCounterModule
+from .voting import VoteEvent, VotingEngine
+
+
+@dataclass
+class SessionStep:
+    outputs: dict[str, Any]
+    vote_event: VoteEvent | None
+    count: int
+
+
+class CountingSession:
+    """
+    Estado de conteo de una cámara: módulos habilitados, votación y contador global.
+    """
+
+    def __init__(self, cfg) -> None:
+        self.cfg = cfg
+        self.border_cfg = replace(cfg.border, mode=cfg.mode)
+        border_cfg = self.border_cfg
+
+        self.modules: dict[str, Any] = {}
+        if border_cfg.enabled:
+            self.modules["border"] = BorderCounterModule(border_cfg)
+        if cfg.signals.enabled:
+            self.modules["signals"] = SignalsCounterModule(cfg.signals)
+        if cfg.interaction.enabled:
+            self.modules["interaction"] = InteractionCounterModule(cfg.interaction)
+        self.voter = VotingEngine(cfg.weights, threshold=cfg.vote_threshold)
+        if border_cfg.enabled:
+            start_count = border_cfg.start_count
+            cooldown = border_cfg.cooldown_frames
+            min_count = border_cfg.min_count
+        elif cfg.interaction.enabled:
+            start_count = cfg.interaction.start_count
+            cooldown = border_cfg.cooldown_frames
+            min_count = border_cfg.min_count
+        else:
+            start_count = 0
+            cooldown = border_cfg.cooldown_frames
+            min_count = border_cfg.min_count
+
+        self.global_counter = BorderCounter(
+            start_count=start_count,
+            cooldown_frames=cooldown,
+            min_count=min_count,
+        )
+        self.module_counts: dict[str, int] = {}
+
+    @property
+    def count(self) -> int:
+        return self.global_counter.state.count
+
+    def state_dict(self) -> dict:
+        """Estado de conteo para un checkpoint; la sesión se reconstruye con su cfg y luego load_state."""
+        return {
+            "modules": {name: module.state_dict() for name, module in self.modules.items()},
+            "global_counter": self.global_counter.state_dict(),
+            "module_counts": dict(self.module_counts),
+        }
+
+    def load_state(self, state: dict) -> None:
+        if set(state["modules"]) != set(self.modules):
+            raise ValueError(f"Checkpoint modules {sorted(state['modules'])} do not match {sorted(self.modules)}")
+        for name, module in self.modules.items():
+            module.load_state(state["modules"][name])
+        self.global_counter.load_state(state["global_counter"])
+        self.module_counts = dict(state["module_counts"])
+
+    def update(self, detections: Detections | list[dict], frame_index: int, image_size: tuple[int, int]) -> SessionStep:
+        # Una sola conversión para todos los módulos si llegan dicts
+        detections = as_detections(detections)
+        outputs = {}
+        module_events = {}
+        for name, module in self.modules.items():
+            out = module.update(
+                detections=detections,
+                frame_index=frame_index,
+                image_size=image_size,
+            )
+            outputs[name] = out
+            module_events[name] = out.events
+            self.module_counts[name] = out.count_after
+
+        vote_event = self.voter.vote(module_events, frame_index=frame_index)
+        if vote_event is not None:
+            self.global_counter.update([vote_event], frame_index=frame_index)
+        return SessionStep(outputs=outputs, vote_event=vote_event, count=self.count)
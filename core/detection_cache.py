@@ -0,0 +1,295 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+import hashlib
+import json
+import os
+from pathlib import Path
+import sqlite3
+from typing import Any, Callable, Iterable, Sequence
+
+import numpy as np
+
+from .detections import Detections, as_detections
+
+_IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff"}
+
+
+def frame_key(image_path: str | None, frame_index: int | None) -> str | None:
+    """
+    Clave de un frame: ruta + tamaño + mtime; en videos se agrega el índice.
+    None si el frame no viene de un archivo (p.ej. cámara en vivo).
+    """
+    if image_path is None:
+        return None
+    try:
+        st = os.stat(image_path)
+    except OSError:
+        return None
+    key = f"{image_path}|{st.st_size}|{st.st_mtime_ns}"
+    if Path(image_path).suffix.lower() not in _IMAGE_EXTS:
+        key = f"{key}#{frame_index}"
+    return key
+
+
+def _with_roi(key: str | None, roi: Sequence[float] | None) -> str | None:
+    # Un recorte ROI da otras detecciones que el frame completo: otra entrada
+    if key is None or roi is None:
+        return key
+    return f"{key}@roi={','.join(f'{v:.1f}' for v in roi)}"
+
+
+def encode_detections(detections: Detections | Sequence[dict]) -> bytes:
+    dets = as_detections(detections)
+    n = len(dets)
+    boxes = np.empty((n, 6), dtype=np.float32)
+    boxes[:, :4] = dets.xyxy
+    boxes[:, 4] = dets.conf
+    boxes[:, 5] = dets.class_id
+    return np.int32(n).tobytes() + boxes.tobytes() + dets.track_id.tobytes()
+
+
+def decode_detections(data: bytes, names: dict[int, str]) -> Detections:
+    n = int(np.frombuffer(data, dtype=np.int32, count=1)[0])
+    boxes = np.frombuffer(data, dtype=np.float32, count=n * 6, offset=4).reshape(n, 6)
+    track_ids = np.frombuffer(data, dtype=np.int32, count=n, offset=4 + n * 24)
+    return Detections(boxes[:, :4], boxes[:, 5], boxes[:, 4], track_ids, names=names)
+
+
+@dataclass
+class DetectionCacheStats:
+    hits: int = 0
+    misses: int = 0
+    uncacheable: int = 0
+    stored: int = 0
+    preloaded: int = 0
+
+    def as_dict(self) -> dict:
+        d = asdict(self)
+        total = self.hits + self.misses
+        d["hit_rate"] = self.hits / total if total else 0.0
+        return d
+
+
+class DetectionCache:
+    """
+    Cache persistente de detecciones en un único SQLite.
+
+    Las filas se agrupan por `settings` (hash de pesos + imgsz + conf + modo/tracker
+    + escala de decodificación) y se indexan por la clave del frame. Cada fila es
+    un blob compacto: N, boxes float32 (N x 6: xyxy, conf, class_id) y track ids.
+
+    `scope` (prefijos de clave, p.ej. la carpeta de frames de la corrida) acota la
+    precarga a las filas de esta fuente; las claves fuera del scope se consultan
+    de a una. Sin scope se precarga todo el grupo.
+    """
+
+    def __init__(
+        self,
+        db_path: Path | str,
+        settings: dict[str, Any],
+        scope: Sequence[str] | None = None,
+        commit_every: int = 200,
+    ) -> None:
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.settings = settings
+        self.settings_id = hashlib.sha1(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+        self.commit_every = commit_every
+        self.stats = DetectionCacheStats()
+        # timeout: varias corridas en paralelo (utils/batch_runner.py) comparten la base
+        self._conn = sqlite3.connect(str(self.db_path), timeout=60.0)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS detections ("
+            "settings TEXT NOT NULL, frame_key TEXT NOT NULL, data BLOB NOT NULL, "
+            "PRIMARY KEY (settings, frame_key)) WITHOUT ROWID"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS settings (settings TEXT PRIMARY KEY, params TEXT, names TEXT)"
+        )
+        self._conn.commit()
+        self._pending = 0
+        self.names: dict[int, str] | None = self._load_names()
+        # False: solo se escribe (p.ej. modo track con cobertura parcial)
+        self.reads = True
+        self.scope = tuple(scope) if scope is not None else None
+        # Se precargan las filas de la fuente para reproducir a velocidad de memoria
+        self._rows: dict[str, bytes] = {}
+        if self.scope is None:
+            self._rows.update(
+                self._conn.execute(
+                    "SELECT frame_key, data FROM detections WHERE settings = ?", (self.settings_id,)
+                ).fetchall()
+            )
+        for prefix in self.scope or ():
+            # Rango [prefix, prefix+1): usa la clave primaria en vez de recorrer el grupo
+            hi = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+            self._rows.update(
+                self._conn.execute(
+                    "SELECT frame_key, data FROM detections WHERE settings = ? AND frame_key >= ? AND frame_key < ?",
+                    (self.settings_id, prefix, hi),
+                ).fetchall()
+            )
+        self.stats.preloaded = len(self._rows)
+
+    def _load_names(self) -> dict[int, str] | None:
+        row = self._conn.execute("SELECT names FROM settings WHERE settings = ?", (self.settings_id,)).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return {int(k): v for k, v in json.loads(row[0]).items()}
+
+    def set_names(self, names) -> None:
+        if isinstance(names, (list, tuple)):
+            names = dict(enumerate(names))
+        self.names = {int(k): str(v) for k, v in names.items()}
+        self._conn.execute(
+            "INSERT OR REPLACE INTO settings (settings, params, names) VALUES (?, ?, ?)",
+            (self.settings_id, json.dumps(self.settings, sort_keys=True), json.dumps(self.names)),
+        )
+        self._conn.commit()
+
+    def _in_scope(self, key: str) -> bool:
+        return self.scope is None or key.startswith(self.scope)
+
+    def _data(self, key: str) -> bytes | None:
+        data = self._rows.get(key)
+        if data is None and not self._in_scope(key):
+            row = self._conn.execute(
+                "SELECT data FROM detections WHERE settings = ? AND frame_key = ?", (self.settings_id, key)
+            ).fetchone()
+            data = row[0] if row is not None else None
+        return data
+
+    def get(self, key: str) -> Detections | None:
+        if not self.reads or self.names is None:
+            return None
+        data = self._data(key)
+        if data is None:
+            return None
+        return decode_detections(data, self.names)
+
+    def covers(self, keys: Iterable[str | None]) -> bool:
+        """True si todas las claves tienen fila (ninguna clave None)."""
+        return all(key is not None and self._data(key) is not None for key in keys)
+
+    def put(self, key: str, detections: Detections | Sequence[dict]) -> None:
+        data = encode_detections(detections)
+        self._rows[key] = data
+        self._conn.execute(
+            "INSERT OR REPLACE INTO detections (settings, frame_key, data) VALUES (?, ?, ?)",
+            (self.settings_id, key, data),
+        )
+        self.stats.stored += 1
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self._conn.commit()
+            self._pending = 0
+
+    def close(self) -> None:
+        self._conn.commit()
+        self._conn.close()
+
+    def report(self) -> dict:
+        d = self.stats.as_dict()
+        d["db_path"] = str(self.db_path)
+        d["settings_id"] = self.settings_id
+        d["db_bytes"] = self.db_path.stat().st_size if self.db_path.exists() else 0
+        return d
+
+
+class CachedDetector:
+    """
+    Envoltorio con la misma API que DetectorYolo que responde desde DetectionCache.
+
+    El detector real se crea recién ante el primer miss, así una re-ejecución
+    completamente cacheada no carga el modelo.
+    """
+
+    def __init__(self, cache: DetectionCache, factory: Callable[[], Any]) -> None:
+        self.cache = cache
+        self.factory = factory
+        self._detector = None
+
+    @property
+    def detector(self):
+        if self._detector is None:
+            self._detector = self.factory()
+            if self.cache.names is None:
+                self.cache.set_names(self._detector.names)
+        return self._detector
+
+    @property
+    def loaded(self):
+        """El detector real si ya se creó; None mientras todo sale del cache."""
+        return self._detector
+
+    @property
+    def names(self):
+        return self.cache.names if self.cache.names is not None else self.detector.names
+
+    def _lookup(self, key: str | None, frame_index, image_path) -> dict[str, Any] | None:
+        if key is None:
+            self.cache.stats.uncacheable += 1
+            return None
+        dets = self.cache.get(key)
+        if dets is None:
+            self.cache.stats.misses += 1
+            return None
+        self.cache.stats.hits += 1
+        return {"frame_index": frame_index, "image_path": image_path, "image_size": (None, None), "detections": dets}
+
+    def detect(
+        self,
+        image,
+        frame_index: int | None = None,
+        image_path: str | None = None,
+        scale: float = 1.0,
+        roi: Sequence[float] | None = None,
+    ) -> dict[str, Any]:
+        key = _with_roi(frame_key(image_path, frame_index), roi)
+        result = self._lookup(key, frame_index, image_path)
+        if result is None:
+            result = self.detector.detect(image, frame_index=frame_index, image_path=image_path, scale=scale, roi=roi)
+            if key is not None:
+                self.cache.put(key, result["detections"])
+            return result
+        h, w = image.shape[:2]
+        result["image_size"] = (int(round(w * scale)), int(round(h * scale)))
+        return result
+
+    def detect_batch(
+        self,
+        images: Sequence,
+        frame_indices: Sequence[int | None] | None = None,
+        paths: Sequence[str | None] | None = None,
+        scales: Sequence[float] | None = None,
+        rois: Sequence[Sequence[float] | None] | None = None,
+    ) -> list[dict[str, Any]]:
+        n = len(images)
+        frame_indices = list(frame_indices) if frame_indices is not None else [None] * n
+        paths = list(paths) if paths is not None else [None] * n
+        scales = list(scales) if scales is not None else [1.0] * n
+        rois = list(rois) if rois is not None else [None] * n
+        keys = [_with_roi(frame_key(paths[i], frame_indices[i]), rois[i]) for i in range(n)]
+        results: list[dict[str, Any] | None] = []
+        for i in range(n):
+            res = self._lookup(keys[i], frame_indices[i], paths[i])
+            if res is not None:
+                h, w = images[i].shape[:2]
+                res["image_size"] = (int(round(w * scales[i])), int(round(h * scales[i])))
+            results.append(res)
+
+        missing = [i for i, r in enumerate(results) if r is None]
+        if missing:
+            fresh = self.detector.detect_batch(
+                [images[i] for i in missing],
+                frame_indices=[frame_indices[i] for i in missing],
+                paths=[paths[i] for i in missing],
+                scales=[scales[i] for i in missing],
+                rois=[rois[i] for i in missing],
+            )
+            for i, res in zip(missing, fresh):
+                results[i] = res
+                if keys[i] is not None:
+                    self.cache.put(keys[i], res["detections"])
+        return results
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+from typing import Any, Iterable, Iterator, Mapping
+
+import numpy as np
+
+# (tabla de nombres, clases pedidas) -> class ids. La tabla es la misma en todos los
+# frames de una corrida: se resuelve una vez por tabla, no por frame
+_NAME_IDS: dict[tuple, np.ndarray] = {}
+_NAME_IDS_MAX = 256
+
+
+def _class_ids(names: Mapping[int, str], class_names: frozenset) -> np.ndarray:
+    key = (tuple(names.items()), class_names)
+    ids = _NAME_IDS.get(key)
+    if ids is None:
+        if len(_NAME_IDS) >= _NAME_IDS_MAX:
+            _NAME_IDS.clear()
+        ids = np.array([cid for cid, name in names.items() if name in class_names], dtype=np.int16)
+        ids.flags.writeable = False
+        _NAME_IDS[key] = ids
+    return ids
+
+
+class Detections:
+    """
+    Detecciones de un frame en formato columnar (arreglos NumPy):
+
+        xyxy      float64 (N, 4)  en píxeles de la imagen original
+        class_id  int16   (N,)
+        conf      float64 (N,)
+        track_id  int32   (N,)    -1 = sin track id
+        names     {class_id: class_name}
+
+    Compatibilidad con el formato anterior: `len`, iteración e índice entero
+    devuelven dicts (`class_id`, `class_name`, `conf`, `bbox_xyxy`, `track_id`).
+    Índices con slice o máscara devuelven otro `Detections`. Cajas y confianzas
+    van en float64: los valores de entrada (dicts, labels en texto, float32 del
+    modelo) se conservan exactos en eventos y logs.
+    """
+
+    __slots__ = ("xyxy", "class_id", "conf", "track_id", "names")
+
+    def __init__(
+        self,
+        xyxy,
+        class_id,
+        conf,
+        track_id=None,
+        names: Mapping[int, str] | None = None,
+    ) -> None:
+        self.xyxy = np.asarray(xyxy, dtype=np.float64).reshape(-1, 4)
+        self.class_id = np.asarray(class_id, dtype=np.int16).reshape(-1)
+        self.conf = np.asarray(conf, dtype=np.float64).reshape(-1)
+        n = len(self.xyxy)
+        if track_id is None:
+            self.track_id = np.full(n, -1, dtype=np.int32)
+        else:
+            self.track_id = np.asarray(track_id, dtype=np.int32).reshape(-1)
+        # La tabla de nombres se comparte entre frames y vistas (no se copia)
+        self.names = names if isinstance(names, dict) else dict(names or {})
+
+    @classmethod
+    def empty(cls, names: Mapping[int, str] | None = None) -> "Detections":
+        return cls(np.zeros((0, 4)), np.zeros(0), np.zeros(0), names=names)
+
+    @classmethod
+    def from_dicts(cls, detections: Iterable[Mapping[str, Any]]) -> "Detections":
+        """
+        Adaptador desde la lista de dicts. Si un class_id falta o se repite con
+        otro nombre se le asigna un id libre, para que id -> nombre sea único.
+        """
+        rows = list(detections)
+        names: dict[int, str] = {}
+        by_name: dict[str, int] = {}
+        ids = []
+        for det in rows:
+            name = str(det.get("class_name"))
+            cid = int(det.get("class_id", -1))
+            if name in by_name:
+                cid = by_name[name]
+            elif cid < 0 or cid in names:
+                cid = max(names, default=-1) + 1
+                while cid in names:
+                    cid += 1
+            names[cid] = name
+            by_name[name] = cid
+            ids.append(cid)
+        n = len(rows)
+        track_ids = [
+            -1 if det.get("track_id") is None else int(det.get("track_id"))
+            for det in rows
+        ]
+        return cls(
+            [det.get("bbox_xyxy", [0.0, 0.0, 0.0, 0.0]) for det in rows] if n else np.zeros((0, 4)),
+            ids,
+            [float(det.get("conf", 0.0)) for det in rows],
+            track_ids,
+            names=names,
+        )
+
+    def __len__(self) -> int:
+        return len(self.class_id)
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        for i in range(len(self)):
+            yield self._row(i)
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            return self._row(int(key) if key >= 0 else len(self) + int(key))
+        return Detections(
+            self.xyxy[key],
+            self.class_id[key],
+            self.conf[key],
+            self.track_id[key],
+            names=self.names,
+        )
+
+    def __repr__(self) -> str:
+        return f"Detections(n={len(self)}, classes={sorted(set(self.class_names))})"
+
+    def _row(self, i: int) -> dict[str, Any]:
+        cid = int(self.class_id[i])
+        tid = int(self.track_id[i])
+        return {
+            "class_id": cid,
+            "class_name": self.names.get(cid, str(cid)),
+            "conf": float(self.conf[i]),
+            "bbox_xyxy": self.xyxy[i].tolist(),
+            "track_id": tid if tid >= 0 else None,
+        }
+
+    def to_dicts(self) -> list[dict[str, Any]]:
+        return list(self)
+
+    @property
+    def class_names(self) -> list[str]:
+        return [self.names.get(int(c), str(int(c))) for c in self.class_id]
+
+    def class_mask(self, class_names: Iterable[str]) -> np.ndarray:
+        """Máscara booleana de las detecciones cuyas clases están en `class_names`."""
+        return np.isin(self.class_id, _class_ids(self.names, frozenset(class_names)))
+
+    def conf_at_least(self, conf_min: float) -> np.ndarray:
+        return self.conf >= conf_min
+
+    def select(self, class_names: Iterable[str] | None = None, conf_min: float | None = None) -> "Detections":
+        """Subconjunto por clases y/o confianza mínima."""
+        mask = np.ones(len(self), dtype=bool)
+        if class_names is not None:
+            mask &= self.class_mask(class_names)
+        if conf_min is not None:
+            mask &= self.conf_at_least(conf_min)
+        return self[mask]
+
+    def scaled(self, factor: float) -> "Detections":
+        return Detections(self.xyxy * factor, self.class_id, self.conf, self.track_id, names=self.names)
+
+
+def as_detections(detections) -> Detections:
+    """Acepta `Detections` o la lista de dicts (formato anterior)."""
+    if isinstance(detections, Detections):
+        return detections
+    return Detections.from_dicts(detections)
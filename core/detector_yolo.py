@@ -1,30 +1,28 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Any
+from typing import Any, Sequence
 
-from ultralytics import YOLO
+import numpy as np
+
+from .detections import Detections
+from .onnx_backend import OnnxYolo, export_onnx, quantize_onnx
 
 
 class DetectorYolo:
     """
     Wrapper ligero para YOLO.
 
+    backend="torch" usa Ultralytics; backend="onnx" exporta los pesos una vez
+    (ver onnx_backend.export_onnx) y corre con ONNX Runtime en CPU (solo predict).
+    Con quantize="dynamic" | "static" usa el modelo INT8 (onnx_backend.quantize_onnx).
+
     Formato de salida por imagen:
     {
         "frame_index": int | None,
         "image_path": str | None,
         "image_size": (width, height),
-        "detections": [
-            {
-                "class_id": int,
-                "class_name": str,
-                "conf": float,
-                "bbox_xyxy": [x1, y1, x2, y2],
-                "track_id": int | None,
-            },
-            ...
-        ],
+        "detections": Detections,  # columnar; iterar sigue dando los dicts de siempre
     }
     """
 
@@ -36,6 +34,12 @@ class DetectorYolo:
         imgsz: int = 1024,
         device: str | int | None = None,
         tracker: str = "bytetrack.yaml",
+        roi_imgsz: int | None = None,
+        backend: str = "torch",
+        onnx_threads: int = 0,
+        quantize: str | None = None,
+        calib_dir: str | Path | None = None,
+        calib_frames: int = 64,
     ) -> None:
         self.weights = str(weights)
         self.mode = mode
@@ -43,15 +47,62 @@ class DetectorYolo:
         self.imgsz = imgsz
         self.device = device
         self.tracker = tracker
+        self.roi_imgsz = roi_imgsz
+        self.backend = backend
+        self.quantize = quantize
+        self.onnx = None
+        if quantize is not None and backend != "onnx":
+            raise ValueError("quantize requires backend='onnx'")
+        if backend == "onnx":
+            if mode == "track":
+                raise ValueError("backend='onnx' only supports mode='predict' (no tracker)")
+            # Export cacheado junto al .pt (hash de pesos + imgsz); la inferencia no usa torch
+            if quantize is not None:
+                onnx_path = quantize_onnx(self.weights, imgsz, quantize, calib_dir=calib_dir, calib_frames=calib_frames)
+            else:
+                onnx_path = export_onnx(self.weights, imgsz)
+            self.onnx = OnnxYolo(onnx_path, conf=conf, threads=onnx_threads)
+            self.model = None
+            self.names = self.onnx.names
+            return
+        if backend != "torch":
+            raise ValueError(f"backend must be 'torch' or 'onnx', got {backend!r}")
+        # Import diferido: reproducir labels o detecciones cacheadas no carga torch
+        from ultralytics import YOLO
+
         self.model = YOLO(self.weights)
-        self.names = self.model.names
+        names = self.model.names
+        self.names = names if isinstance(names, dict) else dict(enumerate(names))
 
-    def detect(self, image, frame_index: int | None = None, image_path: str | None = None) -> dict[str, Any]:
+    def reset(self) -> None:
+        """Reinicia el estado del tracker (modo track) al reutilizar el modelo en otra secuencia."""
+        predictor = getattr(self.model, "predictor", None) if self.model is not None else None
+        for tracker in getattr(predictor, "trackers", None) or []:
+            tracker.reset()
+
+    def detect(
+        self,
+        image,
+        frame_index: int | None = None,
+        image_path: str | None = None,
+        scale: float = 1.0,
+        roi: Sequence[float] | None = None,
+    ) -> dict[str, Any]:
+        """
+        `scale` convierte coordenadas de la imagen recibida a píxeles originales
+        (frames decodificados a resolución reducida, ver FrameData.scale).
+        `roi` (x1, y1, x2, y2 en píxeles originales): se infiere solo el recorte,
+        a `roi_imgsz`, y las cajas vuelven a coordenadas del frame completo.
+        """
+        crop, offset, imgsz = self._crop(image, scale, roi)
+        if self.onnx is not None:
+            xyxy, confs, cls = self.onnx.predict([crop], imgsz)[0]
+            return self._result(xyxy, cls, confs, None, frame_index, image_path, scale, offset, image.shape)
         if self.mode == "track":
             results = self.model.track(
-                source=image,
+                source=crop,
                 conf=self.conf,
-                imgsz=self.imgsz,
+                imgsz=imgsz,
                 device=self.device,
                 tracker=self.tracker,
                 persist=True,
@@ -59,39 +110,120 @@ class DetectorYolo:
             )
         else:
             results = self.model.predict(
-                source=image,
+                source=crop,
+                conf=self.conf,
+                imgsz=imgsz,
+                device=self.device,
+                verbose=False,
+            )
+
+        return self._parse_result(results[0], frame_index, image_path, scale, offset, image.shape)
+
+    def detect_batch(
+        self,
+        images: Sequence,
+        frame_indices: Sequence[int | None] | None = None,
+        paths: Sequence[str | None] | None = None,
+        scales: Sequence[float] | None = None,
+        rois: Sequence[Sequence[float] | None] | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Inferencia de varios frames en una sola pasada (modo predict). Devuelve
+        una lista con el mismo formato de `detect`, en el orden de entrada.
+        Frames completos y recortes ROI van en pasadas separadas (distinto imgsz).
+
+        En modo track se procesa de a un frame: el tracker de Ultralytics
+        necesita ver los frames en secuencia.
+        """
+        n = len(images)
+        frame_indices = list(frame_indices) if frame_indices is not None else [None] * n
+        paths = list(paths) if paths is not None else [None] * n
+        scales = list(scales) if scales is not None else [1.0] * n
+        rois = list(rois) if rois is not None else [None] * n
+        if n == 0:
+            return []
+        if self.mode == "track" or n == 1:
+            return [
+                self.detect(images[i], frame_index=frame_indices[i], image_path=paths[i], scale=scales[i], roi=rois[i])
+                for i in range(n)
+            ]
+
+        crops = [self._crop(images[i], scales[i], rois[i]) for i in range(n)]
+        out: list[dict[str, Any] | None] = [None] * n
+        for imgsz in dict.fromkeys(c[2] for c in crops):
+            idx = [i for i in range(n) if crops[i][2] == imgsz]
+            if self.onnx is not None:
+                preds = self.onnx.predict([crops[i][0] for i in idx], imgsz)
+                for i, (xyxy, confs, cls) in zip(idx, preds):
+                    out[i] = self._result(
+                        xyxy, cls, confs, None, frame_indices[i], paths[i], scales[i], crops[i][1], images[i].shape
+                    )
+                continue
+            results = self.model.predict(
+                source=[crops[i][0] for i in idx],
                 conf=self.conf,
-                imgsz=self.imgsz,
+                imgsz=imgsz,
                 device=self.device,
                 verbose=False,
             )
+            for i, r in zip(idx, results):
+                out[i] = self._parse_result(r, frame_indices[i], paths[i], scales[i], crops[i][1], images[i].shape)
+        return out
 
-        r = results[0]
-        detections: list[dict[str, Any]] = []
+    def _crop(self, image, scale: float, roi: Sequence[float] | None):
+        if roi is None:
+            return image, (0.0, 0.0), self.imgsz
+        h, w = image.shape[:2]
+        x1 = max(0, int(roi[0] / scale))
+        y1 = max(0, int(roi[1] / scale))
+        x2 = min(w, int(np.ceil(roi[2] / scale)))
+        y2 = min(h, int(np.ceil(roi[3] / scale)))
+        return image[y1:y2, x1:x2], (x1 * scale, y1 * scale), self.roi_imgsz or self.imgsz
 
+    def _parse_result(
+        self,
+        r,
+        frame_index: int | None,
+        image_path: str | None,
+        scale: float,
+        offset: tuple[float, float] = (0.0, 0.0),
+        image_shape=None,
+    ) -> dict[str, Any]:
         boxes = r.boxes
+        xyxy = cls = confs = track_ids = None
         if boxes is not None and len(boxes) > 0:
             xyxy = boxes.xyxy.cpu().numpy()
-            cls = boxes.cls.cpu().numpy().astype(int)
+            cls = boxes.cls.cpu().numpy()
             confs = boxes.conf.cpu().numpy()
-            ids = None
             if self.mode == "track" and getattr(boxes, "id", None) is not None:
-                ids = boxes.id.cpu().numpy().astype(int)
-
-            for i in range(len(xyxy)):
-                x1, y1, x2, y2 = xyxy[i].tolist()
-                class_id = int(cls[i])
-                class_name = self.names[class_id] if isinstance(self.names, (list, dict)) else str(class_id)
-                det = {
-                    "class_id": class_id,
-                    "class_name": class_name,
-                    "conf": float(confs[i]),
-                    "bbox_xyxy": [float(x1), float(y1), float(x2), float(y2)],
-                    "track_id": int(ids[i]) if ids is not None else None,
-                }
-                detections.append(det)
-
-        h, w = r.orig_shape[:2] if r.orig_shape is not None else (None, None)
+                track_ids = boxes.id.cpu().numpy()
+        # Con ROI, orig_shape es el del recorte: el tamaño sale de la imagen completa
+        shape = image_shape if image_shape is not None else r.orig_shape
+        return self._result(xyxy, cls, confs, track_ids, frame_index, image_path, scale, offset, shape)
+
+    def _result(
+        self,
+        xyxy,
+        cls,
+        confs,
+        track_ids,
+        frame_index: int | None,
+        image_path: str | None,
+        scale: float,
+        offset: tuple[float, float],
+        shape,
+    ) -> dict[str, Any]:
+        if xyxy is not None and len(xyxy) > 0:
+            xyxy = xyxy * scale
+            if offset != (0.0, 0.0):
+                xyxy += np.array([offset[0], offset[1], offset[0], offset[1]], dtype=xyxy.dtype)
+            detections = Detections(xyxy, cls, confs, track_ids, names=self.names)
+        else:
+            detections = Detections.empty(self.names)
+
+        h, w = shape[:2] if shape is not None else (None, None)
+        if scale != 1.0 and w is not None:
+            w, h = int(round(w * scale)), int(round(h * scale))
         return {
             "frame_index": frame_index,
             "image_path": image_path,
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Callable, Iterator, Sequence
+
+import numpy as np
+
+_DATA_NAME = "frames.u8"
+_INDEX_NAME = "index.json"
+
+
+def _file_signature(files: Sequence[Path], tag: str) -> str:
+    h = hashlib.sha1(tag.encode("utf-8"))
+    for p in files:
+        st = p.stat()
+        h.update(f"{p}|{st.st_size}|{st.st_mtime_ns}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+def cache_dir_for(cache_root: Path | str, frames_dir: Path | str) -> Path:
+    frames_dir = Path(frames_dir).resolve()
+    digest = hashlib.sha1(str(frames_dir).encode("utf-8")).hexdigest()[:10]
+    return Path(cache_root) / f"{frames_dir.name}_{digest}"
+
+
+class FrameCache:
+    """
+    Cache en disco de frames ya decodificados (uint8 crudo + índice JSON).
+
+    Los frames se sirven como vistas de solo lectura sobre un np.memmap, sin
+    copiar. Se invalida si cambia la lista de archivos, su tamaño o mtime.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path | str,
+        files: Sequence[Path],
+        read_fn: Callable[[Path], "np.ndarray | None"],
+        tag: str = "",
+        workers: int = 0,
+        queue_size: int = 8,
+    ) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.files = list(files)
+        self.read_fn = read_fn
+        self.workers = workers
+        self.queue_size = max(1, queue_size)
+        self.signature = _file_signature(self.files, tag)
+        self.data_path = self.cache_dir / _DATA_NAME
+        self.index_path = self.cache_dir / _INDEX_NAME
+        self._entries: list[tuple[int, tuple[int, ...]] | None] = []
+        self._data: np.memmap | None = None
+        self.total_bytes = 0
+        self.source_bytes = 0
+        self.built = False
+
+    def valid(self) -> bool:
+        if not self.index_path.exists() or not self.data_path.exists():
+            return False
+        try:
+            index = json.loads(self.index_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return False
+        return index.get("signature") == self.signature and len(index.get("entries", [])) == len(self.files)
+
+    def build(self) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.data_path.with_suffix(".tmp")
+        entries = []
+        offset = 0
+        with tmp_path.open("wb") as f:
+            if self.workers > 0:
+                with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                    offset = self._write_all(f, self._read_ahead(pool), entries)
+            else:
+                offset = self._write_all(f, map(self.read_fn, self.files), entries)
+        os.replace(tmp_path, self.data_path)
+        index = {
+            "signature": self.signature,
+            "total_bytes": offset,
+            "source_bytes": sum(p.stat().st_size for p in self.files),
+            "entries": entries,
+        }
+        self.index_path.write_text(json.dumps(index), encoding="utf-8")
+        self.built = True
+
+    def _read_ahead(self, pool: ThreadPoolExecutor) -> Iterator["np.ndarray | None"]:
+        # Ventana acotada de futures: pool.map encolaría la carpeta entera y los
+        # frames decodificados esperarían en memoria a que los escriba un solo hilo.
+        pending: deque = deque()
+        try:
+            for path in self.files:
+                pending.append(pool.submit(self.read_fn, path))
+                if len(pending) >= self.queue_size:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for fut in pending:
+                fut.cancel()
+
+    def _write_all(self, f, images, entries: list) -> int:
+        offset = 0
+        for path, img in zip(self.files, images):
+            if img is None:
+                entries.append({"path": str(path), "offset": None, "shape": None})
+                continue
+            img = np.ascontiguousarray(img, dtype=np.uint8)
+            f.write(img.tobytes())
+            entries.append({"path": str(path), "offset": offset, "shape": list(img.shape)})
+            offset += img.nbytes
+        return offset
+
+    def open(self) -> "FrameCache":
+        if not self.valid():
+            self.build()
+        index = json.loads(self.index_path.read_text(encoding="utf-8"))
+        self.total_bytes = int(index["total_bytes"])
+        self.source_bytes = int(index["source_bytes"])
+        self._entries = [
+            (e["offset"], tuple(e["shape"])) if e["shape"] is not None else None
+            for e in index["entries"]
+        ]
+        # np.memmap no admite archivos vacíos
+        self._data = np.memmap(self.data_path, dtype=np.uint8, mode="r") if self.total_bytes > 0 else None
+        return self
+
+    def image(self, i: int) -> "np.ndarray | None":
+        entry = self._entries[i]
+        if entry is None or self._data is None:
+            return None
+        offset, shape = entry
+        n = int(np.prod(shape))
+        return self._data[offset : offset + n].reshape(shape)
+
+    def report(self) -> dict:
+        return {
+            "cache_dir": str(self.cache_dir),
+            "frames": len(self._entries),
+            "built": self.built,
+            "cache_bytes": self.total_bytes,
+            "source_bytes": self.source_bytes,
+            "ratio": (self.total_bytes / self.source_bytes) if self.source_bytes else 0.0,
+        }
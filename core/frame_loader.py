@@ -1,11 +1,21 @@
 from __future__ import annotations
 
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 import re
 from pathlib import Path
+import time
 from typing import Iterable, Iterator, Sequence
 
 import cv2
+import numpy as np
+
+from .frame_cache import FrameCache, cache_dir_for
+from .frame_manifest import FrameManifest
+from .frame_pool import FramePool
+from .frame_watcher import FolderWatcher
+from .image_files import image_size
 
 
 def _natural_key(s: str):
@@ -19,6 +29,45 @@ class FrameData:
     image: "cv2.typing.MatLike"
     width: int
     height: int
+    # Factor imagen decodificada -> píxeles originales (decodificación reducida).
+    # width/height siempre están en píxeles originales.
+    scale: float = 1.0
+
+
+_ZERO_PIXEL = np.zeros((1, 1, 3), dtype=np.uint8)
+
+_REDUCED_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+
+def pick_decode_scale(source_size: tuple[int, int], target_size: int) -> int:
+    # Mayor reducción que aún deja el lado largo >= imgsz del detector
+    longest = max(source_size)
+    for s in (8, 4, 2):
+        if longest / s >= target_size:
+            return s
+    return 1
+
+
+@dataclass
+class PrefetchStats:
+    frames: int = 0
+    queue_empty: int = 0  # el consumidor esperó: decode es el cuello de botella
+    queue_full: int = 0  # cola llena al pedir frame: inferencia es el cuello de botella
+
+    def as_dict(self) -> dict:
+        total = max(1, self.frames)
+        return {
+            "frames": self.frames,
+            "queue_empty": self.queue_empty,
+            "queue_full": self.queue_full,
+            "empty_ratio": self.queue_empty / total,
+            "full_ratio": self.queue_full / total,
+        }
 
 
 class FrameLoader:
@@ -30,6 +79,17 @@ class FrameLoader:
         start: int = 0,
         stop: int | None = None,
         step: int = 1,
+        prefetch: int = 0,
+        queue_size: int = 8,
+        cache_dir: Path | str | None = None,
+        decode_scale: int | str = 1,
+        target_size: int | None = None,
+        follow: bool = False,
+        poll_interval: float = 0.5,
+        idle_timeout: float | None = None,
+        manifest_dir: Path | str | None = None,
+        reuse_buffers: bool = False,
+        header_only: bool = False,
     ) -> None:
         self.frames_dir = Path(frames_dir)
         if not self.frames_dir.exists():
@@ -39,9 +99,42 @@ class FrameLoader:
         self.start = start
         self.stop = stop
         self.step = step
+        # Índice del primer frame a entregar (seek); los índices no se renumeran
+        self.offset = 0
+        self.prefetch = prefetch
+        self.queue_size = max(queue_size, prefetch, 1)
+        self.stats = PrefetchStats()
+        # Sin decodificar (p.ej. detector de labels sin video): `image` es un arreglo de
+        # ceros de solo lectura del tamaño de la cabecera, sin memoria propia
+        self.header_only = header_only
+        if header_only:
+            cache_dir, reuse_buffers, decode_scale = None, False, 1
+        self.cache_dir = cache_dir_for(cache_dir, self.frames_dir) if cache_dir is not None else None
+        self.cache: FrameCache | None = None
+        self.follow = follow
+        self.poll_interval = poll_interval
+        self.idle_timeout = idle_timeout
+        self.watcher: FolderWatcher | None = None
+        # Los frames se devuelven al pool con release() una vez escritos
+        self.pool = FramePool(max_free=self.queue_size + 4) if reuse_buffers and cache_dir is None else None
+        self.manifest: FrameManifest | None = None
+        if manifest_dir is not None:
+            self.manifest = FrameManifest(
+                cache_dir_for(manifest_dir, self.frames_dir) / "manifest.json",
+                self.frames_dir,
+                exts=self.exts,
+                recursive=recursive,
+                sort_key=_natural_key,
+            )
         self._files = self._scan()
+        self.source_size: tuple[int, int] | None = None
+        self.decode_scale = self._resolve_decode_scale(decode_scale, target_size)
+        self._flags = _REDUCED_FLAGS[self.decode_scale]
 
     def _scan(self) -> list[Path]:
+        if self.manifest is not None:
+            # Los frames ilegibles quedan fuera de antemano y no consumen índice
+            return self.manifest.load_or_build().paths()
         pattern = "**/*" if self.recursive else "*"
         files = [
             p
@@ -57,14 +150,187 @@ class FrameLoader:
     def paths(self) -> list[Path]:
         return list(self._files[self.start : self.stop : self.step])
 
+    def seek(self, index: int) -> None:
+        """La próxima iteración empieza en el frame `index` (p.ej. al reanudar desde un checkpoint)."""
+        self.offset = max(0, index)
+
+    def _resolve_decode_scale(self, decode_scale: int | str, target_size: int | None) -> int:
+        if decode_scale == 1:
+            return 1
+        # Tamaño de referencia desde el primer frame legible (misma cámara en toda la carpeta)
+        for path in self._files:
+            img = cv2.imread(str(path))
+            if img is not None:
+                self.source_size = (img.shape[1], img.shape[0])
+                break
+        if decode_scale == "auto":
+            if target_size is None or self.source_size is None:
+                return 1
+            return pick_decode_scale(self.source_size, target_size)
+        if decode_scale not in _REDUCED_FLAGS:
+            raise ValueError(f"decode_scale must be 1, 2, 4, 8 or 'auto', got {decode_scale!r}")
+        return int(decode_scale)
+
+    def _decode(self, path: Path) -> "cv2.typing.MatLike | None":
+        return cv2.imread(str(path), self._flags)
+
+    def _read(self, path: Path) -> "cv2.typing.MatLike | None":
+        if self.header_only:
+            size = image_size(path)
+            if size is not None:
+                return np.broadcast_to(_ZERO_PIXEL, (size[1], size[0], 3))
+            # Otros formatos: tamaño desde la imagen decodificada
+            return self._decode(path)
+        if self.pool is not None:
+            return self.pool.imread(str(path), self._flags)
+        return self._decode(path)
+
+    def release(self, frame: FrameData) -> None:
+        if self.pool is not None:
+            self.pool.release(frame.image)
+
+    def _frame(self, idx: int, path: Path, img) -> FrameData:
+        h, w = img.shape[:2]
+        if self.decode_scale == 1:
+            return FrameData(index=idx, path=path, image=img, width=w, height=h)
+        src = self.source_size
+        s = self.decode_scale
+        # El decoder reducido redondea hacia arriba: usar el tamaño real si coincide
+        if src is not None and -(-src[0] // s) == w and -(-src[1] // s) == h:
+            return FrameData(index=idx, path=path, image=img, width=src[0], height=src[1], scale=src[0] / w)
+        return FrameData(index=idx, path=path, image=img, width=w * s, height=h * s, scale=float(s))
+
+    def open_cache(self) -> FrameCache:
+        # Decodifica la carpeta completa una sola vez; luego se sirven vistas del memmap
+        if self.cache is None:
+            self.cache = FrameCache(
+                self.cache_dir,
+                self._files,
+                read_fn=self._decode,
+                tag=f"scale={self.decode_scale}",
+                workers=self.prefetch,
+                queue_size=self.queue_size,
+            ).open()
+        return self.cache
+
     def __iter__(self) -> Iterator[FrameData]:
+        if self.follow:
+            yield from self._iter_follow()
+            return
+        if self.cache_dir is not None:
+            yield from self._iter_cached()
+            return
         files = self._files[self.start : self.stop : self.step]
-        for idx, path in enumerate(files):
-            img = cv2.imread(str(path))
+        if self.prefetch > 0:
+            yield from self._iter_prefetch(files)
+            return
+        for idx, path in enumerate(files[self.offset :], start=self.offset):
+            img = self._read(path)
+            if img is None:
+                continue
+            yield self._frame(idx, path, img)
+
+    def _iter_prefetch(self, files: list[Path]) -> Iterator[FrameData]:
+        self.stats = PrefetchStats()
+        with ThreadPoolExecutor(max_workers=self.prefetch, thread_name_prefix="frame-decode") as pool:
+            yield from self._read_ahead(pool, enumerate(files[self.offset :], start=self.offset))
+
+    def _read_ahead(self, pool: ThreadPoolExecutor, items: Iterable[tuple[int, Path]]) -> Iterator[FrameData]:
+        # N hilos decodifican por adelantado (cv2.imread libera el GIL); la ventana
+        # de futures acota la memoria y se consume en orden estricto de índice.
+        pending: deque = deque()
+        items = iter(items)
+
+        def refill() -> None:
+            while len(pending) < self.queue_size:
+                item = next(items, None)
+                if item is None:
+                    return
+                idx, path = item
+                pending.append((idx, path, pool.submit(self._read, path)))
+
+        try:
+            refill()
+            while pending:
+                # Se mide al volver el consumidor, antes de reponer la ventana
+                idx, path, fut = pending[0]
+                if not fut.done():
+                    self.stats.queue_empty += 1
+                elif len(pending) >= self.queue_size and all(f.done() for _, _, f in pending):
+                    self.stats.queue_full += 1
+                pending.popleft()
+                refill()
+
+                img = fut.result()
+                self.stats.frames += 1
+                if img is None:
+                    continue
+                yield self._frame(idx, path, img)
+        finally:
+            for _, _, fut in pending:
+                fut.cancel()
+
+    def _read_each(self, items: Iterable[tuple[int, Path]]) -> Iterator[FrameData]:
+        for idx, path in items:
+            img = self._read(path)
+            if img is not None:
+                yield self._frame(idx, path, img)
+
+    def _iter_follow(self) -> Iterator[FrameData]:
+        # Modo "tail": procesa lo existente y luego espera frames nuevos de las cámaras.
+        # Solo se conserva el snapshot inicial (para len); lo nuevo no se acumula.
+        self.watcher = FolderWatcher(
+            self.frames_dir,
+            exts=self.exts,
+            recursive=self.recursive,
+            sort_key=_natural_key,
+        )
+        settled = self.watcher.hold_recent(self._files, min_age_s=2 * self.poll_interval)
+        self._files = settled
+        self.stats = PrefetchStats()
+        pool = None
+        if self.prefetch > 0:
+            pool = ThreadPoolExecutor(max_workers=self.prefetch, thread_name_prefix="frame-decode")
+        pos = 0
+        idx = 0
+        queue = settled
+        last_new = time.monotonic()
+        try:
+            while True:
+                # (índice, ruta) a decodificar de esta tanda, con start/stop/step/seek aplicados
+                batch: list[tuple[int, Path]] = []
+                done = False
+                for path in queue:
+                    if pos >= self.start and (pos - self.start) % self.step == 0:
+                        if idx >= self.offset:
+                            batch.append((idx, path))
+                        idx += 1
+                    pos += 1
+                    if self.stop is not None and pos >= self.stop:
+                        done = True
+                        break
+                yield from (self._read_ahead(pool, batch) if pool is not None else self._read_each(batch))
+                if done:
+                    return
+                if self.idle_timeout is not None and time.monotonic() - last_new > self.idle_timeout:
+                    return
+                time.sleep(self.poll_interval)
+                queue = self.watcher.poll()
+                if queue:
+                    last_new = time.monotonic()
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True, cancel_futures=True)
+
+    def _iter_cached(self) -> Iterator[FrameData]:
+        cache = self.open_cache()
+        positions = range(len(self._files))[self.start : self.stop : self.step]
+        for idx in range(self.offset, len(positions)):
+            i = positions[idx]
+            img = cache.image(i)
             if img is None:
                 continue
-            h, w = img.shape[:2]
-            yield FrameData(index=idx, path=path, image=img, width=w, height=h)
+            yield self._frame(idx, self._files[i], img)
 
     def iter_images(self) -> Iterable["cv2.typing.MatLike"]:
         for frame in self:
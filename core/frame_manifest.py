@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import bisect
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+import json
+import os
+from pathlib import Path
+from typing import Callable, Iterable
+
+import cv2
+
+from .image_files import image_complete
+
+_MANIFEST_VERSION = 1
+
+
+@dataclass
+class ManifestStats:
+    mode: str = "none"  # "reused" | "incremental" | "built"
+    files: int = 0
+    new: int = 0
+    changed: int = 0
+    removed: int = 0
+    invalid: int = 0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def image_looks_valid(path: str) -> bool:
+    """
+    Chequeo barato de integridad (cabecera y, para JPEG/PNG, cierre del archivo)
+    sin decodificar la imagen.
+    """
+    complete = image_complete(path)
+    if complete is not None:
+        return complete
+    return cv2.haveImageReader(path)
+
+
+class FrameManifest:
+    """
+    Manifiesto persistente de una carpeta de frames: rutas ordenadas (natural),
+    tamaño, mtime y un flag de validez.
+
+    Se reutiliza tal cual si no cambió el mtime de ningún directorio; si no, se
+    actualiza incrementalmente (solo se validan archivos nuevos o modificados).
+    """
+
+    def __init__(
+        self,
+        manifest_path: Path | str,
+        frames_dir: Path | str,
+        exts: Iterable[str],
+        recursive: bool = False,
+        sort_key: Callable[[str], object] | None = None,
+        validate: bool = True,
+        workers: int = 8,
+    ) -> None:
+        self.manifest_path = Path(manifest_path)
+        self.frames_dir = Path(frames_dir)
+        self.exts = {e.lower() for e in exts}
+        self.recursive = recursive
+        self.sort_key = sort_key or (lambda name: name)
+        self.validate = validate
+        self.workers = max(1, workers)
+        self.stats = ManifestStats()
+        # [ruta relativa, size, mtime_ns, valid]
+        self.entries: list[list] = []
+
+    def _dir_mtimes(self) -> dict[str, int]:
+        root = str(self.frames_dir)
+        mtimes = {".": os.stat(root).st_mtime_ns}
+        if self.recursive:
+            for dirpath, dirnames, _ in os.walk(root):
+                for d in dirnames:
+                    full = os.path.join(dirpath, d)
+                    mtimes[os.path.relpath(full, root)] = os.stat(full).st_mtime_ns
+        return mtimes
+
+    def _list_files(self, dirs: Iterable[str]) -> list[str]:
+        root = str(self.frames_dir)
+
+        def scan(rel_dir: str) -> list[str]:
+            base = root if rel_dir == "." else os.path.join(root, rel_dir)
+            out = []
+            with os.scandir(base) as it:
+                for entry in it:
+                    if entry.is_file() and os.path.splitext(entry.name)[1].lower() in self.exts:
+                        out.append(os.path.relpath(entry.path, root))
+            return out
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return [p for chunk in pool.map(scan, list(dirs)) for p in chunk]
+
+    def _stat_entries(self, rel_paths: list[str], previous: dict[str, list]) -> list[list]:
+        root = str(self.frames_dir)
+
+        def stat_one(rel: str) -> list | None:
+            full = os.path.join(root, rel)
+            try:
+                st = os.stat(full)
+            except OSError:
+                return None
+            prev = previous.get(rel)
+            if prev is not None and prev[1] == st.st_size and prev[2] == st.st_mtime_ns:
+                return prev
+            valid = image_looks_valid(full) if self.validate else None
+            return [rel, st.st_size, st.st_mtime_ns, valid]
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return [e for e in pool.map(stat_one, rel_paths, chunksize=256) if e is not None]
+
+    def _load(self) -> dict | None:
+        if not self.manifest_path.exists():
+            return None
+        try:
+            data = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if (
+            data.get("version") != _MANIFEST_VERSION
+            or data.get("frames_dir") != str(self.frames_dir.resolve())
+            or data.get("recursive") != self.recursive
+            or set(data.get("exts", [])) != self.exts
+            or data.get("validate") != self.validate
+        ):
+            return None
+        return data
+
+    def _save(self, dir_mtimes: dict[str, int]) -> None:
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": _MANIFEST_VERSION,
+            "frames_dir": str(self.frames_dir.resolve()),
+            "recursive": self.recursive,
+            "exts": sorted(self.exts),
+            "validate": self.validate,
+            "dirs": dir_mtimes,
+            "entries": self.entries,
+        }
+        tmp = self.manifest_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, self.manifest_path)
+
+    def _key(self, entry: list):
+        return self.sort_key(os.path.basename(entry[0]))
+
+    def load_or_build(self) -> "FrameManifest":
+        dir_mtimes = self._dir_mtimes()
+        data = self._load()
+        if data is not None and data.get("dirs") == dir_mtimes:
+            self.entries = data["entries"]
+            self.stats.mode = "reused"
+        elif data is not None:
+            previous = {e[0]: e for e in data["entries"]}
+            current = self._stat_entries(self._list_files(dir_mtimes), previous)
+            # _stat_entries devuelve la misma entrada si no cambió tamaño ni mtime
+            unchanged = {id(e) for e in current if previous.get(e[0]) is e}
+            current_paths = {e[0] for e in current}
+            self.entries = [e for e in data["entries"] if id(e) in unchanged]
+            self.stats.removed = sum(1 for p in previous if p not in current_paths)
+            for e in sorted((e for e in current if id(e) not in unchanged), key=self._key):
+                if e[0] in previous:
+                    self.stats.changed += 1
+                else:
+                    self.stats.new += 1
+                bisect.insort(self.entries, e, key=self._key)
+            self.stats.mode = "incremental"
+            self._save(dir_mtimes)
+        else:
+            self.entries = self._stat_entries(self._list_files(dir_mtimes), {})
+            self.entries.sort(key=self._key)
+            self.stats.mode = "built"
+            self.stats.new = len(self.entries)
+            self._save(dir_mtimes)
+
+        self.stats.files = len(self.entries)
+        self.stats.invalid = sum(1 for e in self.entries if e[3] is False)
+        return self
+
+    def paths(self, include_invalid: bool = False) -> list[Path]:
+        return [
+            self.frames_dir / e[0]
+            for e in self.entries
+            if include_invalid or e[3] is not False
+        ]
+
+    def invalid_paths(self) -> list[Path]:
+        return [self.frames_dir / e[0] for e in self.entries if e[3] is False]
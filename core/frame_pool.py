@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+import threading
+
+import cv2
+import numpy as np
+
+
+@dataclass
+class PoolStats:
+    allocations: int = 0  # arreglos nuevos creados (pool vacío, shape distinto o sin soporte de dst)
+    reuses: int = 0  # decodificaciones directas sobre un buffer del pool
+    released: int = 0
+    peak_in_use: int = 0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def _canary_row(width: int, channels: tuple[int, ...]) -> np.ndarray:
+    # Patrón fijo pseudoaleatorio: una fila decodificada igual a él es prácticamente imposible
+    return np.random.default_rng(0x5EED).integers(0, 256, size=(width, *channels), dtype=np.uint8)
+
+
+class FramePool:
+    """
+    Pool de buffers uint8 preasignados para decodificar frames sin asignar memoria nueva.
+
+    Usa `cv2.imread(path, dst, flags)` cuando el binding de OpenCV lo soporta;
+    si no, decodifica normalmente y el arreglo resultante pasa a formar parte
+    del pool al liberarse. Con dst un archivo que no decodifica deja el buffer
+    intacto (no devuelve None): antes de decodificar se marca la última fila del
+    buffer con un patrón; si sigue ahí, el archivo no decodificó (o no completo)
+    y se repite con la lectura normal, que devuelve None si falla.
+    """
+
+    def __init__(self, max_free: int = 16) -> None:
+        self.max_free = max_free
+        self.stats = PoolStats()
+        self.dst_supported: bool | None = None
+        self._free: dict[tuple[int, ...], list[np.ndarray]] = {}
+        self._in_use = 0
+        self._shape_hint: tuple[int, ...] | None = None
+        self._canaries: dict[tuple[int, ...], np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, shape: tuple[int, ...]) -> np.ndarray:
+        with self._lock:
+            free = self._free.get(shape)
+            buf = free.pop() if free else None
+            self._in_use += 1
+            self.stats.peak_in_use = max(self.stats.peak_in_use, self._in_use)
+        if buf is None:
+            buf = np.empty(shape, dtype=np.uint8)
+            self.stats.allocations += 1
+        return buf
+
+    def release(self, buf: np.ndarray | None) -> None:
+        if buf is None:
+            return
+        with self._lock:
+            self._in_use = max(0, self._in_use - 1)
+            self.stats.released += 1
+            free = self._free.setdefault(buf.shape, [])
+            if len(free) < self.max_free:
+                free.append(buf)
+
+    def _discard(self, buf: np.ndarray) -> None:
+        # Buffer tomado pero no usado: vuelve al pool sin contar como liberación de frame
+        with self._lock:
+            self._in_use = max(0, self._in_use - 1)
+            self._free.setdefault(buf.shape, []).append(buf)
+
+    def imread(self, path: str, flags: int = cv2.IMREAD_COLOR) -> "np.ndarray | None":
+        shape = self._shape_hint
+        if shape is None or self.dst_supported is False:
+            return self._imread_alloc(path, flags)
+        canary = self._canaries.get(shape)
+        if canary is None:
+            canary = self._canaries.setdefault(shape, _canary_row(shape[1], shape[2:]))
+        buf = self.acquire(shape)
+        buf[-1] = canary
+        try:
+            img = cv2.imread(path, buf, flags)
+        except (cv2.error, TypeError):
+            # Binding sin overload dst, o imagen de otro tamaño
+            self._discard(buf)
+            if self.dst_supported is None:
+                self.dst_supported = False
+            return self._imread_alloc(path, flags)
+        self.dst_supported = True
+        if img is not buf:
+            self._discard(buf)
+            return self._track_alloc(img)
+        if np.array_equal(buf[-1], canary):
+            # Corrupto o truncado sin relleno: el buffer quedó (al menos en parte) sin escribir
+            self._discard(buf)
+            return self._imread_alloc(path, flags)
+        self.stats.reuses += 1
+        return img
+
+    def _imread_alloc(self, path: str, flags: int) -> "np.ndarray | None":
+        img = cv2.imread(path, flags)
+        return self._track_alloc(img)
+
+    def _track_alloc(self, img) -> "np.ndarray | None":
+        if img is None:
+            return None
+        self.stats.allocations += 1
+        with self._lock:
+            self._in_use += 1
+            self.stats.peak_in_use = max(self.stats.peak_in_use, self._in_use)
+        self._shape_hint = img.shape
+        return img
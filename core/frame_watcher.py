@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+import time
+from typing import Callable, Iterable
+
+from .image_files import image_complete
+
+
+class FolderWatcher:
+    """
+    Detecta incrementalmente frames nuevos en una carpeta que las cámaras van llenando.
+
+    Solo se relista un directorio cuando cambia su mtime y solo se ordenan los
+    archivos nuevos. Un archivo se entrega cuando su tamaño se mantiene estable
+    entre polls (y, para JPEG/PNG, cuando ya tiene su marcador de fin).
+
+    Por carpeta se guardan los nombres del último listado: es nuevo lo que no
+    estaba, y el conjunto se recorta al listado actual, así que no crece con
+    archivos que las cámaras ya rotaron. Un archivo que llega tarde con un
+    nombre anterior también se entrega; `sort_key` solo se calcula para los
+    nombres nuevos y ordena cada entrega.
+    """
+
+    def __init__(
+        self,
+        folder: Path | str,
+        exts: Iterable[str],
+        recursive: bool = False,
+        known: Iterable[Path] = (),
+        settle_polls: int = 1,
+        max_settle_polls: int = 5,
+        sort_key: Callable[[str], object] | None = None,
+    ) -> None:
+        self.folder = Path(folder)
+        self.exts = {e.lower() for e in exts}
+        self.recursive = recursive
+        self.settle_polls = settle_polls
+        self.max_settle_polls = max_settle_polls
+        self.sort_key = sort_key or (lambda name: name)
+        # carpeta -> nombres del último listado
+        self._seen: dict[str, set[str]] = {}
+        for p in known:
+            self._remember(str(p))
+        self._dir_mtimes: dict[str, int] = {}
+        self._subdirs: dict[str, list[str]] = {}
+        # path -> (último tamaño, polls con tamaño estable)
+        self._pending: dict[str, tuple[int, int]] = {}
+        self.polls = 0
+        self.dir_listings = 0
+
+    def _remember(self, path: str) -> None:
+        folder, name = os.path.split(path)
+        self._seen.setdefault(folder, set()).add(name)
+
+    def hold_recent(self, files: list[Path], min_age_s: float) -> list[Path]:
+        # Archivos del snapshot inicial modificados recién pueden estar a medio escribir
+        now = time.time()
+        settled = []
+        for p in files:
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            if now - st.st_mtime < min_age_s:
+                self._pending[str(p)] = (st.st_size, 0)
+            else:
+                settled.append(p)
+            self._remember(str(p))
+        return settled
+
+    def _list_dir(self, dir_path: str, new_files: list[str]) -> None:
+        try:
+            mtime = os.stat(dir_path).st_mtime_ns
+        except OSError:
+            return
+        if self._dir_mtimes.get(dir_path) == mtime:
+            # Sin cambios en este nivel: solo descender a subcarpetas ya conocidas
+            for sub in self._subdirs.get(dir_path, []):
+                self._list_dir(sub, new_files)
+            return
+        self._dir_mtimes[dir_path] = mtime
+        try:
+            entries = list(os.scandir(dir_path))
+        except OSError:
+            return
+        self.dir_listings += 1
+        subdirs = []
+        seen = self._seen.get(dir_path, set())
+        names = set()
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if self.recursive:
+                    subdirs.append(entry.path)
+                continue
+            if os.path.splitext(entry.name)[1].lower() not in self.exts:
+                continue
+            names.add(entry.name)
+            if entry.name not in seen:
+                new_files.append(entry.path)
+        # Los nombres que ya no están (rotados o borrados) salen del conjunto
+        self._seen[dir_path] = names
+        self._subdirs[dir_path] = subdirs
+        for sub in subdirs:
+            self._list_dir(sub, new_files)
+
+    def poll(self) -> list[Path]:
+        self.polls += 1
+        new_files: list[str] = []
+        self._list_dir(str(self.folder), new_files)
+        for p in new_files:
+            self._pending[p] = (-1, 0)
+
+        ready = []
+        for p, (last_size, stable) in list(self._pending.items()):
+            try:
+                size = os.stat(p).st_size
+            except OSError:
+                self._pending.pop(p, None)
+                continue
+            stable = stable + 1 if size == last_size and size > 0 else 0
+            self._pending[p] = (size, stable)
+            if stable < self.settle_polls:
+                continue
+            path = Path(p)
+            if stable < self.max_settle_polls and image_complete(path) is False:
+                continue
+            self._pending.pop(p)
+            ready.append(path)
+
+        ready.sort(key=lambda p: self.sort_key(p.name))
+        return ready
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+_JPEG_SOI = b"\xff\xd8"
+# FFD9 no aparece dentro de los datos JPEG (van con byte stuffing)
+_JPEG_EOI = b"\xff\xd9"
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_PNG_IEND = b"IEND\xaeB`\x82"
+_TAIL_BYTES = 1024  # algunas cámaras agregan relleno después del EOI
+
+
+def image_complete(path: Path | str) -> bool | None:
+    """
+    Chequeo barato de que un JPEG/PNG no está truncado: su marcador de fin (EOI o
+    IEND) aparece en los últimos bytes. None si el archivo no es JPEG ni PNG;
+    False si está vacío o no se puede leer.
+    """
+    try:
+        with open(path, "rb") as f:
+            head = f.read(8)
+            if not head:
+                return False
+            if head[:2] == _JPEG_SOI:
+                trailer = _JPEG_EOI
+            elif head == _PNG_SIGNATURE:
+                trailer = _PNG_IEND
+            else:
+                return None
+            size = f.seek(0, os.SEEK_END)
+            f.seek(max(0, size - _TAIL_BYTES))
+            return trailer in f.read()
+    except OSError:
+        return False
+
+
+# Marcadores SOF (Start Of Frame) con el tamaño; C4 (DHT), C8 (JPG) y CC (DAC) no lo son
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+# Marcadores sin segmento de longitud (RSTn, TEM)
+_JPEG_STANDALONE = {0x01, *range(0xD0, 0xD8)}
+
+
+def _jpeg_size(f) -> tuple[int, int] | None:
+    f.seek(2)
+    while True:
+        if f.read(1) != b"\xff":
+            return None
+        marker = f.read(1)
+        while marker == b"\xff":  # relleno entre marcadores
+            marker = f.read(1)
+        if not marker:
+            return None
+        code = marker[0]
+        if code in _JPEG_STANDALONE:
+            continue
+        if code in (0xD9, 0xDA):  # EOI / inicio de datos sin haber visto SOF
+            return None
+        seg = f.read(2)
+        if len(seg) < 2:
+            return None
+        length = int.from_bytes(seg, "big")
+        if code in _JPEG_SOF:
+            sof = f.read(5)
+            if len(sof) < 5:
+                return None
+            return int.from_bytes(sof[3:5], "big"), int.from_bytes(sof[1:3], "big")
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+def image_size(path: Path | str) -> tuple[int, int] | None:
+    """
+    (ancho, alto) leídos de la cabecera JPEG (segmento SOF) o PNG (IHDR), sin
+    decodificar. None si no es JPEG/PNG o la cabecera no se puede leer.
+    """
+    try:
+        with open(path, "rb") as f:
+            head = f.read(24)
+            if head[:2] == _JPEG_SOI:
+                return _jpeg_size(f)
+            if head[:8] == _PNG_SIGNATURE and head[12:16] == b"IHDR":
+                return int.from_bytes(head[16:20], "big"), int.from_bytes(head[20:24], "big")
+    except OSError:
+        return None
+    return None
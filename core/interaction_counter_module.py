@@ -3,9 +3,12 @@ from __future__ import annotations
 from collections import deque
 from dataclasses import dataclass
 
+import numpy as np
+
 from .area_selector import AreaSelector, AreaSelection
 from .area_zones import make_inner_outer, AreaZones
-from .border_state import classify_bbox_state, BorderState
+from .border_state import STATE_INSIDE, classify_states
+from .detections import Detections, as_detections
 from .person_gate import person_near_border
 
 
@@ -39,6 +42,28 @@ class InteractionCounterModule:
         self.person_near_streak = 0
         self.current_count = cfg.start_count
 
+    def state_dict(self) -> dict:
+        return {
+            "selector": self.selector.state_dict(),
+            "counts": list(self.counts),
+            "active": self.active,
+            "idle_frames": self.idle_frames,
+            "count_before": self.count_before,
+            "count_after": self.count_after,
+            "person_near_streak": self.person_near_streak,
+            "current_count": self.current_count,
+        }
+
+    def load_state(self, state: dict) -> None:
+        self.selector.load_state(state["selector"])
+        self.counts = deque(state["counts"], maxlen=self.cfg.window_size)
+        self.active = state["active"]
+        self.idle_frames = state["idle_frames"]
+        self.count_before = state["count_before"]
+        self.count_after = state["count_after"]
+        self.person_near_streak = state["person_near_streak"]
+        self.current_count = state["current_count"]
+
     def _median(self) -> int | None:
         if not self.counts:
             return None
@@ -48,24 +73,22 @@ class InteractionCounterModule:
             return int(vals[mid])
         return int(round((vals[mid - 1] + vals[mid]) / 2))
 
-    def _count_visible_inside(self, detections: list[dict], inner_xyxy: list[float], outer_xyxy: list[float]) -> int:
-        n = 0
-        for det in detections:
-            if det.get("class_name") not in self.cfg.target_classes:
-                continue
-            if det.get("conf", 0.0) < self.cfg.min_conf:
-                continue
-            state = classify_bbox_state(
-                det["bbox_xyxy"],
-                inner_xyxy,
-                outer_xyxy,
-                inner_ratio_min=self.cfg.inner_ratio_min,
-            )
-            if state == BorderState.INSIDE:
-                n += 1
-        return n
-
-    def update(self, detections: list[dict], frame_index: int, image_size: tuple[int, int]) -> InteractionOutput:
+    def _count_visible_inside(
+        self,
+        detections: Detections | list[dict],
+        inner_xyxy: list[float],
+        outer_xyxy: list[float],
+    ) -> int:
+        dets = as_detections(detections)
+        targets = dets[dets.class_mask(self.cfg.target_classes) & dets.conf_at_least(self.cfg.min_conf)]
+        codes = classify_states(targets.xyxy, inner_xyxy, outer_xyxy, inner_ratio_min=self.cfg.inner_ratio_min)
+        return int(np.count_nonzero(codes == STATE_INSIDE))
+
+    def is_busy(self) -> bool:
+        return self.person_near_streak > 0 or self.active
+
+    def update(self, detections: Detections | list[dict], frame_index: int, image_size: tuple[int, int]) -> InteractionOutput:
+        detections = as_detections(detections)
         self.selector.update(detections, image_size=image_size, frame_index=frame_index)
 
         if self.selector.selected is None:
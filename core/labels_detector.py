@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+import json
+from pathlib import Path
+from typing import Any, Callable, Sequence
+
+from .detections import Detections
+
+
+def load_names(path: Path | str) -> dict[int, str]:
+    """
+    Tabla de clases guardada por utils/detect_img.py (names.json: {"0": "persona", ...}).
+    También acepta una lista JSON.
+    """
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    if isinstance(data, list):
+        return dict(enumerate(str(v) for v in data))
+    return {int(k): str(v) for k, v in data.items()}
+
+
+@dataclass
+class LabelsStats:
+    frames: int = 0
+    missing: int = 0  # frames sin archivo de labels (se tratan como sin detecciones)
+    detections: int = 0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class LabelsDetector:
+    """
+    Reproduce detecciones desde los labels/*.txt que escribe utils/detect_img.py.
+
+    Cada línea: `class x1 y1 x2 y2 conf [track_id]`, en píxeles de la imagen
+    original. Mismo contrato de salida que DetectorYolo.detect(); no carga modelo.
+    Solo usa el tamaño de `image`: sirve el placeholder de FrameLoader(header_only=True).
+    """
+
+    def __init__(
+        self,
+        labels_dir: Path | str,
+        names: dict[int, str] | Path | str | None = None,
+        fallback_names: Callable[[], Any] | None = None,
+    ) -> None:
+        self.labels_dir = Path(labels_dir)
+        if not self.labels_dir.is_dir():
+            raise FileNotFoundError(f"Labels folder not found: {self.labels_dir}")
+        if names is None:
+            # detect_img.py guarda names.json junto a labels/
+            names = self.labels_dir.parent / "names.json"
+        if not isinstance(names, dict):
+            names_path = Path(names)
+            if names_path.exists():
+                names = load_names(names_path)
+            elif fallback_names is not None:
+                # Sin tabla guardada: la que provea quien crea el detector (config o modelo)
+                names = fallback_names()
+            else:
+                raise FileNotFoundError(f"Names table not found: {names_path}")
+        if isinstance(names, (list, tuple)):
+            names = dict(enumerate(names))
+        self.names = {int(k): str(v) for k, v in names.items()}
+        self.stats = LabelsStats()
+
+    def label_path(self, image_path: str | Path) -> Path:
+        return self.labels_dir / f"{Path(image_path).stem}.txt"
+
+    def read_labels(self, image_path: str | Path | None) -> Detections | None:
+        if image_path is None:
+            return None
+        try:
+            text = self.label_path(image_path).read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None
+
+        rows = [parts for parts in (line.split() for line in text.splitlines()) if len(parts) >= 6]
+        if not rows:
+            return Detections.empty(self.names)
+        return Detections(
+            [[float(v) for v in parts[1:5]] for parts in rows],
+            [int(parts[0]) for parts in rows],
+            [float(parts[5]) for parts in rows],
+            [int(parts[6]) if len(parts) > 6 else -1 for parts in rows],
+            names=self.names,
+        )
+
+    def detect(
+        self,
+        image,
+        frame_index: int | None = None,
+        image_path: str | None = None,
+        scale: float = 1.0,
+        roi: Sequence[float] | None = None,
+    ) -> dict[str, Any]:
+        # Los labels son del frame completo: `roi` se acepta por compatibilidad y se ignora
+        detections = self.read_labels(image_path)
+        self.stats.frames += 1
+        if detections is None:
+            self.stats.missing += 1
+            detections = Detections.empty(self.names)
+        self.stats.detections += len(detections)
+
+        h, w = image.shape[:2]
+        return {
+            "frame_index": frame_index,
+            "image_path": image_path,
+            "image_size": (int(round(w * scale)), int(round(h * scale))),
+            "detections": detections,
+        }
+
+    def detect_batch(
+        self,
+        images: Sequence,
+        frame_indices: Sequence[int | None] | None = None,
+        paths: Sequence[str | None] | None = None,
+        scales: Sequence[float] | None = None,
+        rois: Sequence[Sequence[float] | None] | None = None,
+    ) -> list[dict[str, Any]]:
+        n = len(images)
+        frame_indices = list(frame_indices) if frame_indices is not None else [None] * n
+        paths = list(paths) if paths is not None else [None] * n
+        scales = list(scales) if scales is not None else [1.0] * n
+        return [
+            self.detect(images[i], frame_index=frame_indices[i], image_path=paths[i], scale=scales[i])
+            for i in range(n)
+        ]
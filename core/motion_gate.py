@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+
+import cv2
+import numpy as np
+
+
+@dataclass
+class MotionGateStats:
+    frames: int = 0
+    reused: int = 0
+    inferred: int = 0
+    forced: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.reused / self.frames if self.frames else 0.0
+
+    def as_dict(self) -> dict:
+        d = asdict(self)
+        d["hit_rate"] = self.hit_rate
+        return d
+
+
+class MotionGate:
+    """
+    Compuerta de movimiento entre FrameLoader y el detector.
+
+    Compara una versión reducida en gris del frame con la del último frame
+    inferido y cuenta los píxeles que cambiaron más de `pixel_threshold` niveles
+    de gris (opcionalmente solo dentro de una ROI, p.ej. la zona outer del
+    área). Si la fracción de píxeles cambiados es menor a `threshold` se
+    reutilizan las detecciones anteriores. No se usa la diferencia media: un
+    objeto chico que se mueve apenas la cambia. Cada `refresh_interval` frames
+    se fuerza inferencia para que el tracker no quede con estado viejo.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.0005,
+        width: int = 160,
+        refresh_interval: int = 10,
+        pixel_threshold: int = 15,
+    ) -> None:
+        self.threshold = threshold
+        self.pixel_threshold = pixel_threshold
+        self.width = width
+        self.refresh_interval = refresh_interval
+        self.stats = MotionGateStats()
+        self._ref: np.ndarray | None = None
+        self._ref_scale = 1.0
+        self._since_refresh = 0
+        self.last_score = 0.0
+
+    def state_dict(self) -> dict:
+        return {
+            "ref": None if self._ref is None else self._ref.copy(),
+            "ref_scale": self._ref_scale,
+            "since_refresh": self._since_refresh,
+            "last_score": self.last_score,
+            "stats": asdict(self.stats),
+        }
+
+    def load_state(self, state: dict) -> None:
+        self._ref = state["ref"]
+        self._ref_scale = state["ref_scale"]
+        self._since_refresh = state["since_refresh"]
+        self.last_score = state["last_score"]
+        self.stats = MotionGateStats(**state["stats"])
+
+    def _small(self, image) -> np.ndarray:
+        h, w = image.shape[:2]
+        self._ref_scale = self.width / float(w)
+        size = (self.width, max(1, int(round(h * self._ref_scale))))
+        small = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return small
+
+    def static(self, image, roi_xyxy: list[float] | None = None, roi_scale: float = 1.0) -> bool:
+        """
+        True si el frame se puede saltar (sin movimiento). `roi_xyxy` en píxeles
+        originales; `roi_scale` = FrameData.scale de la imagen recibida.
+        """
+        self.stats.frames += 1
+        small = self._small(image)
+        ref = self._ref
+        if ref is None or ref.shape != small.shape:
+            self._accept(small)
+            return False
+        if self.refresh_interval > 0 and self._since_refresh >= self.refresh_interval:
+            self.stats.forced += 1
+            self._accept(small)
+            return False
+
+        diff = cv2.absdiff(small, ref)
+        if roi_xyxy is not None:
+            f = self._ref_scale / roi_scale
+            x1, y1, x2, y2 = (int(round(v * f)) for v in roi_xyxy)
+            x1, y1 = max(0, x1), max(0, y1)
+            x2, y2 = min(diff.shape[1], x2 + 1), min(diff.shape[0], y2 + 1)
+            if x2 > x1 and y2 > y1:
+                diff = diff[y1:y2, x1:x2]
+        self.last_score = float(np.count_nonzero(diff > self.pixel_threshold)) / max(1, diff.size)
+        if self.last_score < self.threshold:
+            self.stats.reused += 1
+            self._since_refresh += 1
+            return True
+        self._accept(small)
+        return False
+
+    def _accept(self, small: np.ndarray) -> None:
+        # La referencia es siempre el último frame inferido (no el anterior),
+        # así el movimiento lento se acumula hasta superar el umbral.
+        self._ref = small
+        self._since_refresh = 0
+        self.stats.inferred += 1
@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+import ast
+import hashlib
+import os
+from pathlib import Path
+import shutil
+from typing import Sequence
+
+import cv2
+import numpy as np
+
+from .box_ops import iou_matrix
+from .file_hash import file_sha256
+
+
+def onnx_path_for(weights: Path | str, imgsz: int, suffix: str = "") -> Path:
+    """Ruta del ONNX cacheado junto al .pt: <stem>.<sha256[:12]>.<imgsz><suffix>.onnx"""
+    weights = Path(weights)
+    return weights.with_name(f"{weights.stem}.{file_sha256(weights)[:12]}.{imgsz}{suffix}.onnx")
+
+
+def export_onnx(weights: Path | str, imgsz: int) -> Path:
+    """
+    Exporta los pesos .pt a ONNX una sola vez (batch dinámico) y devuelve la
+    ruta cacheada. Solo la primera vez se importa ultralytics/torch.
+    """
+    weights = Path(weights)
+    out = onnx_path_for(weights, imgsz)
+    if out.exists():
+        return out
+
+    from ultralytics import YOLO
+
+    print(f"[INFO] Exporting {weights.name} to ONNX (imgsz={imgsz}) -> {out.name}")
+    exported = Path(YOLO(str(weights)).export(format="onnx", imgsz=imgsz, dynamic=True, simplify=False))
+    tmp = out.with_suffix(".onnx.tmp")
+    shutil.move(str(exported), tmp)
+    os.replace(tmp, out)
+    return out
+
+
+def quantize_onnx(
+    weights: Path | str,
+    imgsz: int,
+    mode: str = "dynamic",
+    calib_dir: Path | str | None = None,
+    calib_frames: int = 64,
+) -> Path:
+    """
+    Modelo INT8 cacheado junto al .pt, a partir del ONNX FP32 (export_onnx).
+
+    dynamic: pesos INT8, activaciones cuantizadas en ejecución (sin calibración).
+    static: pesos y activaciones INT8 (formato QDQ); los rangos se calibran con
+    `calib_frames` frames muestreados uniformemente de `calib_dir`.
+    Solo se cuantizan Conv/MatMul: el decodificado de cajas queda en float.
+    """
+    if mode not in ("dynamic", "static"):
+        raise ValueError(f"quantize must be 'dynamic' or 'static', got {mode!r}")
+    if mode == "static":
+        if calib_dir is None:
+            raise ValueError("static quantization needs calib_dir (frames folder)")
+        tag = hashlib.sha1(f"{Path(calib_dir).resolve()}|{calib_frames}".encode("utf-8")).hexdigest()[:8]
+        out = onnx_path_for(weights, imgsz, suffix=f".int8s-{tag}")
+    else:
+        out = onnx_path_for(weights, imgsz, suffix=".int8d")
+    if out.exists():
+        return out
+
+    from onnxruntime.quantization import QuantFormat, QuantType, quantize_dynamic, quantize_static
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    fp32 = export_onnx(weights, imgsz)
+    tmp = out.with_name(out.name + ".tmp")
+    print(f"[INFO] Quantizing {fp32.name} to INT8 ({mode}) -> {out.name}")
+    # Inferencia de formas + optimización previa (recomendado por ONNX Runtime)
+    src = out.with_name(out.name + ".pre")
+    quant_pre_process(str(fp32), str(src), skip_symbolic_shape=True)
+    if mode == "dynamic":
+        # ConvInteger de ONNX Runtime en CPU requiere pesos uint8
+        quantize_dynamic(src, tmp, weight_type=QuantType.QUInt8, op_types_to_quantize=["Conv", "MatMul"])
+    else:
+        quantize_static(
+            src,
+            tmp,
+            _calibration_reader(src, imgsz, Path(calib_dir), calib_frames),
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            per_channel=True,
+            op_types_to_quantize=["Conv", "MatMul"],
+        )
+    os.replace(tmp, out)
+    src.unlink(missing_ok=True)
+    return out
+
+
+def _calibration_reader(onnx_path: Path, imgsz: int, calib_dir: Path, calib_frames: int):
+    import onnxruntime as ort
+    from onnxruntime.quantization import CalibrationDataReader
+
+    from .frame_loader import FrameLoader
+
+    input_name = ort.InferenceSession(str(onnx_path), providers=["CPUExecutionProvider"]).get_inputs()[0].name
+    n = len(FrameLoader(calib_dir))
+    if n == 0:
+        raise ValueError(f"No calibration frames in {calib_dir}")
+    step = max(1, n // max(1, calib_frames))
+    loader = FrameLoader(calib_dir, step=step, stop=step * calib_frames)
+
+    class _FrameReader(CalibrationDataReader):
+        def __init__(self) -> None:
+            self._it = iter(loader)
+
+        def get_next(self):
+            frame = next(self._it, None)
+            if frame is None:
+                return None
+            return {input_name: preprocess([frame.image], imgsz)[0]}
+
+    print(f"[INFO] Calibrating with {len(loader)} frames from {calib_dir}")
+    return _FrameReader()
+
+
+def letterbox(
+    image: np.ndarray,
+    size: int,
+    color: int = 114,
+    auto: bool = False,
+    stride: int = 32,
+) -> tuple[np.ndarray, float, tuple[float, float]]:
+    """
+    Redimensiona manteniendo aspecto a size x size con relleno centrado, como
+    el LetterBox de Ultralytics. Con `auto` el relleno es el mínimo hasta un
+    múltiplo de `stride` (rect, lo que usa Ultralytics al predecir con un
+    modelo de forma dinámica). Devuelve (imagen, ganancia, (pad_x, pad_y)).
+    """
+    h, w = image.shape[:2]
+    gain = min(size / h, size / w)
+    new_w, new_h = int(round(w * gain)), int(round(h * gain))
+    pad_w, pad_h = size - new_w, size - new_h
+    if auto:
+        pad_w, pad_h = pad_w % stride, pad_h % stride
+    pad_x, pad_y = pad_w / 2.0, pad_h / 2.0
+    if (new_w, new_h) != (w, h):
+        image = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    top, bottom = int(round(pad_y - 0.1)), int(round(pad_y + 0.1))
+    left, right = int(round(pad_x - 0.1)), int(round(pad_x + 0.1))
+    out = cv2.copyMakeBorder(image, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(color, color, color))
+    return out, gain, (float(left), float(top))
+
+
+def preprocess(
+    images: Sequence[np.ndarray], imgsz: int, auto: bool = False, stride: int = 32
+) -> tuple[np.ndarray, list]:
+    """
+    Lote NCHW float32 en [0, 1] (letterbox, BGR -> RGB) y (ganancia, pad, shape)
+    por imagen. Como en Ultralytics, el relleno rect (`auto`) solo se usa si
+    todas las imágenes del lote tienen la misma forma; si no, va cuadrado.
+    """
+    auto = auto and len({img.shape for img in images}) == 1
+    boxed = [letterbox(img, imgsz, auto=auto, stride=stride) for img in images]
+    h, w = boxed[0][0].shape[:2]
+    batch = np.empty((len(images), 3, h, w), dtype=np.float32)
+    metas = []
+    for i, (img, (out, gain, pad)) in enumerate(zip(images, boxed)):
+        batch[i] = out[:, :, ::-1].transpose(2, 0, 1) / np.float32(255.0)
+        metas.append((gain, pad, img.shape[:2]))
+    return batch, metas
+
+
+_MAX_WH = 7680  # desplazamiento por clase para el NMS (mismo truco que Ultralytics)
+
+
+def nms(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """NMS greedy en NumPy; devuelve los índices conservados por score descendente."""
+    order = np.argsort(-scores, kind="stable")
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        iou = iou_matrix(boxes[i : i + 1], boxes[rest])[0]
+        order = rest[iou <= iou_threshold]
+    return np.asarray(keep, dtype=np.int64)
+
+
+def postprocess(
+    pred: np.ndarray,
+    gain: float,
+    pad: tuple[float, float],
+    shape: tuple[int, int],
+    conf: float,
+    iou: float,
+    max_det: int,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Salida cruda de una imagen (4 + nc, N: cx, cy, w, h, scores por clase) ->
+    (xyxy N x 4, conf, class_id) en píxeles de la imagen de entrada (`shape`):
+    umbral de confianza, NMS por clase y deshacer el letterbox.
+    """
+    pred = pred.T  # (N, 4 + nc)
+    scores_all = pred[:, 4:]
+    cls = scores_all.argmax(axis=1)
+    scores = scores_all[np.arange(len(cls)), cls]
+    keep = scores > conf
+    if not np.any(keep):
+        return np.zeros((0, 4), np.float32), np.zeros(0, np.float32), np.zeros(0, np.int64)
+    pred, cls, scores = pred[keep], cls[keep], scores[keep]
+
+    cx, cy, w, h = pred[:, 0], pred[:, 1], pred[:, 2], pred[:, 3]
+    boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+    idx = nms(boxes + (cls * _MAX_WH)[:, None], scores, iou)[:max_det]
+    boxes, scores, cls = boxes[idx], scores[idx], cls[idx]
+
+    boxes[:, [0, 2]] = ((boxes[:, [0, 2]] - pad[0]) / gain).clip(0, shape[1])
+    boxes[:, [1, 3]] = ((boxes[:, [1, 3]] - pad[1]) / gain).clip(0, shape[0])
+    return boxes.astype(np.float32), scores.astype(np.float32), cls
+
+
+class OnnxYolo:
+    """
+    Inferencia YOLO (detección) con ONNX Runtime en CPU.
+
+    Preprocesado: letterbox a imgsz (rect si el export es dinámico), BGR -> RGB,
+    [0, 1], NCHW. Salida del modelo exportado por Ultralytics: (B, 4 + nc, N)
+    con cx, cy, w, h y scores por clase. Postprocesado: umbral de confianza,
+    NMS por clase y cajas de vuelta a la imagen de entrada.
+    """
+
+    def __init__(
+        self,
+        onnx_path: Path | str,
+        conf: float = 0.25,
+        iou: float = 0.7,
+        max_det: int = 300,
+        threads: int = 0,
+    ) -> None:
+        import onnxruntime as ort
+
+        self.onnx_path = Path(onnx_path)
+        self.conf = conf
+        self.iou = iou
+        self.max_det = max_det
+        opts = ort.SessionOptions()
+        if threads > 0:
+            opts.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(str(self.onnx_path), sess_options=opts, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        meta = self.session.get_modelmeta().custom_metadata_map
+        names = ast.literal_eval(meta["names"]) if "names" in meta else {}
+        self.names = {int(k): str(v) for k, v in names.items()}
+        self.stride = int(ast.literal_eval(meta["stride"])) if "stride" in meta else 32
+        # Export dinámico (alto/ancho simbólicos): relleno rect como Ultralytics; si no, cuadrado
+        self.dynamic = not all(isinstance(d, int) for d in self.session.get_inputs()[0].shape[2:])
+
+    def predict(self, images: Sequence[np.ndarray], imgsz: int) -> list[tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """Por imagen: (xyxy float32 N x 4, conf float32, class_id int) en píxeles de la imagen de entrada."""
+        if not images:
+            return []
+        batch, metas = preprocess(images, imgsz, auto=self.dynamic, stride=self.stride)
+        preds = self.session.run(None, {self.input_name: batch})[0]
+        return [
+            postprocess(preds[i], *metas[i], conf=self.conf, iou=self.iou, max_det=self.max_det)
+            for i in range(len(images))
+        ]
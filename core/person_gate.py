@@ -2,25 +2,13 @@ from __future__ import annotations
 
 from typing import Iterable
 
+import numpy as np
 
-def _bbox_inside(bbox: list[float], box: list[float]) -> bool:
-    x1, y1, x2, y2 = bbox
-    ax1, ay1, ax2, ay2 = box
-    return x1 >= ax1 and y1 >= ay1 and x2 <= ax2 and y2 <= ay2
-
-
-def _bbox_intersects(a: list[float], b: list[float]) -> bool:
-    ax1, ay1, ax2, ay2 = a
-    bx1, by1, bx2, by2 = b
-    inter_x1 = max(ax1, bx1)
-    inter_y1 = max(ay1, by1)
-    inter_x2 = min(ax2, bx2)
-    inter_y2 = min(ay2, by2)
-    return inter_x2 > inter_x1 and inter_y2 > inter_y1
+from .detections import Detections, as_detections
 
 
 def person_near_border(
-    detections: Iterable[dict],
+    detections: Detections | Iterable[dict],
     inner_xyxy: list[float],
     outer_xyxy: list[float],
     conf_min: float = 0.25,
@@ -30,24 +18,23 @@ def person_near_border(
     Retorna (is_near, person_boxes). "Near" si:
       - el bbox intersecta el outer, y
       - NO está completamente dentro del inner, o si está dentro pero su borde está a <= dist_px del inner.
+    person_boxes llega hasta la primera persona "near" (mismo orden que las detecciones).
     """
-    persons: list[list[float]] = []
+    dets = as_detections(detections)
+    persons_d = dets[dets.class_mask(("persona",)) & dets.conf_at_least(conf_min)]
+    b = persons_d.xyxy.astype(np.float64)
+    persons: list[list[float]] = b.tolist()
+    if not persons:
+        return False, persons
+
+    x1, y1, x2, y2 = b[:, 0], b[:, 1], b[:, 2], b[:, 3]
     ix1, iy1, ix2, iy2 = inner_xyxy
-    for det in detections:
-        if det.get("class_name") != "persona":
-            continue
-        if det.get("conf", 0.0) < conf_min:
-            continue
-        bbox = list(det.get("bbox_xyxy", [0, 0, 0, 0]))
-        persons.append(bbox)
-        if not _bbox_intersects(bbox, outer_xyxy):
-            continue
-        if not _bbox_inside(bbox, inner_xyxy):
-            return True, persons
-        # Bbox dentro del inner: evaluar distancia del borde del bbox al borde interno
-        x1, y1, x2, y2 = bbox
-        dist_edge = min(x1 - ix1, ix2 - x2, y1 - iy1, iy2 - y2)
-        if dist_edge <= dist_px:
-            return True, persons
-
+    ox1, oy1, ox2, oy2 = outer_xyxy
+    intersects = (np.minimum(x2, ox2) > np.maximum(x1, ox1)) & (np.minimum(y2, oy2) > np.maximum(y1, oy1))
+    inside = (x1 >= ix1) & (y1 >= iy1) & (x2 <= ix2) & (y2 <= iy2)
+    # Bbox dentro del inner: distancia del borde del bbox al borde interno
+    dist_edge = np.minimum(np.minimum(x1 - ix1, ix2 - x2), np.minimum(y1 - iy1, iy2 - y2))
+    near = np.flatnonzero(intersects & (~inside | (dist_edge <= dist_px)))
+    if len(near):
+        return True, persons[: near[0] + 1]
     return False, persons
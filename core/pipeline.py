@@ -0,0 +1,460 @@
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+import queue
+import threading
+
+import cv2
+
+from .adaptive_sampler import AdaptiveSampler, module_activity
+from .area_zones import make_inner_outer
+from .counting_session import CountingSession
+from .detections import Detections, as_detections
+from .detector_yolo import DetectorYolo
+from .motion_gate import MotionGate
+from .roi_planner import RoiPlanner
+from .run_outputs import RunOutputs
+from .visualizer import Visualizer
+
+
+def detach_frame(frame):
+    # Copia propia de la imagen: los frames del anillo shm son vistas de un slot que se recicla
+    return replace(frame, image=frame.image.copy())
+
+
+def _border_overlay(session: CountingSession) -> tuple | None:
+    # Área del módulo border para dibujar, tomada al contar (el render puede ir en otro hilo)
+    border_mod = session.modules.get("border")
+    if border_mod is None or border_mod.selector.selected is None:
+        return None
+    return border_mod.selector.selected, border_mod.cfg.shrink, border_mod.cfg.expand
+
+
+def render_frame(
+    cfg,
+    viz: Visualizer,
+    frame,
+    detections,
+    overlay: tuple | None,
+    count: int,
+    module_counts: dict,
+    in_place: bool = False,
+):
+    # Con decodificación reducida se dibuja sobre la imagen reducida: las
+    # coordenadas (en píxeles originales) se llevan a la escala de la imagen.
+    # in_place: el buffer del frame es nuestro (pool) y se dibuja sin copiarlo.
+    inv = 1.0 / frame.scale
+
+    # Draw overlays
+    if cfg.draw_detections:
+        draw_dets = as_detections(detections).select(cfg.draw_classes or None, cfg.draw_conf_min)
+        if inv != 1.0:
+            draw_dets = draw_dets.scaled(inv)
+        out_img = viz.draw(frame.image, draw_dets, copy=not in_place)
+    else:
+        out_img = frame.image if in_place else frame.image.copy()
+
+    if cfg.show_zones and overlay is not None:
+        area, shrink, expand = overlay
+        zones = make_inner_outer(
+            area.bbox_xyxy,
+            image_size=(frame.width, frame.height),
+            shrink_px=shrink,
+            expand_px=expand,
+        )
+        inner = [v * inv for v in zones.inner_xyxy]
+        outer = [v * inv for v in zones.outer_xyxy]
+        out_img = viz.draw_zones(out_img, inner, outer, copy=False)
+        if cfg.show_area:
+            out_img = viz.draw_area(out_img, [v * inv for v in area.bbox_xyxy], label=area.class_name, copy=False)
+
+    if cfg.show_count:
+        y = 30
+        cv2.putText(
+            out_img,
+            f"count: {count}",
+            (10, y),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.7,
+            (255, 255, 255),
+            2,
+            cv2.LINE_AA,
+        )
+        for name in ("border", "signals", "interaction"):
+            if name in module_counts:
+                y += 25
+                cv2.putText(
+                    out_img,
+                    f"{name}: {module_counts[name]}",
+                    (10, y),
+                    cv2.FONT_HERSHEY_SIMPLEX,
+                    0.6,
+                    (200, 200, 200),
+                    2,
+                    cv2.LINE_AA,
+                )
+    return out_img
+
+
+def _motion_roi(session: CountingSession, frame) -> list[float] | None:
+    # Outer del primer módulo con área fijada; sin área se mide el frame completo
+    for module in session.modules.values():
+        area = module.selector.selected
+        if module.selector.locked and area is not None:
+            zones = make_inner_outer(
+                area.bbox_xyxy,
+                image_size=(frame.width, frame.height),
+                shrink_px=module.cfg.shrink,
+                expand_px=module.cfg.expand,
+            )
+            return zones.outer_xyxy
+    return None
+
+
+def _detect(detector: DetectorYolo, frame, roi: list[float] | None = None) -> Detections:
+    result = detector.detect(
+        frame.image,
+        frame_index=frame.index,
+        image_path=str(frame.path),
+        scale=frame.scale,
+        roi=roi,
+    )
+    return result["detections"]
+
+
+class RenderWorker:
+    """
+    Hilo de dibujo + codificación: recibe los frames ya contados, en orden, y
+    los escribe en el video mientras el hilo principal sigue con la inferencia.
+    """
+
+    def __init__(
+        self,
+        cfg,
+        viz: Visualizer,
+        outputs: RunOutputs,
+        release,
+        queue_size: int,
+        in_place: bool = False,
+    ) -> None:
+        self.cfg = cfg
+        self.viz = viz
+        self.in_place = in_place
+        self.outputs = outputs
+        self.release = release
+        self.queue: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+        self.queue_full = 0
+        self.error: BaseException | None = None
+        self.thread = threading.Thread(target=self._run, name="render", daemon=True)
+        self.thread.start()
+
+    def submit(self, job: tuple) -> None:
+        if self.error is not None:
+            raise self.error
+        if self.queue.full():
+            self.queue_full += 1
+        self.queue.put(job)
+
+    def _run(self) -> None:
+        while True:
+            job = self.queue.get()
+            if job is None:
+                return
+            frame, detections, overlay, count, module_counts = job
+            # Tras un error se siguen consumiendo trabajos (y liberando frames) para no bloquear al productor
+            if self.error is None:
+                try:
+                    out_img = render_frame(
+                        self.cfg, self.viz, frame, detections, overlay, count, module_counts,
+                        in_place=self.in_place,
+                    )
+                    self.outputs.write_image(out_img)
+                except BaseException as e:  # se re-lanza en el hilo principal
+                    self.error = e
+            self.release(frame)
+            self.queue.task_done()
+
+    def wait(self) -> None:
+        # Hasta que todos los frames enviados estén escritos en el video
+        self.queue.join()
+        if self.error is not None:
+            raise self.error
+
+    def close(self) -> None:
+        self.queue.put(None)
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+
+
+class PipelineRunner:
+    """
+    Encadena por frame: stride adaptativo, compuerta de movimiento, inferencia
+    (por lotes si batch_size > 1), conteo, logs y video.
+
+    Con `depth` > 0 la inferencia corre en un hilo aparte con hasta `depth` lotes
+    adelantados al conteo; con `render_queue` > 0 dibujo y codificación van en
+    otro hilo. El conteo sigue en el hilo principal y en orden de frame, y las
+    decisiones que leen su estado (ROI, compuerta) se toman siempre con el conteo
+    cerrado hasta `depth` lotes atrás: la salida es determinista.
+    """
+
+    def __init__(
+        self,
+        cfg,
+        session: CountingSession,
+        outputs: RunOutputs,
+        viz: Visualizer,
+        detector: DetectorYolo,
+        sampler: AdaptiveSampler | None = None,
+        gate: MotionGate | None = None,
+        roi: RoiPlanner | None = None,
+        release=None,
+        detach=None,
+        depth: int = 0,
+        render_queue: int = 0,
+        auto_flush: bool = True,
+        in_place: bool = False,
+    ) -> None:
+        self.cfg = cfg
+        self.session = session
+        self.outputs = outputs
+        self.viz = viz
+        self.detector = detector
+        self.sampler = sampler
+        self.gate = gate
+        self.roi = roi
+        self.batch_size = max(1, cfg.batch_size)
+        self.release = release or (lambda frame: None)
+        self.in_place = in_place
+        # El stride adaptativo decide con el conteo al día: sin inferencia adelantada
+        self.depth = 0 if sampler is not None else max(0, depth)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="infer") if self.depth > 0 else None
+        self._pending: deque = deque()
+        self.renderer = (
+            RenderWorker(cfg, viz, outputs, self.release, render_queue, in_place=in_place)
+            if render_queue > 0 and cfg.save_video
+            else None
+        )
+        # Fuentes con vistas temporales (anillo shm) se copian si el frame queda retenido
+        # (sin auto_flush el lote espera al coordinador aunque batch_size sea 1)
+        retains = (
+            self.batch_size > 1 or not auto_flush or self._executor is not None or self.renderer is not None
+        )
+        self.detach = detach if retains else None
+        self.last_detections: Detections = Detections.empty()
+        self.infer_waits = 0
+        # Sin auto_flush el lote lo arma y lo infiere un coordinador externo (modo dos cámaras)
+        self.auto_flush = auto_flush
+        # (frame, extra, inferir)
+        self._batch: list[tuple] = []
+
+    def feed(self, frame) -> None:
+        if self.sampler is not None and not self.sampler.admit(frame):
+            return
+
+        reuse = False
+        if self.gate is not None:
+            roi = _motion_roi(self.session, frame) if self.cfg.motion_roi else None
+            reuse = self.gate.static(frame.image, roi, roi_scale=frame.scale)
+        if self.detach is not None:
+            frame = self.detach(frame)
+        self._batch.append((frame, {"reused": True} if reuse else None, not reuse))
+        if self.auto_flush and len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def take_batch(self) -> tuple[list[tuple], list, list]:
+        """Vacía el lote pendiente: (lote, frames a inferir, ROI de cada uno)."""
+        batch, self._batch = self._batch, []
+        to_infer = [frame for frame, _, infer in batch if infer]
+        return batch, to_infer, [self._plan_roi(f) for f in to_infer]
+
+    def flush(self) -> None:
+        # Con lotes, las decisiones del sampler y la ROI de movimiento usan el
+        # estado de conteo del lote anterior.
+        batch, to_infer, rois = self.take_batch()
+        if not batch:
+            return
+        if self._executor is None:
+            self.consume(batch, self._infer(to_infer, rois))
+            return
+        self._pending.append((batch, self._executor.submit(self._infer, to_infer, rois)))
+        while len(self._pending) > self.depth:
+            self._consume_pending()
+
+    def _consume_pending(self) -> None:
+        batch, future = self._pending.popleft()
+        if not future.done():
+            self.infer_waits += 1
+        self.consume(batch, future.result())
+
+    def _infer(self, to_infer: list, rois: list) -> list[dict]:
+        if len(to_infer) > 1:
+            return self.detector.detect_batch(
+                [f.image for f in to_infer],
+                frame_indices=[f.index for f in to_infer],
+                paths=[str(f.path) for f in to_infer],
+                scales=[f.scale for f in to_infer],
+                rois=rois,
+            )
+        return [self.detector.detect(
+            f.image,
+            frame_index=f.index,
+            image_path=str(f.path),
+            scale=f.scale,
+            roi=roi,
+        ) for f, roi in zip(to_infer, rois)]
+
+    def pending(self) -> int:
+        return len(self._batch)
+
+    def consume(self, batch: list[tuple], results: list[dict]) -> None:
+        inferred = iter(results)
+        for frame, extra, infer in batch:
+            detections = next(inferred)["detections"] if infer else self.last_detections
+
+            if self.sampler is not None:
+                image_size = (frame.width, frame.height)
+                active = any(module_activity(m, detections, image_size) for m in self.session.modules.values())
+                for held, backfill in self.sampler.release(active, before=frame.index):
+                    if backfill:
+                        self._handle(held, _detect(self.detector, held, self._plan_roi(held)))
+                    else:
+                        self._handle_skipped(held)
+
+            self._handle(frame, detections, extra)
+            self.last_detections = detections
+
+    def finish(self) -> None:
+        self.flush()
+        while self._pending:
+            self._consume_pending()
+        if self.sampler is not None:
+            for held, _ in self.sampler.flush():
+                self._handle_skipped(held)
+
+    def drain(self) -> bool:
+        """
+        Vacía lote, inferencia adelantada y cola de render (antes de un checkpoint).
+        False, sin tocar nada, si el stride adaptativo aún retiene frames.
+        """
+        if self.sampler is not None and self.sampler.holding:
+            return False
+        self.flush()
+        while self._pending:
+            self._consume_pending()
+        if self.renderer is not None:
+            self.renderer.wait()
+        return True
+
+    def close(self) -> None:
+        # Siempre (también tras Ctrl+C): detener hilos antes de cerrar el video
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+        if self.renderer is not None:
+            self.renderer.close()
+
+    def stats(self) -> dict:
+        return {
+            "inference_depth": self.depth,
+            "infer_waits": self.infer_waits,
+            "render_queue_full": self.renderer.queue_full if self.renderer is not None else None,
+        }
+
+    def _plan_roi(self, frame) -> list[float] | None:
+        return self.roi.plan(self.session, frame) if self.roi is not None else None
+
+    def _emit(self, frame, detections, count: int) -> None:
+        # Dibujo + escritura del frame (en el hilo de render si existe) y liberación del buffer
+        if not self.cfg.save_video:
+            self.release(frame)
+            return
+        job = (frame, detections, _border_overlay(self.session), count, dict(self.session.module_counts))
+        if self.renderer is not None:
+            self.renderer.submit(job)
+            return
+        out_img = render_frame(self.cfg, self.viz, *job, in_place=self.in_place)
+        self.outputs.write_image(out_img)
+        self.release(frame)
+
+    def _handle(self, frame, detections, extra: dict | None = None) -> None:
+        session = self.session
+        if self.roi is not None:
+            # Frames de refresco (completos): revalidar el área antes de contar
+            self.roi.validate(session, frame, detections)
+        step = session.update(detections, frame_index=frame.index, image_size=(frame.width, frame.height))
+        border_mod = session.modules.get("border")
+        if self.cfg.log_tracker and border_mod is not None:
+            extra = {**(extra or {}), "tracker": border_mod.tracker.stats.frame_dict()}
+        self.outputs.log_step(frame, step, len(detections), extra)
+        self._emit(frame, detections, step.count)
+
+    def _handle_skipped(self, frame) -> None:
+        # Frame sin inferencia: los módulos no se actualizan; el video repite las últimas detecciones
+        self.outputs.log_frame(frame, self.session.count, 0, {"skipped": True})
+        self._emit(frame, self.last_detections, self.session.count)
+
+
+def interleave(loaders: dict, limit: int | None = None):
+    # Round-robin entre cámaras; al agotarse (o llegar a `limit`) una, siguen las demás
+    iters = {cam: iter(loader) for cam, loader in loaders.items()}
+    counts = dict.fromkeys(iters, 0)
+    while iters:
+        for cam in list(iters):
+            frame = next(iters[cam], None)
+            if frame is None or (limit is not None and counts[cam] >= limit):
+                del iters[cam]
+                continue
+            counts[cam] += 1
+            yield cam, frame
+
+
+class MultiCameraRunner:
+    """
+    Un solo detector para varias cámaras: arma cada lote con los frames
+    pendientes de todas y reparte los resultados a los PipelineRunner de cada cámara
+    (sesión de conteo, logs y video propios).
+    """
+
+    def __init__(self, runners: dict[str, PipelineRunner], detector, batch_size: int) -> None:
+        self.runners = runners
+        self.detector = detector
+        self.batch_size = max(batch_size, len(runners))
+        self.batches = 0
+        self.inferred = 0
+
+    def feed(self, cam: str, frame) -> None:
+        self.runners[cam].feed(frame)
+        if sum(r.pending() for r in self.runners.values()) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        parts = [runner.take_batch() for runner in self.runners.values()]
+        to_infer = [f for _, frames, _ in parts for f in frames]
+        rois = [roi for _, _, part_rois in parts for roi in part_rois]
+        results = []
+        if to_infer:
+            results = self.detector.detect_batch(
+                [f.image for f in to_infer],
+                frame_indices=[f.index for f in to_infer],
+                paths=[str(f.path) for f in to_infer],
+                scales=[f.scale for f in to_infer],
+                rois=rois,
+            )
+            self.batches += 1
+            self.inferred += len(to_infer)
+        pos = 0
+        for runner, (batch, frames, _) in zip(self.runners.values(), parts):
+            runner.consume(batch, results[pos:pos + len(frames)])
+            pos += len(frames)
+
+    def finish(self) -> None:
+        self.flush()
+        for runner in self.runners.values():
+            runner.finish()
+
+    def close(self) -> None:
+        for runner in self.runners.values():
+            runner.close()
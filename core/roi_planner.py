@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from typing import Any
+
+import numpy as np
+
+from .area_zones import make_inner_outer
+from .box_ops import iou_matrix
+from .detections import Detections, as_detections
+
+
+@dataclass
+class RoiStats:
+    frames: int = 0
+    roi: int = 0
+    full: int = 0
+    refreshes: int = 0
+    validated: int = 0
+    resets: int = 0
+    roi_area_ratio_sum: float = 0.0
+
+    def as_dict(self) -> dict:
+        d = asdict(self)
+        d.pop("roi_area_ratio_sum")
+        d["mean_roi_area_ratio"] = self.roi_area_ratio_sum / self.roi if self.roi else 0.0
+        return d
+
+
+class RoiPlanner:
+    """
+    Decide la región de inferencia de cada frame una vez fijada el área.
+
+    La ROI es la unión de las zonas outer de los módulos con área fijada más
+    `margin` px (para ver a las personas que se acercan), en píxeles originales.
+    Cada `refresh_interval` frames inferidos se infiere el frame completo (se
+    cuentan las llamadas a plan, no el índice: con stride, compuerta de
+    movimiento o step el índice puede no caer nunca en un múltiplo); con
+    `revalidate`, si el área fijada no aparece en `reset_after` refrescos
+    seguidos se reinician los AreaSelector para que vuelvan a elegirla.
+    """
+
+    def __init__(
+        self,
+        margin: int = 96,
+        refresh_interval: int = 100,
+        revalidate: bool = True,
+        min_iou: float = 0.5,
+        reset_after: int = 2,
+    ) -> None:
+        self.margin = margin
+        self.refresh_interval = max(1, refresh_interval)
+        self.revalidate = revalidate
+        self.min_iou = min_iou
+        self.reset_after = max(1, reset_after)
+        self.stats = RoiStats()
+        self._misses: dict[str, int] = {}
+        self._refresh_frames: set[int] = set()
+        self._since_full = 0
+
+    def state_dict(self) -> dict:
+        return {
+            "misses": dict(self._misses),
+            "refresh_frames": sorted(self._refresh_frames),
+            "since_full": self._since_full,
+            "stats": asdict(self.stats),
+        }
+
+    def load_state(self, state: dict) -> None:
+        self._misses = dict(state["misses"])
+        self._refresh_frames = set(state["refresh_frames"])
+        self._since_full = state["since_full"]
+        self.stats = RoiStats(**state["stats"])
+
+    def plan(self, session: Any, frame) -> list[float] | None:
+        """ROI (x1, y1, x2, y2) en píxeles originales, o None para el frame completo."""
+        self.stats.frames += 1
+        w, h = frame.width, frame.height
+        boxes = []
+        for module in session.modules.values():
+            area = module.selector.selected
+            if not module.selector.locked or area is None:
+                # Algún módulo aún elige su área: necesita el frame completo
+                boxes = []
+                break
+            zones = make_inner_outer(
+                area.bbox_xyxy,
+                image_size=(w, h),
+                shrink_px=module.cfg.shrink,
+                expand_px=module.cfg.expand,
+            )
+            boxes.append(zones.outer_xyxy)
+
+        if not boxes:
+            self.stats.full += 1
+            self._since_full = 0
+            return None
+        self._since_full += 1
+        if self._since_full >= self.refresh_interval:
+            self.stats.full += 1
+            self.stats.refreshes += 1
+            self._since_full = 0
+            self._refresh_frames.add(frame.index)
+            return None
+
+        b = np.asarray(boxes, dtype=np.float64)
+        x1 = max(0.0, float(b[:, 0].min()) - self.margin)
+        y1 = max(0.0, float(b[:, 1].min()) - self.margin)
+        x2 = min(float(w), float(b[:, 2].max()) + self.margin)
+        y2 = min(float(h), float(b[:, 3].max()) + self.margin)
+        self.stats.roi += 1
+        self.stats.roi_area_ratio_sum += (x2 - x1) * (y2 - y1) / float(w * h)
+        return [x1, y1, x2, y2]
+
+    def validate(self, session: Any, frame, detections: Detections | list[dict]) -> None:
+        """
+        Tras un frame de refresco: verifica que cada área fijada siga
+        detectándose (IoU >= min_iou) y reinicia el selector si no.
+        """
+        if frame.index not in self._refresh_frames:
+            return
+        self._refresh_frames.discard(frame.index)
+        if not self.revalidate:
+            return
+        dets = as_detections(detections)
+        for name, module in session.modules.items():
+            selector = module.selector
+            area = selector.selected
+            if not selector.locked or area is None:
+                continue
+            cands = dets[dets.class_mask(selector.target_classes) & dets.conf_at_least(selector.conf_min)]
+            iou = iou_matrix([area.bbox_xyxy], cands.xyxy)[0]
+            if len(iou) and float(iou.max()) >= self.min_iou:
+                self._misses[name] = 0
+                self.stats.validated += 1
+                continue
+            self._misses[name] = self._misses.get(name, 0) + 1
+            if self._misses[name] >= self.reset_after:
+                print(f"[WARN] Area of module '{name}' not found in {self._misses[name]} refreshes, re-selecting")
+                selector.reset()
+                self._misses[name] = 0
+                self.stats.resets += 1
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import cv2
+
+from .video_writer import open_video_writer, reencode_mp4_ffmpeg
+
+
+class RunOutputs:
+    """
+    Archivos de salida de una corrida: events/frames jsonl y video anotado.
+
+    Con checkpoints el video se corta en segmentos (<nombre>, <nombre>_part002,
+    ...) para que lo escrito hasta el checkpoint quede cerrado en disco. `resume`
+    (de state()) trunca los logs al offset guardado y sigue agregando.
+    """
+
+    def __init__(self, cfg, events_path: Path, frames_path: Path, out_video: Path, resume: dict | None = None) -> None:
+        self.cfg = cfg
+        self.out_video = out_video
+        self.segments: list[Path] = list(resume["segments"]) if resume else []
+        self.f_events = (
+            self._open_log(events_path, resume["events_offset"] if resume else None) if cfg.save_events else None
+        )
+        self.f_frames = (
+            self._open_log(frames_path, resume["frames_offset"] if resume else None) if cfg.save_frames else None
+        )
+        self.writer = None
+        self.writer_path = None
+        self.target_size = None
+        self._resize_buf = None
+
+    @staticmethod
+    def _open_log(path: Path, offset: int | None):
+        if offset is None:
+            return path.open("w", encoding="utf-8")
+        # Lo escrito después del checkpoint se vuelve a generar al reanudar
+        with path.open("r+b") as f:
+            f.truncate(offset)
+        return path.open("a", encoding="utf-8")
+
+    def state(self) -> dict:
+        """Offsets de los logs (ya volcados a disco) y segmentos de video cerrados."""
+        self.flush()
+        return {
+            "out_video": self.out_video,
+            "segments": list(self.segments),
+            "events_offset": self.f_events.tell() if self.f_events is not None else None,
+            "frames_offset": self.f_frames.tell() if self.f_frames is not None else None,
+        }
+
+    def log_step(self, frame, step, num_detections: int, extra: dict | None = None) -> None:
+        if self.f_events is not None:
+            for name, out in step.outputs.items():
+                for ev in out.events:
+                    ev_data = ev.__dict__.copy()
+                    ev_data["module"] = name
+                    ev_data["count_before"] = out.count_before
+                    ev_data["count_after"] = out.count_after
+                    ev_data["person_near"] = out.person_near
+                    ev_data["area_class"] = out.area.class_name if out.area else None
+                    self.f_events.write(json.dumps(ev_data) + "\n")
+
+            vote_event = step.vote_event
+            if vote_event is not None:
+                self.f_events.write(
+                    json.dumps(
+                        {
+                            "module": "vote",
+                            "event_type": vote_event.event_type,
+                            "frame_index": vote_event.frame_index,
+                            "score": vote_event.score,
+                            "reason": vote_event.reason,
+                            "count_after": step.count,
+                        }
+                    )
+                    + "\n"
+                )
+        self.log_frame(frame, step.count, num_detections, extra)
+
+    def log_frame(self, frame, count: int, num_detections: int, extra: dict | None = None) -> None:
+        if self.f_frames is None:
+            return
+        rec = {
+            "frame_index": frame.index,
+            "image_path": str(frame.path),
+            "count": count,
+            "num_detections": num_detections,
+        }
+        if extra:
+            rec.update(extra)
+        self.f_frames.write(json.dumps(rec) + "\n")
+
+    def write_image(self, out_img) -> None:
+        if self.writer is None:
+            h, w = out_img.shape[:2]
+            self.target_size = (w - (w % 2), h - (h % 2))
+            self.writer, self.writer_path = open_video_writer(
+                self._segment_path(), self.cfg.fps, self.target_size, container=self.cfg.video_container
+            )
+        if out_img.shape[1] != self.target_size[0] or out_img.shape[0] != self.target_size[1]:
+            self._resize_buf = cv2.resize(out_img, self.target_size, dst=self._resize_buf)
+            out_img = self._resize_buf
+        self.writer.write(out_img)
+
+    def flush(self) -> None:
+        if self.f_events is not None:
+            self.f_events.flush()
+        if self.f_frames is not None:
+            self.f_frames.flush()
+
+    def close_logs(self) -> None:
+        if self.f_events is not None:
+            self.f_events.close()
+        if self.f_frames is not None:
+            self.f_frames.close()
+
+    def _segment_path(self) -> Path:
+        n = len(self.segments) + 1
+        if n == 1:
+            return self.out_video
+        return self.out_video.with_name(f"{self.out_video.stem}_part{n:03d}{self.out_video.suffix}")
+
+    def rotate_video(self) -> None:
+        """Cierra el segmento actual; el próximo frame abre uno nuevo."""
+        if self.writer is None:
+            return
+        self.writer.release()
+        self.writer = None
+        if self.writer_path is not None:
+            self.segments.append(self.writer_path)
+
+    def close_video(self, reencode: bool = True) -> Path | None:
+        """
+        Cierra el video y devuelve el último segmento (re-codificados si ffmpeg_reencode).
+        Con reencode=False (corrida interrumpida) quedan tal cual para reanudar.
+        """
+        self.rotate_video()
+        if not self.segments:
+            return None
+        if reencode and self.cfg.ffmpeg_reencode:
+            self.segments = [reencode_mp4_ffmpeg(p) for p in self.segments]
+        return self.segments[-1]
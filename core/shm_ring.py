@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from pathlib import Path
+import queue
+import sys
+from typing import Iterable, Iterator
+
+import cv2
+import numpy as np
+
+from .frame_loader import FrameData, FrameLoader
+
+
+@dataclass
+class RingStats:
+    frames: int = 0
+    slots: int = 0
+    consumer_waits: int = 0  # anillo vacío: el decoder es el cuello de botella
+    producer_waits: int = 0  # anillo lleno: la inferencia es el cuello de botella
+    occupancy_sum: int = 0
+    oversized: int = 0  # frames más grandes que un slot (enviados por pickle)
+
+    @property
+    def mean_occupancy(self) -> float:
+        return self.occupancy_sum / self.frames if self.frames else 0.0
+
+    def as_dict(self) -> dict:
+        d = asdict(self)
+        d.pop("occupancy_sum")
+        d["mean_occupancy"] = self.mean_occupancy
+        d["mean_occupancy_ratio"] = self.mean_occupancy / self.slots if self.slots else 0.0
+        return d
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    # El hijo comparte el resource_tracker del padre: adjuntar (re)registra el mismo
+    # nombre y el padre lo desregistra al liberarlo. Desde 3.13 ni se registra.
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+def _decoder_main(paths, first, flags, shm_names, slot_bytes, free_q, ready_q, produced, producer_waits) -> None:
+    shms = [_attach(name) for name in shm_names]
+    bufs = [shm.buf for shm in shms]
+    try:
+        _decode_loop(paths, first, flags, bufs, slot_bytes, free_q, ready_q, produced, producer_waits)
+    finally:
+        del bufs
+        for shm in shms:
+            shm.close()
+        ready_q.put(None)
+
+
+def _decode_loop(paths, first, flags, bufs, slot_bytes, free_q, ready_q, produced, producer_waits) -> None:
+    for idx, path in enumerate(paths[first:], start=first):
+        try:
+            slot = free_q.get_nowait()
+        except queue.Empty:
+            with producer_waits.get_lock():
+                producer_waits.value += 1
+            slot = free_q.get()
+        if slot is None:
+            break
+        img = cv2.imread(path, flags)
+        if img is None:
+            free_q.put(slot)
+            ready_q.put((idx, path, None, None, None))
+        elif img.nbytes > slot_bytes:
+            free_q.put(slot)
+            ready_q.put((idx, path, None, img.shape, img))
+        else:
+            np.ndarray(img.shape, dtype=np.uint8, buffer=bufs[slot])[...] = img
+            ready_q.put((idx, path, slot, img.shape, None))
+        with produced.get_lock():
+            produced.value += 1
+
+
+class SharedFrameRing:
+    """
+    Transporte de frames entre un proceso decodificador y el proceso de conteo.
+
+    El decoder escribe cada imagen en un slot de un anillo fijo de
+    `multiprocessing.shared_memory`; por la cola solo viajan (índice, slot, shape).
+    El consumidor recibe FrameData cuyo `image` es una vista del slot, válida
+    hasta pedir el siguiente frame (usar `.copy()` para retenerla más tiempo).
+
+    El decoder arranca con forkserver/spawn: el script que inicia la corrida
+    debe proteger su código con `if __name__ == "__main__":`, como main.py.
+    """
+
+    def __init__(self, loader: FrameLoader, slots: int = 8, slot_bytes: int | None = None) -> None:
+        self.loader = loader
+        self.slots = max(2, slots)
+        self.slot_bytes = slot_bytes
+        self.stats = RingStats(slots=self.slots)
+
+    def __len__(self) -> int:
+        return len(self.loader)
+
+    def seek(self, index: int) -> None:
+        self.loader.seek(index)
+
+    def _probe_slot_bytes(self, paths: list[Path]) -> int:
+        for p in paths:
+            img = self.loader._decode(p)
+            if img is not None:
+                return int(img.nbytes)
+        return 0
+
+    def __iter__(self) -> Iterator[FrameData]:
+        paths = self.loader.paths()
+        slot_bytes = self.slot_bytes or self._probe_slot_bytes(paths[self.loader.offset :])
+        if slot_bytes <= 0:
+            return
+        self.stats = RingStats(slots=self.slots)
+
+        # Sin fork: el proceso de conteo ya tiene hilos (render, inferencia, runtime del
+        # modelo) y un fork los dejaría a medias en el hijo. El hijo adjunta los
+        # segmentos por nombre.
+        methods = mp.get_all_start_methods()
+        ctx = mp.get_context("forkserver" if "forkserver" in methods else "spawn")
+        shms = [shared_memory.SharedMemory(create=True, size=slot_bytes) for _ in range(self.slots)]
+        free_q = ctx.Queue()
+        ready_q = ctx.Queue(maxsize=self.slots * 2)
+        for i in range(self.slots):
+            free_q.put(i)
+        produced = ctx.Value("l", 0)
+        producer_waits = ctx.Value("l", 0)
+        proc = ctx.Process(
+            target=_decoder_main,
+            args=(
+                [str(p) for p in paths],
+                self.loader.offset,
+                self.loader._flags,
+                [shm.name for shm in shms],
+                slot_bytes,
+                free_q,
+                ready_q,
+                produced,
+                producer_waits,
+            ),
+            daemon=True,
+        )
+        proc.start()
+
+        held_slot: int | None = None
+        consumed = 0
+        try:
+            while True:
+                if held_slot is not None:
+                    free_q.put(held_slot)
+                    held_slot = None
+                try:
+                    item = ready_q.get_nowait()
+                except queue.Empty:
+                    self.stats.consumer_waits += 1
+                    item = ready_q.get()
+                if item is None:
+                    break
+                idx, path, slot, shape, img = item
+                self.stats.frames += 1
+                self.stats.occupancy_sum += max(0, produced.value - consumed)
+                consumed += 1
+                if slot is not None:
+                    img = np.ndarray(shape, dtype=np.uint8, buffer=shms[slot].buf)
+                    held_slot = slot
+                elif img is not None:
+                    self.stats.oversized += 1
+                else:
+                    continue
+                yield self.loader._frame(idx, Path(path), img)
+        finally:
+            self.stats.producer_waits = producer_waits.value
+            free_q.put(None)
+            proc.join(timeout=1.0)
+            if proc.is_alive():
+                proc.terminate()
+                proc.join()
+            for shm in shms:
+                try:
+                    shm.close()
+                except BufferError:
+                    # Aún hay vistas vivas del último frame; el segmento se libera al salir
+                    pass
+                shm.unlink()
+
+    def iter_images(self) -> Iterable["cv2.typing.MatLike"]:
+        for frame in self:
+            yield frame.image
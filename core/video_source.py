@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import cv2
+
+from .frame_loader import FrameData
+
+
+def _parse_source(source: Path | str | int) -> str | int:
+    # "0", "1"... -> índice de dispositivo de captura
+    if isinstance(source, int):
+        return source
+    s = str(source)
+    return int(s) if s.isdigit() else s
+
+
+class VideoFrameSource:
+    """
+    Fuente de frames desde un video (mp4/avi/...) o dispositivo de captura.
+
+    Entrega el mismo stream de FrameData que FrameLoader (índice secuencial tras
+    aplicar start/stop/step); `path` apunta al archivo de video.
+    """
+
+    def __init__(
+        self,
+        source: Path | str | int,
+        start: int = 0,
+        stop: int | None = None,
+        step: int = 1,
+    ) -> None:
+        self.source = _parse_source(source)
+        self.is_device = isinstance(self.source, int)
+        if not self.is_device and not Path(self.source).exists():
+            raise FileNotFoundError(f"Video not found: {self.source}")
+        self.path = Path(f"device:{self.source}") if self.is_device else Path(self.source)
+        self.start = start
+        self.stop = stop
+        self.step = max(1, step)
+        self.offset = 0
+
+        cap = self._open()
+        self.fps = float(cap.get(cv2.CAP_PROP_FPS) or 0.0)
+        self.frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        cap.release()
+
+    def _open(self) -> cv2.VideoCapture:
+        cap = cv2.VideoCapture(self.source)
+        if not cap.isOpened():
+            raise FileNotFoundError(f"Could not open video source: {self.source}")
+        return cap
+
+    def __len__(self) -> int:
+        # Dispositivos (o contenedores sin conteo) reportan 0 frames
+        if self.frame_count <= 0:
+            return 0
+        return len(range(self.frame_count)[self.start : self.stop : self.step])
+
+    def seek(self, index: int) -> None:
+        """
+        La próxima iteración empieza en el frame `index`. En dispositivos no hay
+        frames viejos que saltar: solo continúa la numeración.
+        """
+        self.offset = max(0, index)
+
+    def __iter__(self) -> Iterator[FrameData]:
+        cap = self._open()
+        try:
+            pos = 0
+            first = self.start if self.is_device else self.start + self.offset * self.step
+            if first > 0:
+                if not self.is_device and cap.set(cv2.CAP_PROP_POS_FRAMES, first):
+                    pos = first
+                else:
+                    while pos < first and cap.grab():
+                        pos += 1
+            idx = self.offset
+            while self.stop is None or pos < self.stop:
+                ok, img = cap.read()
+                if not ok or img is None:
+                    break
+                h, w = img.shape[:2]
+                yield FrameData(index=idx, path=self.path, image=img, width=w, height=h)
+                idx += 1
+                pos += 1
+                # grab() avanza sin decodificar los frames saltados
+                for _ in range(self.step - 1):
+                    if not cap.grab():
+                        return
+                    pos += 1
+        finally:
+            cap.release()
+
+    def iter_images(self) -> Iterable["cv2.typing.MatLike"]:
+        for frame in self:
+            yield frame.image
@@ -18,8 +18,8 @@ class Visualizer:
         self.thickness = thickness
         self.font_scale = font_scale
 
-    def draw(self, image, detections: Iterable[dict]) -> "cv2.typing.MatLike":
-        annotated = image.copy()
+    def draw(self, image, detections: Iterable[dict], copy: bool = True) -> "cv2.typing.MatLike":
+        annotated = image.copy() if copy else image
         for det in detections:
             class_id = int(det.get("class_id", -1))
             class_name = det.get("class_name", str(class_id))
@@ -61,8 +61,9 @@ class Visualizer:
         bbox_xyxy: list[float],
         label: str = "area",
         color: tuple[int, int, int] = (0, 255, 255),
+        copy: bool = True,
     ) -> "cv2.typing.MatLike":
-        annotated = image.copy()
+        annotated = image.copy() if copy else image
         x1, y1, x2, y2 = bbox_xyxy
         cv2.rectangle(
             annotated,
@@ -101,8 +102,9 @@ class Visualizer:
         label_outer: str = "outer",
         color_inner: tuple[int, int, int] = (0, 255, 255),
         color_outer: tuple[int, int, int] = (0, 128, 255),
+        copy: bool = True,
     ) -> "cv2.typing.MatLike":
-        annotated = image.copy()
-        annotated = self.draw_area(annotated, outer_xyxy, label=label_outer, color=color_outer)
-        annotated = self.draw_area(annotated, inner_xyxy, label=label_inner, color=color_inner)
+        annotated = image.copy() if copy else image
+        annotated = self.draw_area(annotated, outer_xyxy, label=label_outer, color=color_outer, copy=False)
+        annotated = self.draw_area(annotated, inner_xyxy, label=label_inner, color=color_inner, copy=False)
         return annotated
@@ -4,28 +4,44 @@ Punto de entrada principal del pipeline de conteo.
 from dataclasses import asdict, replace
 from datetime import datetime
 import json
+import os
 from pathlib import Path
 import sys
-
-import cv2
+import time
 
 PROJECT_ROOT = Path(__file__).resolve().parent
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
-from config.settings import MAIN, resolve_path
+from config.settings import (
+    MAIN,
+    BorderCounterConfig,
+    InteractionCounterConfig,
+    SignalsCounterConfig,
+    resolve_path,
+)
 from core import (
-    BorderCounter,
-    BorderCounterModule,
+    AdaptiveSampler,
+    CachedDetector,
+    Checkpointer,
+    CountingSession,
+    DetectionCache,
     DetectorYolo,
+    file_sha256,
+    frame_key,
     FrameLoader,
-    VotingEngine,
-    open_video_writer,
-    reencode_mp4_ffmpeg,
-    SignalsCounterModule,
-    InteractionCounterModule,
+    LabelsDetector,
+    load_checkpoint,
+    SharedFrameRing,
+    VideoFrameSource,
     Visualizer,
-    make_inner_outer,
+    MotionGate,
+    RoiPlanner,
+    RunOutputs,
+    PipelineRunner,
+    MultiCameraRunner,
+    detach_frame,
+    interleave,
 )
 
 
@@ -36,237 +52,717 @@ def _timestamped_name(filename: str) -> str:
     return f"{p.stem}_{ts}{suffix}"
 
 
-def _open_video_writer(out_path: Path, fps: float, size: tuple[int, int], container: str):
-    return open_video_writer(out_path, fps, size, container=container)
-
-
-def main():
-    cfg = MAIN
-    run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
-
+def _resolve_source(cfg) -> Path | str:
+    if cfg.source == "video":
+        if not cfg.video:
+            raise SystemExit("[ERROR] MainConfig.video is required when source='video'")
+        if str(cfg.video).isdigit():
+            return str(cfg.video)
+        video_path = resolve_path(cfg.video)
+        if not video_path.exists():
+            raise SystemExit(f"[ERROR] Video not found: {video_path}")
+        return video_path
+    if cfg.source != "frames":
+        raise SystemExit(f"[ERROR] Unknown source: {cfg.source}")
     frames_dir = resolve_path(cfg.frames_dir)
     if not frames_dir.exists():
         raise SystemExit(f"[ERROR] Frames folder not found: {frames_dir}")
-
+    return frames_dir
+
+
+def _open_source(cfg, source: Path | str):
+    if cfg.source == "video":
+        return VideoFrameSource(source)
+    # Labels sin video ni compuerta de movimiento: nadie mira los píxeles, basta la cabecera
+    header_only = cfg.detector == "labels" and not cfg.save_video and not cfg.motion_gate
+    loader = FrameLoader(
+        frames_dir=source,
+        recursive=cfg.recursive,
+        prefetch=cfg.prefetch_workers,
+        queue_size=cfg.prefetch_queue,
+        cache_dir=resolve_path(cfg.frame_cache_dir) if cfg.frame_cache and not cfg.follow else None,
+        # Opt-in (también sin video de salida): el decoder reducido da píxeles algo
+        # distintos al resize del letterbox, así que puede mover detecciones en el borde
+        decode_scale=cfg.decode_scale,
+        target_size=cfg.imgsz,
+        follow=cfg.follow,
+        poll_interval=cfg.follow_poll,
+        idle_timeout=cfg.follow_idle_timeout,
+        manifest_dir=resolve_path(cfg.frame_manifest_dir) if cfg.frame_manifest else None,
+        reuse_buffers=cfg.reuse_buffers,
+        header_only=header_only,
+    )
+    if header_only:
+        return loader
+    if cfg.frame_cache and cfg.follow:
+        # El cache se arma con el snapshot inicial: los frames nuevos no estarían
+        print("[WARN] frame_cache is ignored in follow mode")
+    if cfg.reuse_buffers and cfg.frame_cache and not cfg.follow:
+        print("[WARN] reuse_buffers is ignored with frame_cache (cached frames are read-only)")
+    if cfg.decode_process:
+        if cfg.follow or cfg.frame_cache:
+            print("[WARN] decode_process is ignored with follow/frame_cache")
+        else:
+            return SharedFrameRing(loader, slots=cfg.shm_slots)
+    return loader
+
+
+def _check_detector_cfg(cfg) -> Path:
+    if cfg.detector not in ("yolo", "labels"):
+        raise SystemExit(f"[ERROR] Unknown detector: {cfg.detector!r} (expected 'yolo' or 'labels')")
+    if cfg.detector == "yolo" and cfg.backend == "onnx" and cfg.mode == "track":
+        raise SystemExit("[ERROR] backend='onnx' only supports mode='predict'")
+    if cfg.detector == "yolo" and cfg.quantize is not None:
+        if cfg.backend != "onnx":
+            raise SystemExit("[ERROR] quantize requires backend='onnx'")
+        if cfg.quantize not in ("dynamic", "static"):
+            raise SystemExit(f"[ERROR] Unknown quantize: {cfg.quantize!r} (expected 'dynamic' or 'static')")
+    if cfg.detector == "labels" and not cfg.labels_dir:
+        raise SystemExit("[ERROR] MainConfig.labels_dir is required when detector='labels'")
     weights = resolve_path(cfg.model)
-    if not weights.exists():
+    if cfg.detector == "yolo" and not weights.exists():
         raise SystemExit(f"[ERROR] Model not found: {weights}")
+    return weights
+
+
+def load_detector(cfg, weights: Path | None = None) -> DetectorYolo:
+    """Carga el modelo YOLO según cfg (sin caché de detecciones)."""
+    return DetectorYolo(
+        weights=str(weights or resolve_path(cfg.model)),
+        mode=cfg.mode,
+        conf=cfg.conf,
+        imgsz=cfg.imgsz,
+        device=cfg.device,
+        tracker=cfg.tracker,
+        roi_imgsz=cfg.roi_imgsz if cfg.roi_inference else None,
+        backend=cfg.backend,
+        onnx_threads=cfg.onnx_threads,
+        quantize=cfg.quantize,
+        calib_dir=resolve_path(cfg.quant_calib_dir or cfg.frames_dir) if cfg.quantize == "static" else None,
+        calib_frames=cfg.quant_calib_frames,
+    )
+
+
+def _cache_scope(loaders) -> tuple[str, ...]:
+    # Prefijos de frame_key de las fuentes de la corrida: la caché precarga solo esas filas
+    scope = []
+    for loader in loaders:
+        base = loader.loader if isinstance(loader, SharedFrameRing) else loader
+        if isinstance(base, FrameLoader):
+            scope.append(str(base.frames_dir) + os.sep)
+        elif not base.is_device:
+            scope.append(f"{base.path}|")
+    return tuple(scope)
+
+
+def _check_cache_coverage(cfg, loader, cache: DetectionCache) -> None:
+    # En modo track los ids salen del tracker del detector: mezclar frames cacheados
+    # con frames recién detectados reiniciaría sus ids a mitad de la corrida.
+    # Se lee la caché solo si cubre todos los frames; si no, solo se escribe.
+    if cfg.mode != "track":
+        return
+    if cfg.follow:
+        cache.reads = False
+        print("[WARN] Detection cache is write-only in track mode with follow (coverage unknown)")
+        return
+    base = loader.loader if isinstance(loader, SharedFrameRing) else loader
+    if isinstance(base, FrameLoader):
+        keys = (frame_key(str(p), i) for i, p in enumerate(base.paths()))
+    else:
+        keys = (frame_key(str(base.path), i) for i in range(len(base)))
+    if not cache.covers(keys):
+        cache.reads = False
+        print("[WARN] Detection cache does not cover every frame; track mode runs the tracker (write-only cache)")
+
+
+def _fallback_names(cfg, weights: Path):
+    # Labels sin names.json: la tabla de la config o, si no hay, la del modelo
+    if cfg.class_names:
+        return list(cfg.class_names)
+    if not weights.exists():
+        raise FileNotFoundError(f"Names table not found: no names.json, MainConfig.class_names or model {weights}")
+    print(f"[WARN] names.json not found; using the class names of {weights.name}")
+    return load_detector(cfg, weights).names
+
+
+def _open_detector(cfg, weights: Path, loader, detector=None, scope: tuple[str, ...] | None = None):
+    # `detector` ya cargado (reutilizado entre corridas): solo se envuelve con la caché
+    if detector is not None and hasattr(detector, "reset"):
+        detector.reset()
+    if cfg.detector == "labels":
+        if detector is None:
+            try:
+                detector = LabelsDetector(
+                    resolve_path(cfg.labels_dir),
+                    names=resolve_path(cfg.labels_names) if cfg.labels_names else None,
+                    fallback_names=lambda: _fallback_names(cfg, weights),
+                )
+            except FileNotFoundError as e:
+                raise SystemExit(f"[ERROR] {e}")
+        return detector, None
+
+    def factory():
+        return detector if detector is not None else load_detector(cfg, weights)
+
+    if not cfg.detection_cache:
+        return factory(), None
+    base_loader = loader.loader if isinstance(loader, SharedFrameRing) else loader
+    settings = {
+        "weights_sha256": file_sha256(weights),
+        "imgsz": cfg.imgsz,
+        "conf": cfg.conf,
+        "mode": cfg.mode,
+        "tracker": cfg.tracker if cfg.mode == "track" else None,
+        "decode_scale": base_loader.decode_scale if isinstance(base_loader, FrameLoader) else 1,
+    }
+    if cfg.roi_inference:
+        settings["roi_imgsz"] = cfg.roi_imgsz
+    if cfg.backend != "torch":
+        settings["backend"] = cfg.backend
+    if cfg.quantize is not None:
+        settings["quantize"] = cfg.quantize
+        if cfg.quantize == "static":
+            settings["quant_calib"] = [str(resolve_path(cfg.quant_calib_dir or cfg.frames_dir)), cfg.quant_calib_frames]
+    cache = DetectionCache(
+        resolve_path(cfg.detection_cache_path),
+        settings,
+        scope=scope if scope is not None else _cache_scope([loader]),
+    )
+    _check_cache_coverage(cfg, loader, cache)
+    return CachedDetector(cache, factory), cache
+
+
+def _peak_rss_mb() -> float | None:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    # ru_maxrss: KB en Linux, bytes en macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _owns_buffers(loader) -> bool:
+    # Solo los frames del pool se pueden dibujar en el lugar (el cache memmap es de solo lectura)
+    return isinstance(loader, FrameLoader) and loader.pool is not None
+
+
+def _make_stages(cfg, session: CountingSession, loader, detector):
+    """Etapas opcionales previas a la inferencia: stride adaptativo, ROI y compuerta de movimiento."""
+    sampler = None
+    if cfg.adaptive_stride and session.modules:
+        idle_stride = min(m.cfg.idle_stride for m in session.modules.values())
+        sampler = AdaptiveSampler(
+            idle_stride=idle_stride,
+            backfill=cfg.adaptive_backfill,
+            detach=detach_frame if isinstance(loader, SharedFrameRing) else None,
+        )
+    roi = None
+    if cfg.roi_inference:
+        if cfg.mode == "track":
+            print("[WARN] roi_inference is ignored in track mode (crops would shift tracker coordinates)")
+        elif isinstance(detector, LabelsDetector):
+            print("[WARN] roi_inference is ignored with detector='labels'")
+        else:
+            roi = RoiPlanner(
+                margin=cfg.roi_margin,
+                refresh_interval=cfg.roi_refresh,
+                revalidate=cfg.roi_revalidate,
+                reset_after=cfg.roi_reset_after,
+            )
+    gate = None
+    if cfg.motion_gate:
+        gate = MotionGate(
+            threshold=cfg.motion_threshold,
+            pixel_threshold=cfg.motion_pixel_threshold,
+            width=cfg.motion_width,
+            refresh_interval=cfg.motion_refresh,
+        )
+    return sampler, roi, gate
+
+
+def _stage_states(runner: "PipelineRunner") -> dict[str, dict | None]:
+    stages = {"sampler": runner.sampler, "roi": runner.roi, "gate": runner.gate}
+    return {name: stage.state_dict() if stage is not None else None for name, stage in stages.items()}
+
+
+def _checkpoint_state(runner: "PipelineRunner", outputs: RunOutputs, **info) -> dict:
+    """Estado para reanudar: sesión de conteo, etapas, últimas detecciones y offsets de salida."""
+    return {
+        **info,
+        "session": runner.session.state_dict(),
+        "stages": _stage_states(runner),
+        "last_detections": runner.last_detections,
+        "outputs": outputs.state(),
+    }
+
+
+def _resumed_session(cfg, resumed: dict) -> CountingSession:
+    # La sesión se arma con la config de conteo guardada (no la actual) y se le carga el estado
+    counting = resumed["counting"]
+    border = BorderCounterConfig(**counting["border"])
+    session_cfg = replace(
+        cfg,
+        mode=border.mode,
+        border=border,
+        signals=SignalsCounterConfig(**counting["signals"]),
+        interaction=InteractionCounterConfig(**counting["interaction"]),
+        weights=dict(counting["weights"]),
+        vote_threshold=counting["vote_threshold"],
+    )
+    session = CountingSession(session_cfg)
+    session.load_state(resumed["session"])
+    return session
+
+
+def _camera_dirs(cfg) -> dict[str, Path]:
+    root = resolve_path(cfg.cameras_root)
+    dirs = {}
+    for cam in cfg.cameras:
+        img_dir = root / f"{cam}_camera" / "img"
+        if img_dir.exists():
+            dirs[cam] = img_dir
+        else:
+            print(f"[WARN] Missing: {img_dir}")
+    if not dirs:
+        raise SystemExit(f"[ERROR] No <camera>_camera/img folders found in {root}")
+    return dirs
+
+
+def _main_cameras(cfg, weights: Path) -> int:
+    """
+    Modo varias cámaras (primary + secondary de un mismo nameroot) en un proceso:
+    un modelo cargado una vez, lotes con frames de ambas cámaras y salidas
+    separadas en <outdir>/<camera>/. Solo modo predict.
+    """
+    if cfg.mode == "track":
+        raise SystemExit("[ERROR] cameras_root only supports mode='predict' (one tracker cannot follow two cameras)")
+    if cfg.source != "frames":
+        raise SystemExit("[ERROR] cameras_root requires source='frames'")
+    if cfg.follow:
+        raise SystemExit("[ERROR] cameras_root does not support follow mode")
+    if cfg.checkpoint_every > 0 or cfg.resume:
+        print("[WARN] checkpoint_every/resume are ignored with cameras_root")
+    run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+    cam_dirs = _camera_dirs(cfg)
+
+    loaders = {cam: _open_source(cfg, img_dir) for cam, img_dir in cam_dirs.items()}
+    detector, det_cache = _open_detector(
+        cfg, weights, next(iter(loaders.values())), scope=_cache_scope(loaders.values())
+    )
+    viz = Visualizer()
+
+    runners: dict[str, PipelineRunner] = {}
+    cams: dict[str, dict] = {}
+    for cam, loader in loaders.items():
+        out_base = resolve_path(cfg.outdir) / cam
+        out_base.mkdir(parents=True, exist_ok=True)
+        session = CountingSession(cfg)
+        outputs = RunOutputs(
+            cfg,
+            out_base / f"events_{run_id}.jsonl",
+            out_base / f"frames_{run_id}.jsonl",
+            out_base / _timestamped_name(cfg.out_video),
+        )
+        sampler, roi, gate = _make_stages(cfg, session, loader, detector)
+        runners[cam] = PipelineRunner(
+            cfg,
+            session,
+            outputs,
+            viz,
+            detector,
+            sampler=sampler,
+            gate=gate,
+            roi=roi,
+            release=getattr(loader, "release", None),
+            detach=detach_frame if isinstance(loader, SharedFrameRing) else None,
+            render_queue=cfg.render_queue if cfg.pipeline else 0,
+            auto_flush=False,
+            in_place=cfg.reuse_buffers and _owns_buffers(loader),
+        )
+        cams[cam] = {"out_base": out_base, "session": session, "outputs": outputs, "frames": 0}
+        print(f"[INFO] {cam}: {len(loader)} frames -> {out_base}")
+
+    multi = MultiCameraRunner(runners, detector, cfg.batch_size)
+    print(f"[INFO] Cameras: {', '.join(runners)} (batch size {multi.batch_size})")
+    count = 0
+    try:
+        for cam, frame in interleave(loaders, cfg.limit):
+            count += 1
+            cams[cam]["frames"] += 1
+            if count % 200 == 0:
+                print(f"  done {count}")
+            multi.feed(cam, frame)
+        multi.finish()
+    except KeyboardInterrupt:
+        print("[INFO] Interrupted, finishing outputs")
+    finally:
+        multi.close()
+        for c in cams.values():
+            c["outputs"].close_logs()
+
+    summary = {}
+    for cam, c in cams.items():
+        final_path = c["outputs"].close_video()
+        if final_path is not None:
+            print(f"[OK] Video saved ({cam}): {final_path}")
+        session = c["session"]
+        meta = {
+            "run_id": run_id,
+            "camera": cam,
+            "frames_dir": str(cam_dirs[cam]),
+            "model": str(weights) if cfg.detector == "yolo" else None,
+            "config": asdict(cfg),
+            "counter_border": asdict(session.border_cfg),
+            "counter_signals": asdict(cfg.signals),
+            "counter_interaction": asdict(cfg.interaction),
+            "frames": c["frames"],
+            "count": session.count,
+            "module_counts": dict(session.module_counts),
+        }
+        (c["out_base"] / f"run_{run_id}.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+        summary[cam] = {"frames": c["frames"], "count": session.count}
+        print(f"[OK] {cam}: {c['frames']} frames, count {session.count}")
+
+    print(f"[INFO] Inference: {multi.inferred} frames in {multi.batches} batches")
+    if det_cache is not None:
+        det_cache.close()
+        print(f"[INFO] Detection cache: {det_cache.stats.hits} hits, {det_cache.stats.misses} misses")
+    peak = _peak_rss_mb()
+    if peak is not None:
+        print(f"[INFO] Peak RSS: {peak:.0f} MB")
+    print(f"[OK] Processed {count} frames")
+    return 0
+
+
+def run(cfg, detector=None) -> dict:
+    """
+    Una corrida completa sobre cfg.frames_dir / cfg.video con salidas en cfg.outdir.
+
+    `detector`: detector ya cargado para reutilizar entre corridas (p.ej. un
+    worker de utils/batch_runner.py); si es None se carga según cfg.
+    Devuelve un resumen (frames, conteo final, fps y rutas de salida).
+
+    Con cfg.checkpoint_every el estado se guarda en <outdir>/checkpoint.pkl; con
+    cfg.resume la corrida sigue desde ahí (mismo run_id, logs y video continúan).
+    """
+    run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+    t_start = time.perf_counter()
+
+    weights = _check_detector_cfg(cfg)
+    frames_dir = _resolve_source(cfg)
 
     out_base = resolve_path(cfg.outdir)
     out_base.mkdir(parents=True, exist_ok=True)
-    out_video = out_base / _timestamped_name(cfg.out_video)
+    ckpt_path = out_base / "checkpoint.pkl"
+    resumed = load_checkpoint(ckpt_path) if cfg.resume else None
+    if cfg.resume and resumed is None:
+        print(f"[WARN] No checkpoint in {out_base}, starting from the first frame")
+    if resumed is not None:
+        if resumed["frames_dir"] != str(frames_dir):
+            raise SystemExit(f"[ERROR] Checkpoint {ckpt_path} belongs to {resumed['frames_dir']}, not {frames_dir}")
+        run_id = resumed["run_id"]
+    out_video = resumed["outputs"]["out_video"] if resumed else out_base / _timestamped_name(cfg.out_video)
     events_path = out_base / f"events_{run_id}.jsonl"
     frames_path = out_base / f"frames_{run_id}.jsonl"
     meta_path = out_base / f"run_{run_id}.json"
 
-    border_cfg = replace(cfg.border, mode=cfg.mode)
+    # Al reanudar, la sesión (áreas fijadas, tracker, ventanas, contadores) viene del checkpoint
+    session = _resumed_session(cfg, resumed) if resumed else CountingSession(cfg)
+    border_cfg = session.border_cfg
 
     meta = {
         "run_id": run_id,
+        "source": cfg.source,
         "frames_dir": str(frames_dir),
-        "model": str(weights),
+        "model": str(weights) if cfg.detector == "yolo" else None,
+        "labels_dir": str(resolve_path(cfg.labels_dir)) if cfg.detector == "labels" else None,
         "config": asdict(cfg),
         "counter_border": asdict(border_cfg),
         "counter_signals": asdict(cfg.signals),
         "counter_interaction": asdict(cfg.interaction),
     }
     meta_path.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    # Config de conteo de esta corrida (la sesión reanudada trae la suya)
+    counting = {
+        "border": asdict(replace(cfg.border, mode=cfg.mode)),
+        "signals": asdict(cfg.signals),
+        "interaction": asdict(cfg.interaction),
+        "weights": dict(cfg.weights),
+        "vote_threshold": cfg.vote_threshold,
+    }
 
-    loader = FrameLoader(frames_dir=frames_dir, recursive=cfg.recursive)
-    detector = DetectorYolo(
-        weights=str(weights),
-        mode=cfg.mode,
-        conf=cfg.conf,
-        imgsz=cfg.imgsz,
-        device=cfg.device,
-        tracker=cfg.tracker,
-    )
+    loader = _open_source(cfg, frames_dir)
+    detector, det_cache = _open_detector(cfg, weights, loader, detector)
     viz = Visualizer()
 
-    modules = {}
-    if border_cfg.enabled:
-        modules["border"] = BorderCounterModule(border_cfg)
-    if cfg.signals.enabled:
-        modules["signals"] = SignalsCounterModule(cfg.signals)
-    if cfg.interaction.enabled:
-        modules["interaction"] = InteractionCounterModule(cfg.interaction)
-    voter = VotingEngine(cfg.weights, threshold=cfg.vote_threshold)
-    if border_cfg.enabled:
-        start_count = border_cfg.start_count
-        cooldown = border_cfg.cooldown_frames
-        min_count = border_cfg.min_count
-    elif cfg.interaction.enabled:
-        start_count = cfg.interaction.start_count
-        cooldown = border_cfg.cooldown_frames
-        min_count = border_cfg.min_count
-    else:
-        start_count = 0
-        cooldown = border_cfg.cooldown_frames
-        min_count = border_cfg.min_count
-
-    global_counter = BorderCounter(
-        start_count=start_count,
-        cooldown_frames=cooldown,
-        min_count=min_count,
-    )
+    sampler, roi, gate = _make_stages(cfg, session, loader, detector)
+    count = 0
+    resumes = 0
+    if resumed is not None:
+        for stage, name in ((sampler, "sampler"), (roi, "roi"), (gate, "gate")):
+            if stage is not None and resumed["stages"][name] is not None:
+                stage.load_state(resumed["stages"][name])
+        loader.seek(resumed["next_index"])
+        count = resumed["frames"]
+        resumes = resumed["resumes"] + 1
+        print(
+            f"[INFO] Resuming run {run_id} at frame {resumed['next_index']} "
+            f"({count} frames done, count {session.count})"
+        )
+        if resumed["counting"] != counting:
+            print("[WARN] Counter config changed since the checkpoint; the saved session keeps its own config")
+        if cfg.mode == "track":
+            print("[WARN] Track mode: the detector's tracker restarts on resume (new track ids)")
+    count_start = count
 
     print(f"[INFO] Frames: {len(loader)} -> {frames_dir}")
-    print(f"[INFO] Video: {out_video}")
+    base_loader = loader.loader if isinstance(loader, SharedFrameRing) else loader
+    if isinstance(base_loader, FrameLoader) and base_loader.manifest is not None:
+        mstats = base_loader.manifest.stats
+        meta["frame_manifest"] = mstats.as_dict()
+        print(
+            f"[INFO] Manifest ({mstats.mode}): {mstats.files} files, "
+            f"{mstats.new} new, {mstats.changed} changed, {mstats.removed} removed, {mstats.invalid} unreadable"
+        )
+    if cfg.follow:
+        print("[INFO] Following new frames (Ctrl+C to stop)")
+    if isinstance(loader, FrameLoader) and loader.cache_dir is not None:
+        cache = loader.open_cache()
+        rep = cache.report()
+        meta["frame_cache"] = rep
+        print(
+            f"[INFO] Frame cache: {rep['cache_bytes'] / 1e6:.1f} MB "
+            f"(x{rep['ratio']:.1f} vs {rep['source_bytes'] / 1e6:.1f} MB of source images)"
+            + (" [built]" if rep["built"] else "")
+        )
+    if isinstance(base_loader, FrameLoader) and base_loader.decode_scale != 1:
+        print(f"[INFO] Decode scale: 1/{base_loader.decode_scale}")
+    if cfg.save_video:
+        print(f"[INFO] Video: {out_video}")
     if cfg.save_events:
         print(f"[INFO] Events: {events_path}")
     if cfg.save_frames:
         print(f"[INFO] Frames log: {frames_path}")
 
-    writer = None
-    writer_path = None
-    target_size = None
-    count = 0
-    module_counts = {}
-
-    f_events = events_path.open("w", encoding="utf-8") if cfg.save_events else None
-    f_frames = frames_path.open("w", encoding="utf-8") if cfg.save_frames else None
-
+    if sampler is not None:
+        print(f"[INFO] Adaptive stride: 1/{sampler.idle_stride} while idle (backfill={sampler.backfill})")
+    if gate is not None:
+        print(
+            f"[INFO] Motion gate: reuse below {gate.threshold:.2%} of pixels changed by > {gate.pixel_threshold}, "
+            f"refresh every {gate.refresh_interval}"
+        )
+
+    if isinstance(detector, LabelsDetector):
+        print(f"[INFO] Detector: labels <- {detector.labels_dir}")
+        if isinstance(loader, FrameLoader) and loader.header_only:
+            print("[INFO] Frames are not decoded (image size from the file header)")
+    elif cfg.backend == "onnx":
+        # El archivo que abrió el backend (FP32 o el INT8 cacheado); con cache de detecciones
+        # el modelo se carga recién ante el primer miss
+        onnx = getattr(detector.loaded if isinstance(detector, CachedDetector) else detector, "onnx", None)
+        print(
+            "[INFO] Backend: ONNX Runtime (CPU) <- "
+            + (onnx.onnx_path.name if onnx is not None else "loaded on the first cache miss")
+            + (f" (INT8 {cfg.quantize})" if cfg.quantize else "")
+        )
+    if det_cache is not None:
+        print(f"[INFO] Detection cache: {det_cache.stats.preloaded} stored frames -> {det_cache.db_path}")
+    if roi is not None:
+        print(f"[INFO] ROI inference: imgsz {cfg.roi_imgsz}, margin {roi.margin}px, full frame every {roi.refresh_interval}")
+    if cfg.pipeline:
+        print(
+            f"[INFO] Pipeline: inference up to {cfg.pipeline_depth} batches ahead"
+            + (" (disabled by adaptive stride)" if sampler is not None else "")
+            + f", render queue {cfg.render_queue}"
+        )
+    if cfg.batch_size > 1:
+        print(f"[INFO] Batch size: {cfg.batch_size}" + (" (track mode runs frame by frame)" if cfg.mode == "track" else ""))
+
+    outputs = RunOutputs(cfg, events_path, frames_path, out_video, resume=resumed["outputs"] if resumed else None)
+    runner = PipelineRunner(
+        cfg,
+        session,
+        outputs,
+        viz,
+        detector,
+        sampler=sampler,
+        gate=gate,
+        roi=roi,
+        release=getattr(loader, "release", None),
+        detach=detach_frame if isinstance(loader, SharedFrameRing) else None,
+        depth=cfg.pipeline_depth if cfg.pipeline else 0,
+        render_queue=cfg.render_queue if cfg.pipeline else 0,
+        in_place=cfg.reuse_buffers and _owns_buffers(loader),
+    )
+    if resumed is not None:
+        runner.last_detections = resumed["last_detections"]
+    checkpointer = None
+    if cfg.checkpoint_every > 0:
+        checkpointer = Checkpointer(ckpt_path, cfg.checkpoint_every, cfg.checkpoint_max_overhead)
+        checkpointer.start(count)
+        print(f"[INFO] Checkpoint every {cfg.checkpoint_every} frames -> {ckpt_path}")
+
+    completed = False
     try:
         for frame in loader:
             if cfg.limit is not None and count >= cfg.limit:
                 break
+            count += 1
+            if count % 200 == 0:
+                print(f"  done {count}")
 
-            result = detector.detect(frame.image, frame_index=frame.index, image_path=str(frame.path))
-            detections = result["detections"]
-
-            module_events = {}
-            for name, module in modules.items():
-                out = module.update(
-                    detections=detections,
-                    frame_index=frame.index,
-                    image_size=(frame.width, frame.height),
-                )
-                module_events[name] = out.events
-                module_counts[name] = out.count_after
-
-                if f_events is not None:
-                    for ev in out.events:
-                        ev_data = ev.__dict__.copy()
-                        ev_data["module"] = name
-                        ev_data["count_before"] = out.count_before
-                        ev_data["count_after"] = out.count_after
-                        ev_data["person_near"] = out.person_near
-                        ev_data["area_class"] = out.area.class_name if out.area else None
-                        f_events.write(json.dumps(ev_data) + "\n")
-
-            vote_event = voter.vote(module_events, frame_index=frame.index)
-            if vote_event is not None:
-                global_counter.update([vote_event], frame_index=frame.index)
-                if f_events is not None:
-                    f_events.write(
-                        json.dumps(
-                            {
-                                "module": "vote",
-                                "event_type": vote_event.event_type,
-                                "frame_index": vote_event.frame_index,
-                                "score": vote_event.score,
-                                "reason": vote_event.reason,
-                                "count_after": global_counter.state.count,
-                            }
-                        )
-                        + "\n"
-                    )
-
-            if f_frames is not None:
-                f_frames.write(
-                    json.dumps(
-                        {
-                            "frame_index": frame.index,
-                            "image_path": str(frame.path),
-                            "count": global_counter.state.count,
-                            "num_detections": len(detections),
-                        }
+            runner.feed(frame)
+
+            if checkpointer is not None and checkpointer.due(count):
+                # Solo con el pipeline vacío: todo lo anterior queda contado y escrito
+                t0 = time.perf_counter()
+                if runner.drain():
+                    outputs.rotate_video()
+                    state = _checkpoint_state(
+                        runner,
+                        outputs,
+                        run_id=run_id,
+                        frames_dir=str(frames_dir),
+                        frames=count,
+                        next_index=frame.index + 1,
+                        resumes=resumes,
+                        counting=counting,
                     )
-                    + "\n"
-                )
-
-            # Draw overlays
-            if cfg.draw_detections:
-                if cfg.draw_classes:
-                    keep = set(cfg.draw_classes)
-                    draw_dets = [
-                        d for d in detections
-                        if d.get("class_name") in keep and d.get("conf", 0.0) >= cfg.draw_conf_min
-                    ]
+                    checkpointer.save(state, count, t0=t0)
                 else:
-                    draw_dets = [d for d in detections if d.get("conf", 0.0) >= cfg.draw_conf_min]
-                out_img = viz.draw(frame.image, draw_dets)
-            else:
-                out_img = frame.image.copy()
-
-            if cfg.show_zones and "border" in modules:
-                border_mod = modules["border"]
-                area = border_mod.selector.selected
-                if area is not None:
-                    zones = make_inner_outer(
-                        area.bbox_xyxy,
-                        image_size=(frame.width, frame.height),
-                        shrink_px=border_mod.cfg.shrink,
-                        expand_px=border_mod.cfg.expand,
-                    )
-                    out_img = viz.draw_zones(out_img, zones.inner_xyxy, zones.outer_xyxy)
-                    if cfg.show_area:
-                        out_img = viz.draw_area(out_img, area.bbox_xyxy, label=area.class_name)
-
-            if writer is None:
-                w = frame.width - (frame.width % 2)
-                h = frame.height - (frame.height % 2)
-                target_size = (w, h)
-                writer, writer_path = _open_video_writer(out_video, cfg.fps, target_size, cfg.video_container)
-
-            if target_size and (out_img.shape[1] != target_size[0] or out_img.shape[0] != target_size[1]):
-                out_img = cv2.resize(out_img, target_size)
-
-            if cfg.show_count:
-                y = 30
-                cv2.putText(
-                    out_img,
-                    f"count: {global_counter.state.count}",
-                    (10, y),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    0.7,
-                    (255, 255, 255),
-                    2,
-                    cv2.LINE_AA,
-                )
-                for name in ("border", "signals", "interaction"):
-                    if name in module_counts:
-                        y += 25
-                        cv2.putText(
-                            out_img,
-                            f"{name}: {module_counts[name]}",
-                            (10, y),
-                            cv2.FONT_HERSHEY_SIMPLEX,
-                            0.6,
-                            (200, 200, 200),
-                            2,
-                            cv2.LINE_AA,
-                        )
-            writer.write(out_img)
+                    checkpointer.defer()
 
-            count += 1
-            if count % 200 == 0:
-                print(f"  done {count}")
+            if cfg.follow:
+                # Logs legibles en vivo mientras se sigue la carpeta
+                outputs.flush()
+
+        runner.finish()
+        completed = True
+    except KeyboardInterrupt:
+        print("[INFO] Interrupted, finishing outputs")
     finally:
-        if f_events is not None:
-            f_events.close()
-        if f_frames is not None:
-            f_frames.close()
-
-    if writer is not None:
-        writer.release()
-        if writer_path is not None:
-            final_path = writer_path
-            if cfg.ffmpeg_reencode:
-                final_path = reencode_mp4_ffmpeg(writer_path)
-            print(f"[OK] Video saved: {final_path}")
+        runner.close()
+        outputs.close_logs()
+
+    # Interrumpida: los segmentos quedan sin re-codificar para seguirlos al reanudar
+    final_path = outputs.close_video(reencode=completed)
+    if final_path is not None:
+        print(f"[OK] Video saved: {final_path}")
+    if len(outputs.segments) > 1:
+        meta["video_segments"] = [str(p) for p in outputs.segments]
+        print(f"[INFO] Video in {len(outputs.segments)} segments: {outputs.segments[0].name} ... {final_path.name}")
+    if completed and (checkpointer is not None or resumed is not None):
+        # Corrida terminada: el checkpoint ya no sirve para reanudar
+        ckpt_path.unlink(missing_ok=True)
+
+    if isinstance(loader, FrameLoader) and cfg.prefetch_workers > 0:
+        meta["prefetch"] = loader.stats.as_dict()
+        print(
+            f"[INFO] Prefetch: queue empty {loader.stats.queue_empty}, "
+            f"full {loader.stats.queue_full} / {loader.stats.frames} frames"
+        )
+    if isinstance(loader, SharedFrameRing):
+        rstats = loader.stats
+        meta["shm_ring"] = rstats.as_dict()
+        print(
+            f"[INFO] Decode ring: mean occupancy {rstats.mean_occupancy:.1f}/{rstats.slots} slots, "
+            f"ring empty {rstats.consumer_waits} (decode-bound), ring full {rstats.producer_waits} (inference-bound)"
+        )
+    if isinstance(loader, FrameLoader) and loader.pool is not None:
+        pstats = loader.pool.stats
+        meta["frame_pool"] = pstats.as_dict()
+        print(
+            f"[INFO] Frame pool: {pstats.allocations} allocations, {pstats.reuses} reused decodes, "
+            f"peak {pstats.peak_in_use} buffers in use"
+        )
+    if cfg.pipeline:
+        meta["pipeline"] = runner.stats()
+        rq = meta["pipeline"]["render_queue_full"]
+        print(
+            f"[INFO] Pipeline: waited on inference {runner.infer_waits} times"
+            + (f", render queue full {rq} times" if rq is not None else "")
+        )
+    meta["peak_rss_mb"] = _peak_rss_mb()
+    if meta["peak_rss_mb"] is not None:
+        print(f"[INFO] Peak RSS: {meta['peak_rss_mb']:.0f} MB")
+    if sampler is not None:
+        meta["adaptive_stride"] = sampler.stats.as_dict()
+        print(
+            f"[INFO] Adaptive stride: inferred {sampler.stats.processed}/{sampler.stats.frames} frames "
+            f"(skip ratio {sampler.stats.skip_ratio:.2f}, backfilled {sampler.stats.backfilled})"
+        )
+    if gate is not None:
+        meta["motion_gate"] = gate.stats.as_dict()
+        print(
+            f"[INFO] Motion gate: reused {gate.stats.reused}/{gate.stats.frames} frames "
+            f"(hit rate {gate.stats.hit_rate:.2f}, forced {gate.stats.forced})"
+        )
+    if roi is not None:
+        meta["roi_inference"] = roi.stats.as_dict()
+        print(
+            f"[INFO] ROI inference: {roi.stats.roi}/{roi.stats.frames} frames cropped "
+            f"(mean {roi.stats.as_dict()['mean_roi_area_ratio']:.2f} of the frame), "
+            f"{roi.stats.refreshes} refreshes, {roi.stats.resets} area resets"
+        )
+    border_mod = session.modules.get("border")
+    if border_mod is not None:
+        tstats = border_mod.tracker.stats
+        meta["tracker"] = tstats.as_dict()
+        print(
+            f"[INFO] Tracker: {tstats.live} live tracks (peak {tstats.peak}), "
+            f"{tstats.created} created, {tstats.removed} removed, {tstats.evicted} evicted"
+        )
+    if checkpointer is not None or resumed is not None:
+        meta["checkpoint"] = {
+            **(checkpointer.stats.as_dict() if checkpointer is not None else {}),
+            "resumes": resumes,
+            "resumed_at_frame": resumed["next_index"] if resumed else None,
+        }
+    if checkpointer is not None:
+        cstats = checkpointer.stats
+        print(
+            f"[INFO] Checkpoints: {cstats.saved} saved (mean {cstats.as_dict()['mean_ms']:.1f} ms, "
+            f"max {1000.0 * cstats.max_s:.1f} ms, {cstats.last_bytes / 1e6:.2f} MB), "
+            f"interval {cstats.interval} frames, {cstats.deferred} deferred"
+        )
+    if isinstance(detector, LabelsDetector):
+        meta["labels"] = detector.stats.as_dict()
+        print(f"[INFO] Labels: {detector.stats.frames} frames, {detector.stats.missing} without label file")
+    onnx = getattr(detector.loaded if isinstance(detector, CachedDetector) else detector, "onnx", None)
+    if onnx is not None:
+        meta["onnx_model"] = str(onnx.onnx_path)
+    if det_cache is not None:
+        det_cache.close()
+        meta["detection_cache"] = det_cache.report()
+        print(
+            f"[INFO] Detection cache: {det_cache.stats.hits} hits, {det_cache.stats.misses} misses "
+            f"(hit rate {det_cache.stats.as_dict()['hit_rate']:.2f})"
+        )
+    elapsed = time.perf_counter() - t_start
+    meta["elapsed_s"] = round(elapsed, 3)
+    meta["fps"] = round((count - count_start) / elapsed, 2) if elapsed > 0 else None
+    meta_path.write_text(json.dumps(meta, indent=2), encoding="utf-8")
 
-    print(f"[OK] Processed {count} frames")
+    print(f"[OK] Processed {count - count_start} frames in {elapsed:.1f}s")
+    return {
+        "run_id": run_id,
+        "frames_dir": str(frames_dir),
+        "frames": count,
+        "count": session.count,
+        "module_counts": dict(session.module_counts),
+        "elapsed_s": meta["elapsed_s"],
+        "fps": meta["fps"],
+        "meta": str(meta_path),
+        "video": str(final_path) if final_path is not None else None,
+    }
+
+
+def main():
+    cfg = MAIN
+    if cfg.cameras_root:
+        return _main_cameras(cfg, _check_detector_cfg(cfg))
+    run(cfg)
     return 0
 
 
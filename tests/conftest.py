@@ -0,0 +1,142 @@
+"""
+Fixtures compartidas de los tests de pytest: frames sintéticos y detectores
+falsos para correr el pipeline de main.py sin modelo.
+"""
+from dataclasses import replace
+import json
+from pathlib import Path
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from config.settings import MAIN
+from core import Detections
+
+
+class PixelCheckDetector:
+    """Detector falso que compara cada imagen recibida con una lectura nueva de su archivo."""
+
+    def __init__(self) -> None:
+        self.checked = 0
+        self.mismatched: list[str] = []
+
+    def detect(self, image, frame_index=None, image_path=None, scale=1.0, roi=None) -> dict:
+        self.checked += 1
+        if not np.array_equal(image, cv2.imread(image_path)):
+            self.mismatched.append(Path(image_path).name)
+        return {"frame_index": frame_index, "image_path": image_path, "detections": Detections.empty()}
+
+    def detect_batch(self, images, frame_indices=None, paths=None, scales=None, rois=None) -> list[dict]:
+        return [self.detect(img, frame_indices[i], paths[i]) for i, img in enumerate(images)]
+
+
+class BlobDetector:
+    """
+    Detector falso que lee las cajas de los píxeles: canal rojo -> "cajas",
+    canal verde -> "persona"; el área de trabajo es fija.
+    """
+
+    names = {0: "area_de_trabajo_pallet", 1: "persona", 2: "cajas"}
+    area = [200.0, 150.0, 440.0, 360.0]
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def detect(self, image, frame_index=None, image_path=None, scale=1.0, roi=None) -> dict:
+        self.calls += 1
+        xyxy, cls = [self.area], [0]
+        for cid, mask in ((1, image[:, :, 1] > 128), (2, image[:, :, 2] > 128)):
+            n, _, stats, _ = cv2.connectedComponentsWithStats(mask.astype(np.uint8))
+            for x, y, w, h, _ in stats[1:n]:
+                xyxy.append([x, y, x + w, y + h])
+                cls.append(cid)
+        dets = Detections(xyxy, cls, [0.9] * len(cls), names=self.names)
+        return {"frame_index": frame_index, "image_path": image_path, "detections": dets}
+
+    def detect_batch(self, images, frame_indices=None, paths=None, scales=None, rois=None) -> list[dict]:
+        return [self.detect(img, frame_indices[i], paths[i]) for i, img in enumerate(images)]
+
+
+def write_frames(folder: Path, n: int, seed: int) -> None:
+    """`n` frames PNG de ruido (48x64) en `folder`."""
+    folder.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    for i in range(n):
+        img = rng.integers(0, 256, size=(48, 64, 3), dtype=np.uint8)
+        cv2.imwrite(str(folder / f"frame_{i}.png"), img)
+
+
+def write_moving_box(folder: Path, n: int = 240) -> None:
+    """Una caja chica entra y sale del área (con pausas) y una persona espera junto al borde."""
+    folder.mkdir(parents=True, exist_ok=True)
+    path = [100 + 4 * t for t in range(60)] + [340] * 30 + [340 - 4 * t for t in range(60)] + [100] * 30
+    for i in range(n):
+        img = np.zeros((480, 640, 3), dtype=np.uint8)
+        cv2.rectangle(img, (160, 140), (185, 300), (0, 255, 0), -1)
+        x = path[i % len(path)]
+        cv2.rectangle(img, (x, 230), (x + 24, 254), (0, 0, 255), -1)
+        cv2.imwrite(str(folder / f"frame_{i}.png"), img)
+
+
+@pytest.fixture
+def pixel_detector() -> PixelCheckDetector:
+    return PixelCheckDetector()
+
+
+@pytest.fixture
+def blob_detector():
+    """Fábrica de BlobDetector: uno nuevo por corrida."""
+    return BlobDetector
+
+
+@pytest.fixture
+def frames(tmp_path):
+    """Escribe frames de ruido: `frames(n, seed, name="img")` -> carpeta."""
+
+    def make(n: int, seed: int = 0, name: str = "img") -> Path:
+        write_frames(tmp_path / name, n, seed)
+        return tmp_path / name
+
+    return make
+
+
+@pytest.fixture
+def moving_box(tmp_path) -> Path:
+    write_moving_box(tmp_path / "img")
+    return tmp_path / "img"
+
+
+@pytest.fixture
+def run_cfg(tmp_path):
+    """MainConfig para correr main.run sobre `frames_dir` con un detector inyectado."""
+    model = tmp_path / "model.pt"
+    model.touch()
+
+    def make(frames_dir: Path, **kw):
+        base = dict(
+            source="frames",
+            frames_dir=str(frames_dir),
+            outdir=str(tmp_path / "out"),
+            model=str(model),
+            detector="yolo",
+            mode="predict",
+            cameras_root=None,
+            ffmpeg_reencode=False,
+            detection_cache=False,
+            limit=None,
+        )
+        return replace(MAIN, **{**base, **kw})
+
+    return make
+
+
+def read_events(outdir: Path) -> list[dict]:
+    """Eventos del único events_*.jsonl de `outdir`."""
+    path = next(Path(outdir).glob("events_*.jsonl"))
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
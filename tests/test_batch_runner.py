@@ -0,0 +1,61 @@
+import json
+
+import main
+from tests.conftest import BlobDetector, write_moving_box
+from utils import batch_runner
+
+
+def test_job_names_and_expand(tmp_path) -> None:
+    for name in ("pickeoPaletts", "pickeoCarros"):
+        for cam in ("primary_camera", "secondary_camera"):
+            (tmp_path / name / cam / "img").mkdir(parents=True)
+    (tmp_path / "pickeoCarros" / "notes.txt").write_text("x")
+    folders = batch_runner.expand_folders([str(tmp_path / "*" / "*_camera" / "img"), str(tmp_path / "pickeoCarros" / "*")])
+    assert [f.relative_to(tmp_path).as_posix() for f in folders] == [
+        "pickeoCarros/primary_camera/img",
+        "pickeoCarros/secondary_camera/img",
+        "pickeoPaletts/primary_camera/img",
+        "pickeoPaletts/secondary_camera/img",
+        "pickeoCarros/primary_camera",
+        "pickeoCarros/secondary_camera",
+    ]
+    assert batch_runner.job_names(folders[:4]) == [
+        "pickeoCarros_primary_camera",
+        "pickeoCarros_secondary_camera",
+        "pickeoPaletts_primary_camera",
+        "pickeoPaletts_secondary_camera",
+    ]
+    assert batch_runner.job_names([tmp_path / "a" / "img", tmp_path / "b" / "img"]) == ["a", "b"]
+
+
+def test_run_batch_summary(tmp_path, run_cfg, monkeypatch) -> None:
+    write_moving_box(tmp_path / "cam_a" / "img", n=60)
+    write_moving_box(tmp_path / "cam_b" / "img", n=40)
+    loads = []
+    detector = BlobDetector()
+    monkeypatch.setattr(main, "load_detector", lambda cfg, weights=None: loads.append(cfg) or detector)
+
+    cfg = run_cfg(tmp_path, save_video=False)
+    out = tmp_path / "batch"
+    jobs = [
+        (str(tmp_path / "cam_a" / "img"), str(out / "cam_a")),
+        (str(tmp_path / "missing" / "img"), str(out / "missing")),
+        (str(tmp_path / "cam_b" / "img"), str(out / "cam_b")),
+    ]
+    results = batch_runner.run_batch(cfg, jobs, workers=0, threads=0)
+    # El modelo se carga una vez y se reutiliza entre carpetas
+    assert len(loads) == 1 and detector.calls == 100
+    assert [r["frames_dir"] for r in results] == [job[0] for job in jobs]
+    assert [r["ok"] for r in results] == [True, False, True]
+    assert "error" in results[1]
+    assert list((out / "cam_a").glob("events_*.jsonl")) and list((out / "cam_b").glob("run_*.json"))
+
+    expected = main.run(run_cfg(tmp_path / "cam_a" / "img", outdir=str(tmp_path / "ref"), save_video=False), BlobDetector())
+    assert (results[0]["frames"], results[0]["count"]) == (expected["frames"], expected["count"])
+
+    summary = batch_runner.summarize(cfg, results, workers=0, threads=0, wall=2.0)
+    totals = summary["totals"]
+    assert (totals["folders"], totals["ok"], totals["failed"], totals["frames"]) == (3, 2, 1, 100)
+    assert totals["count"] == results[0]["count"] + results[2]["count"]
+    assert totals["fps"] == 50.0
+    json.dumps(summary)  # se escribe tal cual como json
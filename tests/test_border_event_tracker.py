@@ -0,0 +1,235 @@
+from dataclasses import asdict, replace
+import json
+from pathlib import Path
+
+import pytest
+
+import main
+
+from config.settings import MAIN, BorderCounterConfig
+from core import BorderEventTracker
+from tests.reference_border_tracker import BorderEventTracker as ReferenceTracker
+
+INNER = [100.0, 100.0, 300.0, 300.0]
+OUTER = [80.0, 80.0, 320.0, 320.0]
+CLASS_IDS = {"persona": 1, "cajas": 2, "folio": 3}
+
+
+def _det(x: float, y: float, name: str = "cajas", track_id: int | None = None, conf: float = 0.9, size: float = 40):
+    box = [x, y, x + size, y + size]
+    return {"class_id": CLASS_IDS[name], "class_name": name, "conf": conf, "bbox_xyxy": box, "track_id": track_id}
+
+
+def _walk(start: tuple[float, float], end: tuple[float, float], frames: int, **kw) -> list[dict]:
+    (x0, y0), (x1, y1) = start, end
+    return [_det(x0 + (x1 - x0) * t / (frames - 1), y0 + (y1 - y0) * t / (frames - 1), **kw) for t in range(frames)]
+
+
+def _merge(*tracks: list) -> list[list[dict]]:
+    # Un track por objeto (None = no detectado en ese frame) -> detecciones por frame
+    return [[d for d in frame if d is not None] for frame in zip(*tracks)]
+
+
+# Secuencias guionadas: lista de frames, cada frame una lista de detecciones
+SCENARIOS = {
+    "enter": [[d] for d in _walk((10, 180), (200, 180), 20)],
+    "exit": [[d] for d in _walk((200, 180), (10, 180), 20)],
+    "enter_then_exit": [[d] for d in _walk((10, 180), (200, 180), 15) + _walk((200, 180), (-60, 180), 20)],
+    "two_objects_other_classes": _merge(
+        _walk((10, 120), (200, 120), 20),
+        _walk((400, 240), (180, 240), 20, name="folio"),
+        _walk((10, 10), (200, 200), 20, name="persona"),
+    ),
+    # Ocluido dentro del área: vuelve en el mismo lugar y no se recuenta
+    "occlusion": [[d] for d in _walk((10, 180), (200, 180), 12)]
+    + [[]] * 2
+    + [[_det(200, 180)] for _ in range(6)],
+    # Rebote en el borde: un frame afuera no alcanza para salir; tras salir de verdad vuelve a contar
+    "border_jitter": [[d] for d in _walk((10, 180), (200, 180), 12, size=80)]
+    + [[_det(x, 180, size=80)] for x in (230, 260, 290, 300, 325, 300, 325, 325, 300, 300, 280)],
+    # Se pierde más de max_missing frames: al volver es un objeto nuevo
+    "aging": [[d] for d in _walk((10, 180), (200, 180), 12)] + [[]] * 14 + [[_det(200, 180)] for _ in range(5)],
+    "aging_outside": [[_det(10, 10)] for _ in range(3)] + [[]] * 12 + [[_det(10, 10)] for _ in range(3)],
+    "track_ids": [[d] for d in _walk((10, 180), (200, 180), 10, track_id=7)]
+    + [[_det(20, 20, track_id=7)]]  # salto lejano: el track id manda sobre el IoU
+    + [[_det(200, 180, track_id=7)] for _ in range(3)],
+    "duplicate_track_ids": [[d] for d in _walk((10, 180), (150, 180), 6, track_id=3)]
+    + [[_det(150, 180, track_id=3), _det(10, 10, track_id=3)] for _ in range(3)]
+    + [[_det(160, 180, track_id=3)] for _ in range(3)],
+    "new_track_id_shared": [[_det(10, 180, track_id=5), _det(200, 180, track_id=5)] for _ in range(4)],
+}
+
+
+def _replay(tracker, frames: list[list[dict]]) -> tuple[list[dict], list[dict]]:
+    events = []
+    for i, dets in enumerate(frames):
+        events += [asdict(ev) for ev in tracker.update([dict(d) for d in dets], INNER, OUTER, frame_index=i)]
+    return events, [asdict(obj) for obj in tracker.get_objects()]
+
+
+@pytest.mark.parametrize("name", sorted(SCENARIOS))
+@pytest.mark.parametrize("use_track_id", [True, False])
+def test_tracker_matches_reference(name: str, use_track_id: bool) -> None:
+    kw = dict(in_frames=2, out_frames=2, max_missing=10, max_missing_inside=2, use_track_id=use_track_id)
+    ref_events, ref_objects = _replay(ReferenceTracker(**kw), SCENARIOS[name])
+    events, objects = _replay(BorderEventTracker(**kw), SCENARIOS[name])
+    assert events == ref_events
+    assert objects == ref_objects
+    assert sum(ev["event_type"] == "enter" for ev in events) == sum(ev["event_type"] == "enter" for ev in ref_events)
+
+
+def test_scenarios_exercise_the_tracker() -> None:
+    # Las secuencias de paridad producen eventos (no comparan listas vacías)
+    counts = {}
+    for name in ("enter", "exit", "enter_then_exit", "occlusion", "border_jitter", "aging"):
+        events, _ = _replay(BorderEventTracker(), SCENARIOS[name])
+        counts[name] = [(ev["event_type"], ev["obj_id"]) for ev in events]
+    assert counts["enter"] == [("enter", 1)]
+    assert counts["enter_then_exit"] == [("enter", 1), ("exit", 1)]
+    assert counts["occlusion"] == [("enter", 1)]
+    assert counts["border_jitter"] == [("enter", 1), ("exit", 1), ("enter", 1)]
+    assert counts["aging"] == [("enter", 1), ("enter", 2)]
+
+
+def _live(tracker) -> list[int]:
+    return [obj.obj_id for obj in tracker.get_objects()]
+
+
+def _assert_no_stale_rows(tracker) -> None:
+    # Los índices auxiliares solo apuntan a objetos vivos y las filas liberadas quedan reiniciadas
+    live = {obj.track_id: obj.obj_id for obj in tracker.get_objects() if obj.track_id is not None}
+    assert tracker._track_map == live
+    st = tracker._store
+    assert (st.track_id[st.n :] == -1).all()
+    assert (st.last_enter[st.n :] == -1).all()
+    assert not st.counted[st.n :].any()
+
+
+def test_eviction_order_past_the_cap() -> None:
+    tracker = BorderEventTracker(in_frames=1, max_tracks=4, evict_by="age")
+    frames = [
+        # A, B afuera; C entra (contado)
+        [_det(400, 10, track_id=1), _det(460, 10, track_id=2), _det(150, 150, track_id=3)],
+        # A sigue; D, E nuevos -> 5 vivos: sale B (no visto, no contado)
+        [_det(400, 10, track_id=1), _det(400, 100, track_id=4), _det(460, 100, track_id=5)],
+        # A sigue; F, G nuevos -> 6 vivos: salen D y E; C se conserva aunque sea el más viejo (contado)
+        [_det(400, 10, track_id=1), _det(400, 200, track_id=6), _det(460, 200, track_id=7)],
+        # A, G siguen; H nuevo -> 5 vivos: sale F (el único no visto y no contado)
+        [_det(400, 10, track_id=1), _det(460, 200, track_id=7), _det(520, 200, track_id=8)],
+    ]
+    survivors = []
+    for i, dets in enumerate(frames):
+        tracker.update(dets, INNER, OUTER, frame_index=i)
+        survivors.append(_live(tracker))
+        _assert_no_stale_rows(tracker)
+    assert survivors == [[1, 2, 3], [1, 3, 4, 5], [1, 3, 6, 7], [1, 3, 7, 8]]
+    assert tracker.stats.evicted == 4
+    assert tracker.stats.live == tracker.stats.peak == 4
+
+
+@pytest.mark.parametrize("evict_by, survivors", [("age", [2, 3]), ("conf", [1, 3])])
+def test_eviction_key(evict_by: str, survivors: list[int]) -> None:
+    # A (conf alta) visto en el frame 0, B (conf baja) en el 1; C nuevo en el 2 obliga a descartar uno
+    tracker = BorderEventTracker(max_tracks=2, evict_by=evict_by)
+    frames = [[_det(400, 10, track_id=1, conf=0.9)], [_det(460, 10, track_id=2, conf=0.5)], [_det(520, 10, track_id=3)]]
+    for i, dets in enumerate(frames):
+        tracker.update(dets, INNER, OUTER, frame_index=i)
+    assert _live(tracker) == survivors
+    _assert_no_stale_rows(tracker)
+
+
+def test_default_config_has_no_track_cap() -> None:
+    assert BorderCounterConfig().max_tracks is None
+
+
+def test_tracker_stats() -> None:
+    tracker = BorderEventTracker(max_missing=10, max_missing_inside=2)
+    frames = SCENARIOS["aging"]  # entra (frames 0-11), se pierde 14 frames, vuelve como objeto nuevo
+    per_frame = []
+    for i, dets in enumerate(frames):
+        tracker.update(dets, INNER, OUTER, frame_index=i)
+        per_frame.append(tracker.stats.frame_dict())
+    assert per_frame[11] == {"live": 1, "occluded": 0, "evicted": 0}
+    # Dentro del área: los misses lo marcan ocluido (la marca queda hasta la baja por max_missing)
+    assert [f["occluded"] for f in per_frame[10:14]] == [0, 0, 1, 1]
+    assert per_frame[21]["live"] == 1 and per_frame[22]["live"] == 0
+    assert per_frame[-1] == {"live": 1, "occluded": 0, "evicted": 0}
+    stats = tracker.stats.as_dict()
+    assert {k: stats[k] for k in ("live", "peak", "created", "removed", "evicted")} == {
+        "live": 1,
+        "peak": 1,
+        "created": 2,
+        "removed": 1,
+        "evicted": 0,
+    }
+    assert stats["store_bytes"] == tracker._store.nbytes > 0
+
+
+def test_tracker_stats_in_run_outputs(tmp_path, moving_box, run_cfg, blob_detector) -> None:
+    cfg = run_cfg(moving_box, border=replace(MAIN.border, warmup=5), log_tracker=True, save_video=False)
+    result = main.run(cfg, detector=blob_detector())
+    meta = json.loads(Path(result["meta"]).read_text(encoding="utf-8"))
+    frames = [json.loads(line) for line in next((tmp_path / "out").glob("frames_*.jsonl")).read_text().splitlines()]
+    assert meta["tracker"]["created"] >= 1
+    assert meta["tracker"]["peak"] == max(f["tracker"]["live"] for f in frames)
+    assert frames[-1]["tracker"]["live"] == meta["tracker"]["live"]
+
+
+def _stride_scene() -> list[list[dict]]:
+    # Cajas de 30 px a 6 px/frame: con stride 4 el IoU entre frames inferidos (0.11) queda bajo el umbral.
+    # Una caja entra y se detiene, una "folio" cruza el área entera y otra caja sube y se detiene.
+    n = 90
+    enter = [_det(min(6 * t, 204), 180, size=30) for t in range(n)]
+    cross = [_det(-40 + 6 * t, 120, name="folio", size=30) for t in range(n)]
+    rise = [_det(240, max(420 - 6 * t, 216), size=30) if t >= 10 else None for t in range(n)]
+    return _merge(enter, cross, rise)
+
+
+def _stride_events(tracker, frames: list[list[dict]], stride: int) -> list[tuple[str, int, str]]:
+    events = []
+    for i in range(0, len(frames), stride):
+        events += [(ev.event_type, ev.obj_id, ev.class_name) for ev in tracker.update(frames[i], INNER, OUTER, frame_index=i)]
+    return events
+
+
+def test_stride_counts_match_with_motion_prediction() -> None:
+    frames = _stride_scene()
+    events = {s: _stride_events(BorderEventTracker(predict_motion=True), frames, s) for s in (1, 2, 4)}
+    assert events[1] == [("enter", 1, "cajas"), ("enter", 2, "folio"), ("enter", 3, "cajas"), ("exit", 2, "folio")]
+    assert events[2] == events[1]
+    assert events[4] == events[1]
+    # Sin predicción el stride 4 pierde el seguimiento (la escena realmente lo exige)
+    assert _stride_events(BorderEventTracker(), frames, 4) != events[1]
+
+
+def test_fresh_track_needs_overlap() -> None:
+    # Un objeto visto una vez no se queda con otra caja cercana que no lo solapa
+    tracker = BorderEventTracker(predict_motion=True)
+    tracker.update([_det(400, 10)], INNER, OUTER, frame_index=0)
+    tracker.update([_det(445, 10)], INNER, OUTER, frame_index=1)  # a 0.8 diagonales, sin solape
+    assert _live(tracker) == [1, 2]
+
+
+def test_occluded_object_is_not_extrapolated() -> None:
+    # Entra rápido, se detiene dentro y queda tapado 2 frames: al reaparecer quieto es el mismo objeto
+    tracker = BorderEventTracker(predict_motion=True, in_frames=2)
+    frames = [[_det(100 + 12 * t, 180)] for t in range(8)] + [[]] * 2 + [[_det(184, 180)] for _ in range(3)]
+    events = []
+    for i, dets in enumerate(frames):
+        events += [(ev.event_type, ev.obj_id) for ev in tracker.update(dets, INNER, OUTER, frame_index=i)]
+    assert events == [("enter", 1)]
+    assert _live(tracker) == [1]
+
+
+@pytest.mark.parametrize("stride", [1, 2, 4])
+def test_max_missing_counts_skipped_frames(stride: int) -> None:
+    # Un objeto afuera deja de verse: se da de baja tras max_missing frames del video, sea cual sea el stride
+    tracker = BorderEventTracker(max_missing=10)
+    tracker.update([_det(400, 10)], INNER, OUTER, frame_index=0)
+    alive = []
+    for i in range(stride, 25, stride):
+        tracker.update([], INNER, OUTER, frame_index=i)
+        alive.append((i, tracker.stats.live))
+    gone = next(i for i, live in alive if live == 0)
+    # Como antes, el frame de creación ya cuenta como un miss: con stride 1 la baja es en el frame 10
+    assert 10 <= gone < 10 + stride
@@ -106,6 +106,12 @@ def main():
         inner_ratio_min=border_cfg.inner_ratio_min,
         prevent_recount=border_cfg.prevent_recount,
         ocluded_ttl=border_cfg.ocluded_ttl,
+        max_tracks=border_cfg.max_tracks,
+        evict_by=border_cfg.evict_by,
+        predict_motion=border_cfg.predict_motion,
+        motion_alpha=border_cfg.motion_alpha,
+        max_predict_gap=border_cfg.max_predict_gap,
+        motion_gate=border_cfg.motion_gate,
     )
     counter = BorderCounter(
         start_count=border_cfg.start_count,
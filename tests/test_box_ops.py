@@ -0,0 +1,26 @@
+import numpy as np
+
+from core import iou_matrix
+from tests.reference_border_tracker import _iou
+
+
+def test_iou_matrix_matches_pairwise_iou() -> None:
+    rng = np.random.default_rng(0)
+    xy = rng.uniform(0, 200, size=(40, 2))
+    wh = rng.uniform(-5, 80, size=(40, 2))  # incluye cajas degeneradas (ancho/alto <= 0)
+    boxes = np.concatenate([xy, xy + wh], axis=1)
+    a, b = boxes[:15], boxes[15:]
+    got = iou_matrix(a, b)
+    assert got.shape == (15, 25) and got.dtype == np.float64
+    expected = [[_iou(list(x), list(y)) for y in b] for x in a]
+    np.testing.assert_allclose(got, expected, rtol=0, atol=1e-12)
+
+
+def test_iou_matrix_edge_cases() -> None:
+    box = [10.0, 10.0, 20.0, 20.0]
+    assert iou_matrix([box], [box])[0, 0] == 1.0
+    assert iou_matrix([box], [[20.0, 10.0, 30.0, 20.0]])[0, 0] == 0.0  # se tocan en un borde
+    assert iou_matrix([box], [[15.0, 10.0, 25.0, 20.0]])[0, 0] == 50.0 / 150.0
+    assert iou_matrix([[0.0, 0.0, 0.0, 0.0]], [[0.0, 0.0, 0.0, 0.0]])[0, 0] == 0.0  # unión vacía
+    assert iou_matrix(np.zeros((0, 4)), [box]).shape == (0, 1)
+    assert iou_matrix([box], np.zeros((0, 4))).shape == (1, 0)
@@ -0,0 +1,46 @@
+import json
+from dataclasses import replace
+from pathlib import Path
+
+import main
+from config.settings import MAIN
+from tests.conftest import BlobDetector, read_events
+
+
+class InterruptingDetector(BlobDetector):
+    """BlobDetector que simula un Ctrl+C al recibir el frame `stop_at`."""
+
+    def __init__(self, stop_at: int) -> None:
+        super().__init__()
+        self.stop_at = stop_at
+
+    def detect(self, image, frame_index=None, image_path=None, scale=1.0, roi=None) -> dict:
+        if frame_index == self.stop_at:
+            raise KeyboardInterrupt
+        return super().detect(image, frame_index, image_path, scale, roi)
+
+
+def test_interrupt_and_resume_matches_uninterrupted_run(tmp_path, moving_box, run_cfg) -> None:
+    kw = dict(border=replace(MAIN.border, warmup=5), save_video=True, checkpoint_every=50, checkpoint_max_overhead=0.0)
+    expected = main.run(run_cfg(moving_box, outdir=str(tmp_path / "ref"), **kw), detector=BlobDetector())
+
+    out = tmp_path / "out"
+    cfg = run_cfg(moving_box, **kw)
+    first = main.run(cfg, detector=InterruptingDetector(stop_at=150))
+    assert (out / "checkpoint.pkl").exists()
+    assert first["frames"] < len(list(moving_box.glob("*.png")))
+    # Lo escrito después del último checkpoint (frame 100) se descarta al reanudar
+    assert any(ev["frame_index"] > 100 for ev in read_events(out))
+
+    resumed = main.run(replace(cfg, resume=True), detector=BlobDetector())
+    assert not (out / "checkpoint.pkl").exists()
+    assert resumed["run_id"] == first["run_id"]
+    assert (resumed["frames"], resumed["count"]) == (expected["frames"], expected["count"])
+    assert resumed["module_counts"] == expected["module_counts"]
+    assert read_events(out) == read_events(tmp_path / "ref")
+
+    meta = json.loads(Path(resumed["meta"]).read_text(encoding="utf-8"))
+    assert meta["checkpoint"]["resumes"] == 1
+    segments = [Path(p) for p in meta["video_segments"]]
+    assert all(p.exists() for p in segments)
+    assert sorted(p for p in out.iterdir() if p.suffix in (".mp4", ".avi")) == sorted(segments)
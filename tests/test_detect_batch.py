@@ -0,0 +1,145 @@
+import sys
+import types
+
+import numpy as np
+import pytest
+
+import core.detector_yolo as detector_yolo
+from core.detector_yolo import DetectorYolo
+import main
+from tests.conftest import BlobDetector, read_events
+
+NAMES = {0: "cajas"}
+
+
+def _box(img) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Una caja = toda la imagen recibida; el score identifica el frame
+    h, w = img.shape[:2]
+    return np.array([[0, 0, w, h]], np.float32), np.array([img.mean() / 255.0], np.float32), np.array([0])
+
+
+class _Tensor:
+    def __init__(self, arr) -> None:
+        self.arr = np.asarray(arr)
+
+    def cpu(self) -> "_Tensor":
+        return self
+
+    def numpy(self) -> np.ndarray:
+        return self.arr
+
+
+class _Boxes:
+    def __init__(self, xyxy, conf, cls, ids=None) -> None:
+        self.xyxy, self.conf, self.cls = _Tensor(xyxy), _Tensor(conf), _Tensor(cls)
+        self.id = _Tensor(ids) if ids is not None else None
+
+    def __len__(self) -> int:
+        return len(self.xyxy.arr)
+
+
+class FakeYOLO:
+    """Modelo falso de Ultralytics: registra (método, imágenes, imgsz) de cada llamada."""
+
+    names = NAMES
+
+    def __init__(self, weights) -> None:
+        self.calls: list[tuple[str, int, int]] = []
+
+    def _results(self, method: str, source, imgsz: int, track: bool = False) -> list:
+        images = source if isinstance(source, list) else [source]
+        self.calls.append((method, len(images), imgsz))
+        out = []
+        for img in images:
+            boxes = _Boxes(*_box(img), ids=[7.0] if track else None)
+            out.append(types.SimpleNamespace(boxes=boxes, orig_shape=img.shape[:2]))
+        return out
+
+    def predict(self, source, conf, imgsz, device, verbose):
+        return self._results("predict", source, imgsz)
+
+    def track(self, source, conf, imgsz, device, tracker, persist, verbose):
+        return self._results("track", source, imgsz, track=True)
+
+
+class FakeOnnx:
+    names = NAMES
+
+    def __init__(self, onnx_path, conf, threads) -> None:
+        self.calls: list[tuple[str, int, int]] = []
+
+    def predict(self, images, imgsz):
+        self.calls.append(("predict", len(images), imgsz))
+        return [_box(img) for img in images]
+
+
+@pytest.fixture(params=["torch", "onnx"])
+def make_detector(request, monkeypatch):
+    monkeypatch.setitem(sys.modules, "ultralytics", types.SimpleNamespace(YOLO=FakeYOLO))
+    monkeypatch.setattr(detector_yolo, "export_onnx", lambda weights, imgsz: "model.onnx")
+    monkeypatch.setattr(detector_yolo, "OnnxYolo", FakeOnnx)
+
+    def make(mode: str = "predict") -> tuple[DetectorYolo, list]:
+        det = DetectorYolo("model.pt", mode=mode, imgsz=640, roi_imgsz=320, backend=request.param)
+        return det, (det.onnx or det.model).calls
+
+    make.backend = request.param
+    return make
+
+
+def _frames(n: int) -> list[np.ndarray]:
+    return [np.full((48, 64, 3), 20 * (i + 1), dtype=np.uint8) for i in range(n)]
+
+
+def _same(a: dict, b: dict) -> None:
+    assert (a["frame_index"], a["image_path"], a["image_size"]) == (b["frame_index"], b["image_path"], b["image_size"])
+    da, db = a["detections"], b["detections"]
+    assert np.array_equal(da.xyxy, db.xyxy) and np.array_equal(da.conf, db.conf)
+    assert np.array_equal(da.class_id, db.class_id)
+
+
+def test_detect_batch_matches_detect(make_detector) -> None:
+    det, calls = make_detector()
+    images = _frames(4)
+    kw = dict(
+        frame_indices=[10, 11, 12, 13],
+        paths=[f"f{i}.png" for i in range(4)],
+        scales=[1.0, 2.0, 1.0, 2.0],
+        rois=[None, [8, 4, 72, 60], None, [0, 0, 40, 40]],
+    )
+    batch = det.detect_batch(images, **kw)
+    # Frames completos y recortes ROI en dos pasadas, cada una a su imgsz
+    assert calls == [("predict", 2, 640), ("predict", 2, 320)]
+    assert [r["frame_index"] for r in batch] == kw["frame_indices"]
+    for i, img in enumerate(images):
+        single = det.detect(
+            img, frame_index=kw["frame_indices"][i], image_path=kw["paths"][i], scale=kw["scales"][i], roi=kw["rois"][i]
+        )
+        _same(batch[i], single)
+    # El recorte vuelve a coordenadas del frame completo (píxeles originales)
+    assert batch[1]["detections"].xyxy.tolist() == [[8.0, 4.0, 72.0, 60.0]]
+    assert batch[1]["image_size"] == (128, 96)
+    assert det.detect_batch([]) == []
+
+
+def test_detect_batch_track_mode_is_frame_by_frame(make_detector) -> None:
+    if make_detector.backend == "onnx":
+        with pytest.raises(ValueError):
+            make_detector(mode="track")
+        return
+    det, calls = make_detector(mode="track")
+    out = det.detect_batch(_frames(3), frame_indices=[0, 1, 2])
+    assert calls == [("track", 1, 640)] * 3
+    assert [r["frame_index"] for r in out] == [0, 1, 2]
+    assert all(r["detections"].track_id.tolist() == [7] for r in out)
+
+
+def test_run_batch_size_matches_single_frames(tmp_path, moving_box, run_cfg) -> None:
+    results, events = {}, {}
+    for batch_size in (1, 4):
+        outdir = tmp_path / f"out_{batch_size}"
+        cfg = run_cfg(moving_box, outdir=str(outdir), batch_size=batch_size, pipeline=False, save_video=False)
+        results[batch_size] = main.run(cfg, detector=BlobDetector())
+        events[batch_size] = read_events(outdir)
+    assert events[4] and events[4] == events[1]
+    assert (results[4]["count"], results[4]["module_counts"]) == (results[1]["count"], results[1]["module_counts"])
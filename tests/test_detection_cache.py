@@ -0,0 +1,121 @@
+import os
+
+import cv2
+
+import main
+from core import CachedDetector, DetectionCache, frame_key
+from core.frame_loader import FrameLoader
+from tests.conftest import BlobDetector, write_moving_box
+
+SETTINGS = {"weights_sha256": "abc", "imgsz": 640, "conf": 0.25, "mode": "predict"}
+
+
+class CountingDetector(BlobDetector):
+    def __init__(self) -> None:
+        super().__init__()
+        self.paths: list[str] = []
+
+    def detect(self, image, frame_index=None, image_path=None, scale=1.0, roi=None) -> dict:
+        self.paths.append(image_path)
+        return super().detect(image, frame_index, image_path, scale, roi)
+
+
+def _detect_all(cached: CachedDetector, folder, limit: int | None = None) -> list:
+    out = []
+    for i, p in enumerate(sorted(folder.glob("*.png"))[:limit]):
+        out.append(cached.detect(cv2.imread(str(p)), frame_index=i, image_path=str(p))["detections"])
+    return out
+
+
+def test_hit_after_miss(tmp_path, moving_box) -> None:
+    db = tmp_path / "cache.sqlite"
+    first = CountingDetector()
+    cache = DetectionCache(db, SETTINGS)
+    fresh = _detect_all(CachedDetector(cache, lambda: first), moving_box)
+    cache.close()
+    assert (cache.stats.hits, cache.stats.misses) == (0, 240)
+
+    second = CountingDetector()
+    cache = DetectionCache(db, SETTINGS)
+    cached = _detect_all(CachedDetector(cache, lambda: second), moving_box)
+    cache.close()
+    assert (cache.stats.hits, cache.stats.misses) == (240, 0)
+    assert second.paths == []
+    for a, b in zip(fresh, cached):
+        assert a.names == b.names
+        assert (a.class_id == b.class_id).all()
+        assert abs(a.xyxy - b.xyxy).max(initial=0.0) == 0.0
+
+
+def test_changed_file_is_a_miss(tmp_path, moving_box) -> None:
+    db = tmp_path / "cache.sqlite"
+    cache = DetectionCache(db, SETTINGS)
+    _detect_all(CachedDetector(cache, CountingDetector), moving_box)
+    cache.close()
+
+    frame = moving_box / "frame_3.png"
+    st = frame.stat()
+    os.utime(frame, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    with open(moving_box / "frame_5.png", "ab") as f:
+        f.write(b"\0")
+
+    det = CountingDetector()
+    cache = DetectionCache(db, SETTINGS)
+    _detect_all(CachedDetector(cache, lambda: det), moving_box)
+    cache.close()
+    assert cache.stats.misses == 2
+    assert sorted(os.path.basename(p) for p in det.paths) == ["frame_3.png", "frame_5.png"]
+
+
+def test_settings_change_is_a_miss(tmp_path, moving_box) -> None:
+    db = tmp_path / "cache.sqlite"
+    cache = DetectionCache(db, SETTINGS)
+    _detect_all(CachedDetector(cache, CountingDetector), moving_box)
+    cache.close()
+
+    cache = DetectionCache(db, {**SETTINGS, "conf": 0.5})
+    assert cache.stats.preloaded == 0
+    _detect_all(CachedDetector(cache, CountingDetector), moving_box)
+    cache.close()
+    assert (cache.stats.hits, cache.stats.misses) == (0, 240)
+
+
+def test_scope_preloads_only_its_prefix(tmp_path) -> None:
+    write_moving_box(tmp_path / "cam_a", n=6)
+    write_moving_box(tmp_path / "cam_b", n=4)
+    db = tmp_path / "cache.sqlite"
+    cache = DetectionCache(db, SETTINGS)
+    cached = CachedDetector(cache, CountingDetector)
+    _detect_all(cached, tmp_path / "cam_a")
+    _detect_all(cached, tmp_path / "cam_b")
+    cache.close()
+
+    cache = DetectionCache(db, SETTINGS, scope=(str(tmp_path / "cam_b") + os.sep,))
+    assert cache.stats.preloaded == 4
+    # Fuera del scope: se consulta la fila puntual
+    det = CountingDetector()
+    _detect_all(CachedDetector(cache, lambda: det), tmp_path / "cam_a")
+    cache.close()
+    assert cache.stats.hits == 6
+    assert det.paths == []
+
+
+def test_track_mode_partial_coverage_is_write_only(tmp_path, moving_box, run_cfg) -> None:
+    db = tmp_path / "cache.sqlite"
+    cache = DetectionCache(db, SETTINGS)
+    _detect_all(CachedDetector(cache, CountingDetector), moving_box, limit=10)
+    cache.close()
+
+    cfg = run_cfg(moving_box, mode="track")
+    loader = FrameLoader(moving_box)
+    cache = DetectionCache(db, SETTINGS, scope=main._cache_scope([loader]))
+    main._check_cache_coverage(cfg, loader, cache)
+    assert cache.reads is False
+    assert cache.get(frame_key(str(moving_box / "frame_0.png"), 0)) is None
+    cache.close()
+
+    cache = DetectionCache(db, SETTINGS, scope=main._cache_scope([loader]))
+    main._check_cache_coverage(run_cfg(moving_box, mode="predict"), loader, cache)
+    assert cache.reads is True
+    assert cache.get(frame_key(str(moving_box / "frame_0.png"), 0)) is not None
+    cache.close()
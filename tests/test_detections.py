@@ -0,0 +1,79 @@
+import numpy as np
+
+from core import Detections, as_detections
+from core.detections import _class_ids
+
+NAMES = {0: "area_de_trabajo_pallet", 1: "persona", 2: "cajas"}
+
+
+def _dets(names=NAMES) -> Detections:
+    return Detections(
+        [[0, 0, 10, 10], [5, 5, 20, 20], [1, 2, 3, 4], [30, 30, 60, 60]],
+        [2, 1, 2, 0],
+        [0.9, 0.4, 0.2, 0.8],
+        [7, -1, 3, -1],
+        names=names,
+    )
+
+
+def test_columns_and_dict_rows() -> None:
+    dets = _dets()
+    assert len(dets) == 4
+    assert dets.xyxy.dtype == np.float64 and dets.class_id.dtype == np.int16
+    assert dets[0] == {
+        "class_id": 2,
+        "class_name": "cajas",
+        "conf": 0.9,
+        "bbox_xyxy": [0.0, 0.0, 10.0, 10.0],
+        "track_id": 7,
+    }
+    assert dets[-1]["class_name"] == "area_de_trabajo_pallet"
+    assert dets[1]["track_id"] is None
+    assert [d["class_name"] for d in dets] == dets.class_names == ["cajas", "persona", "cajas", "area_de_trabajo_pallet"]
+
+
+def test_views_share_the_names_table() -> None:
+    dets = _dets()
+    sub = dets[1:3]
+    assert isinstance(sub, Detections) and len(sub) == 2 and sub.names is dets.names
+    boxes = dets.select(["cajas"], conf_min=0.5)
+    assert boxes.class_names == ["cajas"] and boxes.track_id.tolist() == [7]
+    assert dets.select(conf_min=0.5).conf.tolist() == [0.9, 0.8]
+    assert dets.scaled(0.5).xyxy[3].tolist() == [15.0, 15.0, 30.0, 30.0]
+    assert len(Detections.empty(NAMES)) == 0 and Detections.empty(NAMES).select(["cajas"]).names == NAMES
+
+
+def test_class_ids_resolved_once_per_names_table() -> None:
+    # Dos frames con la misma tabla (aunque sea otro dict) reutilizan los ids resueltos
+    a, b = _dets(), _dets(dict(NAMES))
+    assert a.class_mask(["cajas", "persona"]).tolist() == [True, True, True, False]
+    assert b.class_mask({"persona", "cajas"}).tolist() == [True, True, True, False]
+    assert _class_ids(a.names, frozenset({"cajas", "persona"})) is _class_ids(b.names, frozenset({"persona", "cajas"}))
+    # Otra tabla con los mismos nombres en otros ids no comparte entrada
+    other = _dets({0: "cajas", 1: "persona", 2: "area_de_trabajo_pallet"})
+    assert other.class_mask(["cajas"]).tolist() == [False, False, False, True]
+
+
+def test_from_dicts_keeps_ids_unique() -> None:
+    dets = Detections.from_dicts(
+        [
+            {"class_id": 1, "class_name": "persona", "conf": 0.7, "bbox_xyxy": [0, 0, 1, 1]},
+            {"class_id": 1, "class_name": "cajas", "conf": 0.6, "bbox_xyxy": [1, 1, 2, 2], "track_id": 4},
+            {"class_name": "folio", "conf": 0.5, "bbox_xyxy": [2, 2, 3, 3]},
+            {"class_id": 9, "class_name": "cajas", "conf": 0.4, "bbox_xyxy": [3, 3, 4, 4], "track_id": None},
+        ]
+    )
+    assert dets.class_names == ["persona", "cajas", "folio", "cajas"]
+    assert len(set(dets.names.values())) == len(dets.names)
+    assert dets.class_id[1] == dets.class_id[3] != dets.class_id[0]
+    assert dets.track_id.tolist() == [-1, 4, -1, -1]
+    assert Detections.from_dicts([]).xyxy.shape == (0, 4)
+
+
+def test_as_detections() -> None:
+    dets = _dets()
+    assert as_detections(dets) is dets
+    rows = dets.to_dicts()
+    again = as_detections(rows)
+    assert again.class_names == dets.class_names
+    assert np.array_equal(again.xyxy, dets.xyxy) and np.array_equal(again.conf, dets.conf)
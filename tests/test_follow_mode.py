@@ -0,0 +1,48 @@
+import os
+
+from core import FrameLoader
+from core.frame_loader import _natural_key
+from core.frame_watcher import FolderWatcher
+
+
+def test_follow_prefetch_matches_plain_loader(frames) -> None:
+    folder = frames(12, seed=5)
+    expected = [(f.index, f.path.name) for f in FrameLoader(folder, step=2)]
+    loader = FrameLoader(folder, step=2, prefetch=2, follow=True, poll_interval=0.01, idle_timeout=0.05)
+    assert [(f.index, f.path.name) for f in loader] == expected
+    assert loader.stats.frames == len(expected)
+
+
+def _touch_dir(folder, tick: int) -> None:
+    # mtime del directorio en ns: forzar el relistado aunque el FS tenga poca resolución
+    os.utime(folder, ns=(tick, tick))
+
+
+def test_watcher_forgets_rotated_names(tmp_path) -> None:
+    # Modo follow de larga duración: el estado del watcher se recorta al listado actual
+    watcher = FolderWatcher(tmp_path, exts=[".png"], settle_polls=0, sort_key=_natural_key)
+    seen = []
+    for i in range(30):
+        (tmp_path / f"frame_{i}.png").write_bytes(b"x")
+        if i >= 5:
+            # La cámara rota: solo quedan los últimos 5 frames en disco
+            (tmp_path / f"frame_{i - 5}.png").unlink()
+        _touch_dir(tmp_path, i + 1)
+        seen += [p.name for p in watcher.poll()]
+    assert seen == [f"frame_{i}.png" for i in range(30)]
+    assert watcher.pending == 0
+    assert vars(watcher)["_seen"][str(tmp_path)] == {f"frame_{i}.png" for i in range(25, 30)}
+
+
+def test_watcher_accepts_late_files(tmp_path) -> None:
+    watcher = FolderWatcher(tmp_path, exts=[".png"], settle_polls=0, sort_key=_natural_key)
+    for name in ("frame_10.png", "frame_11.png"):
+        (tmp_path / name).write_bytes(b"x")
+    _touch_dir(tmp_path, 1)
+    assert [p.name for p in watcher.poll()] == ["frame_10.png", "frame_11.png"]
+    # Un frame con nombre anterior llega tarde (p.ej. subida reintentada)
+    (tmp_path / "frame_9.png").write_bytes(b"x")
+    _touch_dir(tmp_path, 2)
+    assert [p.name for p in watcher.poll()] == ["frame_9.png"]
+    _touch_dir(tmp_path, 3)
+    assert watcher.poll() == []
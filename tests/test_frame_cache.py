@@ -0,0 +1,52 @@
+import threading
+
+import cv2
+
+import main
+from core.frame_cache import FrameCache
+
+
+class _TrackedCache(FrameCache):
+    # Registra cuántos frames decodificados esperan al escritor en cada escritura
+    def _write_all(self, f, images, entries: list) -> int:
+        def consume():
+            for img in images:
+                with self.lock:
+                    self.consumed += 1
+                yield img
+
+        return super()._write_all(f, consume(), entries)
+
+
+def test_build_keeps_a_bounded_window(tmp_path, frames) -> None:
+    files = sorted(frames(40, seed=8).glob("*.png"))
+    lock = threading.Lock()
+    ahead = []
+
+    def read(path):
+        with lock:
+            cache.started += 1
+            ahead.append(cache.started - cache.consumed)
+        return cv2.imread(str(path))
+
+    cache = _TrackedCache(tmp_path / "cache", files, read_fn=read, workers=4, queue_size=3)
+    cache.lock, cache.started, cache.consumed = lock, 0, 0
+    cache.open()
+    assert cache.report()["frames"] == 40
+    assert max(ahead) <= 3 + 1
+    assert cache.image(0) is not None and cache.image(39) is not None
+
+
+def test_follow_ignores_frame_cache(tmp_path, frames, run_cfg, pixel_detector) -> None:
+    cfg = run_cfg(
+        frames(5, seed=9),
+        follow=True,
+        follow_poll=0.01,
+        follow_idle_timeout=0.05,
+        frame_cache=True,
+        frame_cache_dir=str(tmp_path / "cache"),
+        save_video=False,
+    )
+    result = main.run(cfg, detector=pixel_detector)
+    assert result["frames"] == 5
+    assert not (tmp_path / "cache").exists()
@@ -0,0 +1,59 @@
+import os
+
+from core.frame_loader import FrameLoader, _natural_key
+from core.frame_manifest import FrameManifest
+
+EXTS = {".png", ".jpg"}
+
+
+def _manifest(tmp_path, folder) -> FrameManifest:
+    return FrameManifest(tmp_path / "manifest" / "manifest.json", folder, exts=EXTS, sort_key=_natural_key)
+
+
+def _touch_dir(folder) -> None:
+    # El mtime de la carpeta puede no cambiar dentro del mismo tick del reloj
+    st = folder.stat()
+    os.utime(folder, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+
+def test_manifest_built_then_reused(tmp_path, frames) -> None:
+    folder = frames(12, seed=5)
+    (folder / "notes.txt").write_text("x")
+    first = _manifest(tmp_path, folder).load_or_build()
+    assert first.stats.mode == "built" and first.stats.new == 12
+    assert first.paths() == FrameLoader(folder).paths()
+
+    second = _manifest(tmp_path, folder).load_or_build()
+    assert second.stats.mode == "reused"
+    assert second.paths() == first.paths()
+
+
+def test_manifest_incremental_update(tmp_path, frames) -> None:
+    folder = frames(12, seed=6)
+    _manifest(tmp_path, folder).load_or_build()
+
+    (folder / "frame_3.png").unlink()
+    (folder / "frame_12.png").write_bytes((folder / "frame_0.png").read_bytes())
+    (folder / "frame_5.png").write_bytes((folder / "frame_1.png").read_bytes() + b"\0")
+    _touch_dir(folder)
+
+    manifest = _manifest(tmp_path, folder).load_or_build()
+    s = manifest.stats
+    assert (s.mode, s.new, s.changed, s.removed, s.files) == ("incremental", 1, 1, 1, 12)
+    assert manifest.paths() == FrameLoader(folder).paths()
+
+
+def test_invalid_frames_do_not_consume_index(tmp_path, frames) -> None:
+    folder = frames(8, seed=7)
+    data = (folder / "frame_2.png").read_bytes()
+    (folder / "frame_2.png").write_bytes(data[: len(data) // 2])
+
+    manifest = _manifest(tmp_path, folder).load_or_build()
+    assert manifest.stats.invalid == 1
+    assert [p.name for p in manifest.invalid_paths()] == ["frame_2.png"]
+
+    loader = FrameLoader(folder, manifest_dir=tmp_path / "manifest")
+    got = [(f.index, f.path.name) for f in loader]
+    names = [f"frame_{i}.png" for i in (0, 1, 3, 4, 5, 6, 7)]
+    assert got == list(enumerate(names))
+    assert loader.manifest.stats.mode == "built"
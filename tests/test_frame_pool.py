@@ -0,0 +1,40 @@
+import cv2
+import numpy as np
+
+import main
+from core import FramePool
+
+
+def test_reuse_buffers_with_frame_cache(tmp_path, frames, run_cfg, pixel_detector) -> None:
+    # El cache entrega vistas memmap de solo lectura: no se puede dibujar en el lugar
+    cfg = run_cfg(
+        frames(6, seed=3),
+        frame_cache=True,
+        frame_cache_dir=str(tmp_path / "cache"),
+        reuse_buffers=True,
+        save_video=True,
+    )
+    result = main.run(cfg, detector=pixel_detector)
+    assert result["frames"] == 6
+    assert pixel_detector.checked == 6 and pixel_detector.mismatched == []
+
+
+def test_frame_pool_corrupt_jpeg(tmp_path) -> None:
+    # Un JPEG que no decodifica no debe devolver el buffer con el frame anterior
+    img = np.random.default_rng(4).integers(0, 256, size=(48, 64, 3), dtype=np.uint8)
+    ok = tmp_path / "ok.jpg"
+    cv2.imwrite(str(ok), img)
+    data = ok.read_bytes()
+    (tmp_path / "garbage.jpg").write_bytes(data[:200] + bytes(300))
+    (tmp_path / "truncated.jpg").write_bytes(data[: len(data) // 2])
+
+    pool = FramePool()
+    for _ in range(2):  # la segunda lectura ya usa un buffer del pool
+        pool.release(pool.imread(str(ok)))
+    assert pool.stats.reuses == 1
+    for name in ("garbage.jpg", "truncated.jpg", "ok.jpg"):
+        path = str(tmp_path / name)
+        got, ref = pool.imread(path), cv2.imread(path)
+        assert (got is None) == (ref is None), name
+        assert got is None or np.array_equal(got, ref), name
+        pool.release(got)
@@ -0,0 +1,57 @@
+import cv2
+import numpy as np
+
+from core.frame_manifest import image_looks_valid
+from core.frame_pool import FramePool
+from core.image_files import image_complete, image_size
+
+
+def _write(tmp_path, name: str):
+    img = np.random.default_rng(6).integers(0, 256, size=(48, 64, 3), dtype=np.uint8)
+    path = tmp_path / name
+    cv2.imwrite(str(path), img)
+    return path
+
+
+def test_image_complete(tmp_path) -> None:
+    jpg, png = _write(tmp_path, "a.jpg"), _write(tmp_path, "a.png")
+    assert image_complete(jpg) is True and image_complete(png) is True
+    # Relleno después del EOI (algunas cámaras): sigue completo
+    (tmp_path / "padded.jpg").write_bytes(jpg.read_bytes() + bytes(100))
+    assert image_complete(tmp_path / "padded.jpg") is True
+    for src in (jpg, png):
+        data = src.read_bytes()
+        cut = tmp_path / f"cut{src.suffix}"
+        cut.write_bytes(data[: len(data) // 2])
+        assert image_complete(cut) is False
+        assert image_looks_valid(str(cut)) is False
+    (tmp_path / "empty.jpg").write_bytes(b"")
+    assert image_complete(tmp_path / "empty.jpg") is False
+    assert image_complete(tmp_path / "missing.jpg") is False
+    assert image_complete(_write(tmp_path, "a.bmp")) is None
+
+
+def test_frame_pool_truncated_png(tmp_path) -> None:
+    # Un PNG truncado deja el buffer sin tocar: no debe devolver el frame anterior
+    ok = _write(tmp_path, "ok.png")
+    data = ok.read_bytes()
+    (tmp_path / "cut.png").write_bytes(data[: len(data) // 2])
+    (tmp_path / "padded.jpg").write_bytes(_write(tmp_path, "ok.jpg").read_bytes() + bytes(100))
+
+    pool = FramePool()
+    for _ in range(2):
+        pool.release(pool.imread(str(ok)))
+    assert pool.imread(str(tmp_path / "cut.png")) is None
+    got = pool.imread(str(tmp_path / "padded.jpg"))
+    assert np.array_equal(got, cv2.imread(str(tmp_path / "padded.jpg")))
+    assert pool.stats.reuses == 2
+
+
+def test_image_size_from_header(tmp_path) -> None:
+    img = np.zeros((37, 53, 3), dtype=np.uint8)
+    for name, params in (("a.jpg", []), ("p.jpg", [cv2.IMWRITE_JPEG_PROGRESSIVE, 1]), ("a.png", [])):
+        cv2.imwrite(str(tmp_path / name), img, params)
+        assert image_size(tmp_path / name) == (53, 37), name
+    assert image_size(_write(tmp_path, "a.bmp")) is None
+    (tmp_path / "junk.jpg").write_bytes(b"\xff\xd8" + bytes(50))
+    assert image_size(tmp_path / "junk.jpg") is None
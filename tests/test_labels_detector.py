@@ -0,0 +1,65 @@
+import json
+
+import cv2
+import pytest
+
+import main
+from core import FrameLoader, LabelsDetector
+from tests.conftest import BlobDetector, read_events
+
+
+def _write_labels(frames_dir, labels_dir) -> None:
+    # Mismo formato que utils/detect_img.py: class x1 y1 x2 y2 conf
+    labels_dir.mkdir(parents=True)
+    det = BlobDetector()
+    for path in frames_dir.glob("*.png"):
+        dets = det.detect(cv2.imread(str(path)))["detections"]
+        lines = [
+            f"{c} {x1:.1f} {y1:.1f} {x2:.1f} {y2:.1f} {conf:.3f}"
+            for (x1, y1, x2, y2), c, conf in zip(dets.xyxy, dets.class_id, dets.conf)
+        ]
+        (labels_dir / f"{path.stem}.txt").write_text("\n".join(lines), encoding="utf-8")
+
+
+def test_labels_replay_skips_decoding(tmp_path, moving_box, run_cfg, blob_detector, monkeypatch) -> None:
+    labels = tmp_path / "pred" / "labels"
+    _write_labels(moving_box, labels)
+    (labels.parent / "names.json").write_text(json.dumps(BlobDetector.names), encoding="utf-8")
+    expected = main.run(run_cfg(moving_box, outdir=str(tmp_path / "ref"), save_video=False), detector=blob_detector())
+
+    def no_decode(self, path):
+        raise AssertionError(f"decoded {path}")
+
+    monkeypatch.setattr(FrameLoader, "_decode", no_decode)
+    cfg = run_cfg(moving_box, outdir=str(tmp_path / "labels"), detector="labels", labels_dir=str(labels), save_video=False)
+    result = main.run(cfg)
+    assert result["count"] == expected["count"]
+    assert read_events(tmp_path / "labels") == read_events(tmp_path / "ref")
+
+
+def test_header_only_frame_size(frames) -> None:
+    folder = frames(3, seed=2)
+    plain = [(f.width, f.height, f.image.shape) for f in FrameLoader(folder)]
+    loader = FrameLoader(folder, header_only=True)
+    frames_ = list(loader)
+    assert [(f.width, f.height, f.image.shape) for f in frames_] == plain
+    assert all(f.image.base is not None and not f.image.flags.writeable for f in frames_)
+
+
+def test_names_fallback(tmp_path, moving_box, run_cfg, monkeypatch) -> None:
+    labels = tmp_path / "pred" / "labels"
+    _write_labels(moving_box, labels)
+    names = tuple(BlobDetector.names.values())
+
+    cfg = run_cfg(moving_box, detector="labels", labels_dir=str(labels), class_names=names)
+    detector, _ = main._open_detector(cfg, main._check_detector_cfg(cfg), None)
+    assert detector.names == BlobDetector.names
+
+    # Sin tabla en la config: la del modelo
+    monkeypatch.setattr(main, "load_detector", lambda cfg, weights=None: BlobDetector())
+    cfg = run_cfg(moving_box, detector="labels", labels_dir=str(labels), class_names=None)
+    detector, _ = main._open_detector(cfg, main._check_detector_cfg(cfg), None)
+    assert detector.names == BlobDetector.names
+
+    with pytest.raises(FileNotFoundError):
+        LabelsDetector(labels)
@@ -0,0 +1,21 @@
+from dataclasses import replace
+import json
+from pathlib import Path
+
+import main
+from config.settings import MAIN
+from tests.conftest import read_events
+
+
+def test_motion_gate_keeps_count_on_moving_object(tmp_path, moving_box, run_cfg, blob_detector) -> None:
+    border = replace(MAIN.border, warmup=5)
+    results = {}
+    for gate in (False, True):
+        cfg = run_cfg(moving_box, outdir=str(tmp_path / f"out_{gate}"), border=border, motion_gate=gate, save_video=False)
+        results[gate] = main.run(cfg, detector=blob_detector())
+        results[gate]["events"] = read_events(tmp_path / f"out_{gate}")
+    meta = json.loads(Path(results[True]["meta"]).read_text(encoding="utf-8"))
+    assert results[False]["count"] > 0
+    assert meta["motion_gate"]["reused"] > 0
+    assert results[True]["count"] == results[False]["count"]
+    assert len(results[True]["events"]) == len(results[False]["events"])
@@ -0,0 +1,28 @@
+from dataclasses import replace
+
+import main
+from config.settings import MAIN
+
+
+def test_cameras_decode_process_keeps_frame_pixels(tmp_path, frames, pixel_detector, monkeypatch) -> None:
+    # Una cámara se agota antes: los frames de la otra no deben quedar sobre slots reciclados del anillo shm
+    frames(4, seed=1, name="primary_camera/img")
+    frames(30, seed=2, name="secondary_camera/img")
+    monkeypatch.setattr(main, "load_detector", lambda cfg, weights=None: pixel_detector)
+    cfg = replace(
+        MAIN,
+        cameras_root=str(tmp_path),
+        outdir=str(tmp_path / "out"),
+        detector="yolo",
+        mode="predict",
+        source="frames",
+        decode_process=True,
+        shm_slots=2,
+        batch_size=1,
+        save_video=False,
+        detection_cache=False,
+        limit=None,
+    )
+    main._main_cameras(cfg, tmp_path / "model.pt")
+    assert pixel_detector.checked == 34
+    assert pixel_detector.mismatched == [], pixel_detector.mismatched
@@ -0,0 +1,71 @@
+import numpy as np
+
+from core.onnx_backend import letterbox, nms, postprocess, preprocess
+
+
+def test_letterbox_square_and_rect() -> None:
+    img = np.zeros((481, 640, 3), dtype=np.uint8)
+    out, gain, pad = letterbox(img, 1024)
+    assert out.shape == (1024, 1024, 3) and gain == 1.6
+    assert pad == (0.0, 127.0)  # (1024 - 770) / 2 = 127
+    # rect (Ultralytics con export dinámico): relleno mínimo hasta múltiplo de 32
+    out, gain, pad = letterbox(img, 1024, auto=True, stride=32)
+    assert out.shape == (800, 1024, 3) and gain == 1.6
+    assert pad == (0.0, 15.0)
+    assert (out[:15] == 114).all() and (out[-15:] == 114).all()
+
+
+def test_preprocess_rect_only_for_same_shapes() -> None:
+    a = np.zeros((480, 640, 3), dtype=np.uint8)
+    b = np.zeros((640, 480, 3), dtype=np.uint8)
+    batch, metas = preprocess([a, a], 640, auto=True)
+    assert batch.shape == (2, 3, 480, 640) and batch.dtype == np.float32
+    assert metas[0] == (1.0, (0.0, 0.0), (480, 640))
+    batch, _ = preprocess([a, b], 640, auto=True)
+    assert batch.shape == (2, 3, 640, 640)
+
+
+def test_nms_keeps_best_of_overlapping() -> None:
+    boxes = np.array(
+        [[0, 0, 10, 10], [1, 1, 11, 11], [20, 20, 30, 30], [0, 0, 10, 10.5], [21, 20, 31, 30]], dtype=np.float32
+    )
+    scores = np.array([0.5, 0.9, 0.8, 0.7, 0.6], dtype=np.float32)
+    # 1 (0.9) suprime a 0 y 3; 2 (0.8) suprime a 4
+    assert nms(boxes, scores, 0.5).tolist() == [1, 2]
+    # Con umbral alto nada se suprime: todos por score descendente
+    assert nms(boxes, scores, 0.99).tolist() == [1, 2, 3, 4, 0]
+    assert nms(np.zeros((0, 4)), np.zeros(0), 0.5).tolist() == []
+
+
+def _raw(rows: list[tuple[float, float, float, float, int, float]], nc: int = 3) -> np.ndarray:
+    # (cx, cy, w, h, clase, score) -> salida cruda (4 + nc, N) como la del export de Ultralytics
+    pred = np.zeros((4 + nc, len(rows)), dtype=np.float32)
+    for j, (cx, cy, w, h, cls, score) in enumerate(rows):
+        pred[:4, j] = (cx, cy, w, h)
+        pred[4 + cls, j] = score
+    return pred
+
+
+def test_postprocess_per_class_nms_and_unletterbox() -> None:
+    pred = _raw(
+        [
+            (100, 100, 40, 40, 1, 0.9),
+            (102, 100, 40, 40, 1, 0.8),  # mismo lugar y clase: lo suprime el NMS
+            (102, 100, 40, 40, 2, 0.7),  # misma caja, otra clase: se conserva
+            (300, 300, 40, 40, 2, 0.2),  # bajo el umbral
+            (5, 5, 20, 20, 0, 0.6),  # se sale de la imagen: se recorta
+        ]
+    )
+    # Imagen de 320x480 (h, w) con ganancia 2 y relleno vertical 16
+    boxes, scores, cls = postprocess(pred, 2.0, (0.0, 16.0), (320, 480), conf=0.25, iou=0.7, max_det=300)
+    assert cls.tolist() == [1, 2, 0]
+    np.testing.assert_allclose(scores, [0.9, 0.7, 0.6])
+    np.testing.assert_allclose(boxes[0], [40, 32, 60, 52])
+    np.testing.assert_allclose(boxes[1], [41, 32, 61, 52])
+    np.testing.assert_allclose(boxes[2], [0, 0, 7.5, 0])
+    assert boxes.dtype == np.float32 and scores.dtype == np.float32
+
+    _, _, cls = postprocess(pred, 2.0, (0.0, 16.0), (320, 480), conf=0.25, iou=0.7, max_det=2)
+    assert cls.tolist() == [1, 2]
+    boxes, scores, cls = postprocess(pred, 1.0, (0.0, 0.0), (320, 480), conf=0.95, iou=0.7, max_det=300)
+    assert boxes.shape == (0, 4) and len(scores) == len(cls) == 0
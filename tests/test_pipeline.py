@@ -0,0 +1,24 @@
+import main
+from tests.conftest import read_events
+
+
+def test_pipeline_matches_sequential_run(tmp_path, moving_box, run_cfg, blob_detector) -> None:
+    # Inferencia adelantada y render en otro hilo: mismos conteos y eventos, en el mismo orden
+    results, events = {}, {}
+    for pipeline in (False, True):
+        outdir = tmp_path / f"out_{pipeline}"
+        cfg = run_cfg(
+            moving_box,
+            outdir=str(outdir),
+            pipeline=pipeline,
+            pipeline_depth=3,
+            render_queue=4,
+            batch_size=4,
+            save_video=True,
+        )
+        results[pipeline] = main.run(cfg, detector=blob_detector())
+        events[pipeline] = read_events(outdir)
+    assert events[True], "la escena debería generar eventos"
+    assert events[True] == events[False]
+    for key in ("frames", "count", "module_counts"):
+        assert results[True][key] == results[False][key]
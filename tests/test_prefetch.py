@@ -0,0 +1,45 @@
+import time
+
+import numpy as np
+
+from core.frame_loader import FrameLoader
+
+
+def _frames(loader: FrameLoader) -> list[tuple[int, str, np.ndarray]]:
+    return [(f.index, f.path.name, f.image.copy()) for f in loader]
+
+
+def test_prefetch_matches_sequential_order(frames) -> None:
+    folder = frames(40, seed=1)
+    (folder / "frame_7.png").write_bytes(b"not an image")
+    expected = _frames(FrameLoader(folder))
+    assert len(expected) == 39
+    for workers, queue_size in ((1, 1), (4, 8), (8, 2)):
+        loader = FrameLoader(folder, prefetch=workers, queue_size=queue_size)
+        got = _frames(loader)
+        assert [g[:2] for g in got] == [e[:2] for e in expected]
+        assert all(np.array_equal(g[2], e[2]) for g, e in zip(got, expected))
+        # El archivo ilegible no se entrega pero conserva su índice
+        assert loader.stats.frames == 40
+        assert 7 not in [g[0] for g in got]
+
+
+def test_prefetch_seek_and_early_stop(frames) -> None:
+    folder = frames(20, seed=2)
+    loader = FrameLoader(folder, prefetch=4)
+    loader.seek(15)
+    assert [f.index for f in loader] == [15, 16, 17, 18, 19]
+
+    it = iter(FrameLoader(folder, prefetch=4, queue_size=4))
+    assert next(it).index == 0
+    it.close()  # cancela la ventana pendiente sin colgarse
+
+
+def test_prefetch_stats_show_slow_consumer(frames) -> None:
+    loader = FrameLoader(frames(12, seed=3), prefetch=2, queue_size=4)
+    for _ in loader:
+        time.sleep(0.02)  # "inferencia" más lenta que la decodificación
+    stats = loader.stats.as_dict()
+    assert stats["frames"] == 12
+    assert stats["queue_full"] > 0
+    assert 0.0 <= stats["full_ratio"] <= 1.0
@@ -0,0 +1,21 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+
+from core import FrameData, RoiPlanner
+
+
+def test_roi_refresh_without_index_multiples() -> None:
+    # Ningún índice inferido es múltiplo de 10 (p.ej. step 10 desde el frame 3): el refresco igual debe llegar
+    selector = SimpleNamespace(locked=True, selected=SimpleNamespace(bbox_xyxy=[200.0, 150.0, 440.0, 360.0]))
+    module = SimpleNamespace(selector=selector, cfg=SimpleNamespace(shrink=-30, expand=40))
+    session = SimpleNamespace(modules={"border": module})
+    planner = RoiPlanner(refresh_interval=10)
+    image = np.zeros((1, 1, 3), dtype=np.uint8)
+    full = []
+    for i in range(1, 100):
+        frame = FrameData(index=10 * i + 3, path=Path(f"frame_{i}.png"), image=image, width=640, height=480)
+        if planner.plan(session, frame) is None:
+            full.append(i)
+    assert full == list(range(10, 100, 10))
@@ -0,0 +1,62 @@
+import os
+
+import cv2
+import numpy as np
+
+import main
+from core import FrameLoader, SharedFrameRing
+
+
+def _shm_segments() -> set[str]:
+    # Solo los segmentos de SharedMemory; los semáforos de las colas se liberan con el GC
+    if not os.path.isdir("/dev/shm"):
+        return set()
+    return {name for name in os.listdir("/dev/shm") if name.startswith("psm_")}
+
+
+def test_ring_matches_loader(frames) -> None:
+    folder = frames(24, seed=8)
+    (folder / "frame_4.png").write_bytes(b"broken")
+    expected = [(f.index, f.path, f.image.copy()) for f in FrameLoader(folder)]
+
+    before = _shm_segments()
+    ring = SharedFrameRing(FrameLoader(folder), slots=3)
+    got = [(f.index, f.path, f.image.copy()) for f in ring]
+    assert [g[:2] for g in got] == [e[:2] for e in expected]
+    assert all(np.array_equal(g[2], e[2]) for g, e in zip(got, expected))
+    assert 4 not in [g[0] for g in got]
+    assert ring.stats.frames == 24 and ring.stats.oversized == 0
+    assert 0.0 <= ring.stats.as_dict()["mean_occupancy_ratio"] <= 1.0
+    assert _shm_segments() == before
+
+
+def test_ring_oversized_frames_and_seek(frames) -> None:
+    folder = frames(10, seed=9)
+    big = np.full((96, 128, 3), 200, dtype=np.uint8)
+    cv2.imwrite(str(folder / "frame_6.png"), big)
+
+    ring = SharedFrameRing(FrameLoader(folder), slots=2)
+    ring.seek(5)
+    got = [(f.index, f.image.shape) for f in ring]
+    assert got == [(5, (48, 64, 3)), (6, (96, 128, 3)), (7, (48, 64, 3)), (8, (48, 64, 3)), (9, (48, 64, 3))]
+    # El slot se dimensiona con el primer frame; el grande viaja por la cola
+    assert ring.stats.oversized == 1
+
+
+def test_ring_early_stop_releases_segments(frames) -> None:
+    folder = frames(30, seed=10)
+    before = _shm_segments()
+    ring = SharedFrameRing(FrameLoader(folder), slots=4)
+    for frame in ring:
+        if frame.index == 3:
+            break
+    assert _shm_segments() == before
+    # Un segundo recorrido arranca un decoder nuevo
+    assert sum(1 for _ in ring) == 30
+
+
+def test_run_with_decode_process(frames, run_cfg, pixel_detector) -> None:
+    cfg = run_cfg(frames(16, seed=11), decode_process=True, save_video=True)
+    result = main.run(cfg, detector=pixel_detector)
+    assert result["frames"] == 16
+    assert pixel_detector.checked == 16 and pixel_detector.mismatched == []
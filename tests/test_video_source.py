@@ -0,0 +1,61 @@
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+import main
+from core import VideoFrameSource
+from tests.conftest import BlobDetector
+
+
+def _write_video(path: Path, n: int) -> Path:
+    # MJPG: todos los frames son intra, el seek es exacto; el brillo identifica el frame
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 10, (64, 48))
+    for i in range(n):
+        writer.write(np.full((48, 64, 3), 8 * i, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+def _positions(source: VideoFrameSource) -> list[tuple[int, int]]:
+    return [(f.index, round(float(f.image.mean()) / 8)) for f in source]
+
+
+@pytest.fixture
+def video(tmp_path) -> Path:
+    return _write_video(tmp_path / "clip.avi", 30)
+
+
+def test_video_source_frames(video) -> None:
+    source = VideoFrameSource(video)
+    assert (len(source), source.fps) == (30, 10.0)
+    frames = list(source)
+    assert [f.index for f in frames] == list(range(30))
+    assert all(f.path == video and (f.width, f.height) == (64, 48) for f in frames)
+    assert [p for _, p in _positions(source)] == list(range(30))
+
+
+def test_video_source_start_stop_step(video) -> None:
+    source = VideoFrameSource(video, start=4, stop=20, step=3)
+    assert len(source) == len(range(4, 20, 3))
+    # Índices secuenciales; la posición en el video avanza de a `step`
+    assert _positions(source) == list(enumerate(range(4, 20, 3)))
+
+
+def test_video_source_seek(video) -> None:
+    source = VideoFrameSource(video, start=2, step=2)
+    source.seek(5)
+    assert _positions(source) == [(i, 2 + 2 * i) for i in range(5, 14)]
+
+
+def test_video_source_missing_file(tmp_path) -> None:
+    with pytest.raises(FileNotFoundError):
+        VideoFrameSource(tmp_path / "missing.mp4")
+
+
+def test_run_from_video(tmp_path, video, run_cfg) -> None:
+    cfg = run_cfg(tmp_path, source="video", video=str(video), save_video=False)
+    detector = BlobDetector()
+    result = main.run(cfg, detector=detector)
+    assert result["frames"] == detector.calls == 30
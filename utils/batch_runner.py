@@ -0,0 +1,218 @@
+# utils/batch_runner.py
+"""
+Corre el pipeline de main.py sobre varias carpetas de frames en paralelo.
+
+Cada carpeta es una corrida independiente (misma config que MAIN) con sus
+salidas de siempre en <outdir>/<nombre de la carpeta>/. Los workers son
+procesos que cargan el modelo una sola vez (initializer) y lo reutilizan entre
+carpetas. Al final se escribe un resumen combinado: conteo, frames/s y
+errores por carpeta.
+
+    python utils/batch_runner.py "data/*/secondary_camera/img" data/pickeoCarros/primary_camera/img --workers 2 --threads 4
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import replace
+from datetime import datetime
+import glob
+import json
+import os
+from pathlib import Path
+import sys
+import time
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from config.settings import MAIN, resolve_path
+
+# Estado de cada proceso worker (lo llena _init_worker)
+_WORKER: dict = {}
+
+
+def expand_folders(patterns: list[str]) -> list[Path]:
+    """Carpetas (sin repetir, en orden) a partir de rutas o globs relativos al proyecto."""
+    folders: list[Path] = []
+    for pattern in patterns:
+        path = resolve_path(pattern)
+        matches = sorted(Path(m) for m in glob.glob(str(path))) if any(c in pattern for c in "*?[") else [path]
+        if not matches:
+            print(f"[WARN] No folders match: {pattern}")
+        for m in matches:
+            if not m.is_dir():
+                print(f"[WARN] Not a folder: {m}")
+            elif m not in folders:
+                folders.append(m)
+    return folders
+
+
+def job_names(folders: list[Path]) -> list[str]:
+    """Nombre de salida por carpeta: ruta relativa a la raíz común, unida con '_' (sin el 'img' final)."""
+    if len(folders) == 1:
+        root = folders[0].parent
+    else:
+        root = Path(os.path.commonpath([str(f) for f in folders]))
+    names: list[str] = []
+    for folder in folders:
+        parts = list(folder.relative_to(root).parts) or [folder.name]
+        if len(parts) > 1 and parts[-1] == "img":
+            parts = parts[:-1]
+        name = "_".join(parts)
+        base, i = name, 2
+        while name in names:
+            name = f"{base}_{i}"
+            i += 1
+        names.append(name)
+    return names
+
+
+def _init_worker(cfg, threads: int) -> None:
+    import cv2
+
+    if threads > 0:
+        # Antes de importar torch/onnxruntime (los carga el detector)
+        for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+            os.environ[var] = str(threads)
+        cv2.setNumThreads(threads)
+        cfg = replace(cfg, onnx_threads=threads)
+
+    from main import load_detector
+
+    detector = None
+    if cfg.detector == "yolo":
+        t0 = time.perf_counter()
+        detector = load_detector(cfg)
+        torch = sys.modules.get("torch")  # lo importa ultralytics (backend torch)
+        if threads > 0 and torch is not None:
+            torch.set_num_threads(threads)
+        print(f"[INFO] Worker {os.getpid()}: model loaded in {time.perf_counter() - t0:.1f}s")
+    _WORKER["cfg"] = cfg
+    _WORKER["detector"] = detector
+
+
+def _run_job(frames_dir: str, outdir: str) -> dict:
+    from main import run
+
+    cfg = replace(
+        _WORKER["cfg"],
+        source="frames",
+        frames_dir=frames_dir,
+        outdir=outdir,
+        cameras_root=None,
+        follow=False,
+    )
+    t0 = time.perf_counter()
+    try:
+        result = run(cfg, detector=_WORKER["detector"])
+    except (Exception, SystemExit) as e:
+        return {
+            "ok": False,
+            "frames_dir": frames_dir,
+            "outdir": outdir,
+            "error": f"{type(e).__name__}: {e}",
+            "elapsed_s": round(time.perf_counter() - t0, 3),
+        }
+    return {"ok": True, "outdir": outdir, "worker": os.getpid(), **result}
+
+
+def run_batch(cfg, jobs: list[tuple[str, str]], workers: int, threads: int) -> list[dict]:
+    """Corre (frames_dir, outdir) en `workers` procesos (0 = en este proceso); resultados en el orden de `jobs`."""
+    results: list[dict] = []
+
+    def done(res: dict) -> None:
+        results.append(res)
+        if res["ok"]:
+            print(f"[OK] {res['frames_dir']}: {res['frames']} frames, count {res['count']} ({res['fps']} fps)")
+        else:
+            print(f"[ERROR] {res['frames_dir']}: {res['error']}")
+
+    if workers == 0:
+        _init_worker(cfg, threads)
+        for job in jobs:
+            done(_run_job(*job))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(cfg, threads)) as pool:
+            futures = {pool.submit(_run_job, *job): job for job in jobs}
+            for fut in as_completed(futures):
+                try:
+                    done(fut.result())
+                except Exception as e:  # worker caído (p.ej. sin memoria)
+                    done({"ok": False, "frames_dir": futures[fut][0], "outdir": futures[fut][1], "error": repr(e)})
+
+    order = {job[0]: i for i, job in enumerate(jobs)}
+    results.sort(key=lambda r: order[r["frames_dir"]])
+    return results
+
+
+def summarize(cfg, results: list[dict], workers: int, threads: int, wall: float) -> dict:
+    """Resumen combinado: totales (conteo, frames/s del lote, fallidas) y el resultado de cada carpeta."""
+    ok = [r for r in results if r["ok"]]
+    frames = sum(r["frames"] for r in ok)
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "model": str(resolve_path(cfg.model)),
+        "workers": workers,
+        "threads_per_worker": threads,
+        "totals": {
+            "folders": len(results),
+            "ok": len(ok),
+            "failed": len(results) - len(ok),
+            "frames": frames,
+            "count": sum(r["count"] for r in ok),
+            "wall_s": round(wall, 3),
+            "fps": round(frames / wall, 2) if wall > 0 else None,
+        },
+        "runs": results,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("folders", nargs="+", help="frames folders or globs (relative to the project)")
+    ap.add_argument("--workers", type=int, default=2, help="worker processes (0 = run in this process)")
+    ap.add_argument("--threads", type=int, default=0, help="threads per worker (0 = cpu_count // workers)")
+    ap.add_argument("--outdir", default=MAIN.outdir, help="each run goes to <outdir>/<folder name>/")
+    ap.add_argument("--summary", default=None, help="combined summary json (default <outdir>/batch_<ts>.json)")
+    args = ap.parse_args()
+
+    cfg = MAIN
+    if cfg.detector == "labels":
+        print("[ERROR] batch_runner needs detector='yolo' (labels_dir belongs to a single folder)")
+        return 2
+    if cfg.detector == "yolo" and not resolve_path(cfg.model).exists():
+        print(f"[ERROR] Model not found: {resolve_path(cfg.model)}")
+        return 2
+    folders = expand_folders(args.folders)
+    if not folders:
+        print("[ERROR] No frames folders to process")
+        return 2
+
+    workers = max(0, min(args.workers, len(folders)))
+    threads = args.threads or max(1, (os.cpu_count() or 1) // max(1, workers))
+    out_base = resolve_path(args.outdir)
+    jobs = [(str(f), str(out_base / name)) for f, name in zip(folders, job_names(folders))]
+    print(f"[INFO] {len(jobs)} folders, {workers or 'no'} workers x {threads} threads -> {out_base}")
+
+    t0 = time.perf_counter()
+    results = run_batch(cfg, jobs, workers, threads)
+    summary = summarize(cfg, results, workers, threads, time.perf_counter() - t0)
+    summary_path = (
+        resolve_path(args.summary)
+        if args.summary
+        else out_base / f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    summary_path.parent.mkdir(parents=True, exist_ok=True)
+    summary_path.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+
+    t = summary["totals"]
+    print(
+        f"[INFO] {t['ok']}/{t['folders']} folders ok, {t['frames']} frames in {t['wall_s']:.1f}s "
+        f"({t['fps']} fps overall), total count {t['count']}"
+    )
+    print(f"[{'OK' if not t['failed'] else 'WARN'}] Summary: {summary_path}")
+    return 0 if not t["failed"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,208 @@
+# utils/compare_detectors.py
+"""
+Paridad entre backends de DetectorYolo (p.ej. torch vs onnx, o FP32 vs INT8)
+sobre una carpeta de frames.
+
+Por frame se emparejan las cajas de ambos backends por clase (IoU greedy) y se
+reporta: detecciones sin pareja, error máximo de coordenadas (px) y diferencia
+de confianza de los pares, y diferencia de conteo por frame. Además cada
+backend alimenta su propia CountingSession (config MAIN) y se comparan los
+conteos finales, junto con el tiempo de inferencia por frame. Sale con código 1
+si se supera alguna tolerancia.
+
+Backends: "torch", "onnx" (FP32), "onnx:dynamic" / "onnx:static" (INT8, ver
+onnx_backend.quantize_onnx; static calibra con --calib-dir).
+
+    python utils/compare_detectors.py --frames data/.../img --limit 200 --ref torch --cand onnx
+    python utils/compare_detectors.py --frames data/.../img --limit 0 --ref onnx --cand onnx:static
+"""
+import argparse
+import json
+from pathlib import Path
+import sys
+import time
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from config.settings import MAIN, resolve_path
+from core import CountingSession, Detections, DetectorYolo, FrameLoader, iou_matrix
+
+
+def compare_frame(ref: Detections, cand: Detections, match_iou: float = 0.5) -> dict:
+    """Empareja por clase (IoU descendente) y devuelve las diferencias del frame."""
+    matched = 0
+    box_err: list[float] = []
+    conf_err: list[float] = []
+    for cid in np.union1d(ref.class_id, cand.class_id):
+        r = ref[ref.class_id == cid]
+        c = cand[cand.class_id == cid]
+        if len(r) == 0 or len(c) == 0:
+            continue
+        iou = iou_matrix(r.xyxy, c.xyxy)
+        used_r: set[int] = set()
+        used_c: set[int] = set()
+        for flat in np.argsort(-iou, axis=None, kind="stable"):
+            i, j = divmod(int(flat), iou.shape[1])
+            if iou[i, j] < match_iou:
+                break
+            if i in used_r or j in used_c:
+                continue
+            used_r.add(i)
+            used_c.add(j)
+            matched += 1
+            box_err.append(float(np.abs(r.xyxy[i].astype(np.float64) - c.xyxy[j]).max()))
+            conf_err.append(float(abs(float(r.conf[i]) - float(c.conf[j]))))
+    return {
+        "ref": len(ref),
+        "cand": len(cand),
+        "matched": matched,
+        "ref_only": len(ref) - matched,
+        "cand_only": len(cand) - matched,
+        "count_diff": len(cand) - len(ref),
+        "box_err": box_err,
+        "conf_err": conf_err,
+    }
+
+
+def summarize(frames: list[dict]) -> dict:
+    box_err = [e for f in frames for e in f["box_err"]]
+    conf_err = [e for f in frames for e in f["conf_err"]]
+    count_diff = [abs(f["count_diff"]) for f in frames]
+    return {
+        "frames": len(frames),
+        "ref_detections": sum(f["ref"] for f in frames),
+        "cand_detections": sum(f["cand"] for f in frames),
+        "matched": sum(f["matched"] for f in frames),
+        "ref_only": sum(f["ref_only"] for f in frames),
+        "cand_only": sum(f["cand_only"] for f in frames),
+        "box_err_mean_px": float(np.mean(box_err)) if box_err else 0.0,
+        "box_err_p95_px": float(np.percentile(box_err, 95)) if box_err else 0.0,
+        "box_err_max_px": float(np.max(box_err)) if box_err else 0.0,
+        "conf_err_mean": float(np.mean(conf_err)) if conf_err else 0.0,
+        "count_diff_max": int(max(count_diff, default=0)),
+        "frames_with_count_diff": int(sum(1 for d in count_diff if d > 0)),
+    }
+
+
+def _make_detector(spec: str, args) -> DetectorYolo:
+    backend, _, quantize = spec.partition(":")
+    return DetectorYolo(
+        weights=str(args.weights),
+        mode="predict",
+        conf=args.conf,
+        imgsz=args.imgsz,
+        device=args.device,
+        backend=backend,
+        quantize=quantize or None,
+        calib_dir=args.calib_dir,
+        calib_frames=args.calib_frames,
+    )
+
+
+def _timed_detect(detector: DetectorYolo, frame) -> tuple[Detections, float]:
+    t0 = time.perf_counter()
+    result = detector.detect(frame.image, frame_index=frame.index, image_path=str(frame.path))
+    return result["detections"], time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--frames", default=MAIN.frames_dir, help="frames folder")
+    ap.add_argument("--model", default=MAIN.model)
+    ap.add_argument("--conf", type=float, default=MAIN.conf)
+    ap.add_argument("--imgsz", type=int, default=MAIN.imgsz)
+    ap.add_argument("--device", default=MAIN.device)
+    ap.add_argument("--limit", type=int, default=200, help="frames to compare (0 = all)")
+    ap.add_argument("--ref", default="torch", help="reference backend: torch | onnx | onnx:dynamic | onnx:static")
+    ap.add_argument("--cand", default="onnx", help="candidate backend (same choices)")
+    ap.add_argument("--calib-dir", default=None, help="calibration frames for onnx:static (default --frames)")
+    ap.add_argument("--calib-frames", type=int, default=MAIN.quant_calib_frames)
+    ap.add_argument("--match-iou", type=float, default=0.5)
+    ap.add_argument("--box-tol", type=float, default=2.0, help="max p95 box error (px)")
+    ap.add_argument("--count-tol", type=int, default=1, help="max per-frame detection count difference")
+    ap.add_argument("--final-count-tol", type=int, default=0, help="max difference of the final counts")
+    ap.add_argument("--out", default="output/parity/compare_detectors.json")
+    args = ap.parse_args()
+
+    args.weights = resolve_path(args.model)
+    if not args.weights.exists():
+        print(f"[ERROR] Model not found: {args.weights}")
+        return 2
+    frames_dir = resolve_path(args.frames)
+    args.calib_dir = resolve_path(args.calib_dir) if args.calib_dir else frames_dir
+    loader = FrameLoader(frames_dir=frames_dir, recursive=MAIN.recursive)
+    limit = args.limit if args.limit > 0 else len(loader)
+
+    ref = _make_detector(args.ref, args)
+    cand = _make_detector(args.cand, args)
+    print(f"[INFO] Comparing {args.ref} vs {args.cand} on {min(len(loader), limit)} frames from {frames_dir}")
+
+    sessions = {"ref": CountingSession(MAIN), "cand": CountingSession(MAIN)}
+    seconds = {"ref": 0.0, "cand": 0.0}
+    per_frame = []
+    for frame in loader:
+        if len(per_frame) >= limit:
+            break
+        r, dt_r = _timed_detect(ref, frame)
+        c, dt_c = _timed_detect(cand, frame)
+        seconds["ref"] += dt_r
+        seconds["cand"] += dt_c
+        for key, dets in (("ref", r), ("cand", c)):
+            sessions[key].update(dets, frame_index=frame.index, image_size=(frame.width, frame.height))
+        per_frame.append({"frame_index": frame.index, **compare_frame(r, c, args.match_iou)})
+
+    summary = summarize(per_frame)
+    n = max(1, len(per_frame))
+    timing = {
+        "ref_ms_per_frame": 1000.0 * seconds["ref"] / n,
+        "cand_ms_per_frame": 1000.0 * seconds["cand"] / n,
+        "speedup": seconds["ref"] / seconds["cand"] if seconds["cand"] > 0 else None,
+    }
+    counts = {
+        key: {"count": session.count, "module_counts": dict(session.module_counts)}
+        for key, session in sessions.items()
+    }
+    counts["diff"] = counts["cand"]["count"] - counts["ref"]["count"]
+    ok = (
+        summary["box_err_p95_px"] <= args.box_tol
+        and summary["count_diff_max"] <= args.count_tol
+        and abs(counts["diff"]) <= args.final_count_tol
+    )
+    report = {
+        "ref": args.ref,
+        "cand": args.cand,
+        "model": str(args.weights),
+        "imgsz": args.imgsz,
+        "conf": args.conf,
+        "tolerance": {"box_p95_px": args.box_tol, "count_diff": args.count_tol, "final_count": args.final_count_tol},
+        "ok": ok,
+        "summary": summary,
+        "counts": counts,
+        "timing": timing,
+        "frames": [{k: v for k, v in f.items() if k not in ("box_err", "conf_err")} for f in per_frame],
+    }
+    out = resolve_path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    print(
+        f"[INFO] Matched {summary['matched']}/{summary['ref_detections']} ({args.ref}) "
+        f"vs {summary['cand_detections']} ({args.cand}); "
+        f"box error mean {summary['box_err_mean_px']:.2f}px p95 {summary['box_err_p95_px']:.2f}px; "
+        f"count diff max {summary['count_diff_max']} ({summary['frames_with_count_diff']} frames)"
+    )
+    print(
+        f"[INFO] Final count: {counts['ref']['count']} ({args.ref}) vs {counts['cand']['count']} ({args.cand}); "
+        f"{timing['ref_ms_per_frame']:.1f} vs {timing['cand_ms_per_frame']:.1f} ms/frame"
+        + (f" (x{timing['speedup']:.2f})" if timing["speedup"] else "")
+    )
+    print(f"[{'OK' if ok else 'FAIL'}] Report: {out}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
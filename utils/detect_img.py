@@ -1,5 +1,6 @@
 # utils/detec_img.py
 import argparse
+import json
 import re
 from pathlib import Path
 
@@ -59,6 +60,9 @@ def run_on_folder(
         return
 
     ann_dir, lab_dir = ensure_dirs(out_base)
+    # Tabla de clases para reproducir los labels sin el modelo (core.LabelsDetector)
+    names = model.names if isinstance(model.names, dict) else dict(enumerate(model.names))
+    (out_base / "names.json").write_text(json.dumps({int(k): v for k, v in names.items()}, indent=2), encoding="utf-8")
 
     print(f"[INFO] Processing {len(images)} images from: {img_dir}")
     print(f"[INFO] Annotated -> {ann_dir}")